@@ -0,0 +1,53 @@
+"""
+Mierzy czas importu modułów potrzebnych każdej podkomendzie cli.
+
+Każdy pomiar odbywa się w nowym interpreterze, więc obejmuje pełny koszt importu.
+Uruchomienie (z katalogu głównego repozytorium):
+    python benchmarks/bench_cli_import.py
+"""
+import os
+import subprocess
+import sys
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# moduły importowane przez podkomendy (zob. funkcje cmd_* w cli.py)
+subcommand_imports = {
+    "(start cli)": "import cli",
+    "fetch / build": "import cli, get_data",
+    "stats": "import cli, get_data, stats",
+    "plot": "import cli, matplotlib; matplotlib.use('Agg'); import get_data, stats, plots",
+}
+
+snippet = """
+import time
+start = time.perf_counter()
+{code}
+print(time.perf_counter() - start)
+"""
+
+
+def measure(code, repeat=5):
+    """
+    Zwraca najkrótszy czas importu w sekundach z kilku uruchomień.
+
+    Args:
+        code (str): Instrukcje importu.
+        repeat (int): Liczba uruchomień.
+
+    Returns:
+        float: Czas importu w sekundach.
+    """
+    times = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", snippet.format(code=code)],
+            cwd=root, capture_output=True, text=True, check=True,
+        )
+        times.append(float(out.stdout.strip()))
+    return min(times)
+
+
+if __name__ == "__main__":
+    for name, code in subcommand_imports.items():
+        print(f"{name:<16} {measure(code) * 1000:8.1f} ms")
@@ -0,0 +1,66 @@
+"""
+Benchmark calc_trends i calc_yoy_deltas dla pełnego zestawu stacji.
+
+Uruchomienie (z katalogu głównego repozytorium):
+    python benchmarks/bench_trends.py --stations 800 --years 2015 2016 2017 2018 2019 2020 2021 2022 2023 2024
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from trends import calc_trends, calc_yoy_deltas  # noqa: E402
+
+
+def make_monthly_means(n_stations, years, seed=0):
+    """
+    Tworzy syntetyczne średnie miesięczne w formacie wyniku calc_monthly_means.
+
+    Args:
+        n_stations (int): Liczba stacji.
+        years (list[int]): Lata danych.
+        seed (int): Ziarno generatora liczb losowych.
+
+    Returns:
+        pandas.DataFrame: Średnie miesięczne PM2.5.
+    """
+    rng = np.random.default_rng(seed)
+    idx = pd.MultiIndex.from_product(
+        [range(n_stations), years, range(1, 13)], names=["station", "Rok", "Miesiąc"]
+    ).to_frame(index=False)
+    season = 10 * np.cos(2 * np.pi * (idx["Miesiąc"] - 1) / 12)
+    trend = rng.normal(-1, 0.5, n_stations)[idx["station"]] * (idx["Rok"] - years[0])
+    idx["Mean PM25"] = 25 + season + trend + rng.normal(0, 3, len(idx))
+    idx["Miejscowość"] = "Miasto" + (idx["station"] % 50).astype(str)
+    idx["Kod stacji"] = "St" + idx["station"].astype(str)
+    return idx.drop(columns="station")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--stations", type=int, default=800)
+    parser.add_argument("--years", type=int, nargs="+", default=[2015, 2018, 2021, 2024])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    monthly = make_monthly_means(args.stations, args.years)
+    for name, func in [
+        ("calc_trends", calc_trends),
+        ("calc_trends (seasonal)", lambda df: calc_trends(df, seasonal=True)),
+        ("calc_yoy_deltas", calc_yoy_deltas),
+    ]:
+        times = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            func(monthly)
+            times.append(time.perf_counter() - start)
+        print(f"{name:<24} {args.stations} stacji x {len(args.years)} lat: {min(times):.3f} s")
+
+
+if __name__ == "__main__":
+    main()
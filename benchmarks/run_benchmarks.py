@@ -0,0 +1,186 @@
+"""
+Benchmark kroków pipeline'u z get_data.py i stats.py na syntetycznych archiwach GIOŚ.
+
+Dane są generowane modułem synthetic (XLSX w ZIP, metadane ze zmienionymi kodami stacji)
+i udostępniane lokalnym serwerem HTTP, więc mierzony jest cały pipeline łącznie z pobieraniem.
+Dla każdej funkcji zapisywany jest najlepszy czas z kilku powtórzeń i szczytowe
+zużycie pamięci (tracemalloc, osobne uruchomienie).
+
+Uruchomienie (z katalogu głównego repozytorium):
+    python benchmarks/run_benchmarks.py                       # porównanie z benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --save-baseline       # zapis nowego punktu odniesienia
+    python benchmarks/run_benchmarks.py --stations 300 --years 2015 2018 2021 2024
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root)
+
+import get_data  # noqa: E402
+import stats  # noqa: E402
+import synthetic  # noqa: E402
+
+baseline_path = os.path.join(root, "benchmarks", "baseline.json")
+
+wojew_dict = {p: p for p in synthetic.wojew_prefixes}
+
+
+def measure(func, repeat):
+    """
+    Mierzy czas i szczytowe zużycie pamięci wywołania funkcji.
+
+    Args:
+        func (callable): Funkcja bez argumentów.
+        repeat (int): Liczba powtórzeń pomiaru czasu.
+
+    Returns:
+        dict: Najlepszy czas [s] i szczytowa pamięć [MB].
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"time_s": min(times), "peak_mb": peak / 2**20}
+
+
+def run(n_stations, years, repeat, workdir):
+    """
+    Generuje dane i uruchamia benchmarki kolejnych kroków pipeline'u.
+
+    Args:
+        n_stations (int): Liczba stacji.
+        years (list[int]): Lata danych.
+        repeat (int): Liczba powtórzeń pomiaru czasu.
+        workdir (str): Katalog roboczy na archiwa i pliki wynikowe.
+
+    Returns:
+        dict: Wyniki {nazwa funkcji: {time_s, peak_mb}}.
+    """
+    config = synthetic.write_archive_set(os.path.join(workdir, "archives"), years, n_stations)
+    outfile = os.path.join(workdir, "PM25.csv")
+    year = years[0]
+    results = {}
+
+    with synthetic.serve_directory(os.path.join(workdir, "archives")) as url:
+        get_data.gios_archive_url = url
+        ids, files, clean_info = config["gios_url_ids"], config["gios_pm25_file"], config["clean_info"]
+
+        raw = get_data.download_gios_archive(year, ids[year], files[year])
+        meta = get_data.download_gios_meta(ids["meta"])
+        cleaned = get_data.clean_pm25(raw, **clean_info[year])
+        shifted = get_data.midnight(cleaned)
+        updated = get_data.update_stations(shifted, meta)
+        df_pm25, _ = get_data.make_pm25_data(years, ids, files, clean_info, outfile)
+
+        long = stats.convert_df(df_pm25)
+        monthly = stats.calc_monthly_means(long)
+        daily = stats.calc_daily_means(long, with_coverage=True)
+        over = stats.count_overnorm_days(daily, 15)
+        # dwa roczniki, w drugim brakuje części stacji (join="outer")
+        half = len(updated) // 2
+        frames = [updated.iloc[:half], updated.iloc[half:, : updated.shape[1] // 2 + 1]]
+        quantized = get_data.to_quantized(df_pm25)
+
+        cases = {
+            "get_data.download_gios_archive": lambda: get_data.download_gios_archive(year, ids[year], files[year]),
+            "get_data.download_gios_meta": lambda: get_data.download_gios_meta(ids["meta"]),
+            "get_data.clean_pm25": lambda: get_data.clean_pm25(raw, **clean_info[year]),
+            "get_data.midnight": lambda: get_data.midnight(cleaned),
+            "get_data.update_stations": lambda: get_data.update_stations(shifted, meta),
+            "get_data.add_city": lambda: get_data.add_city(updated, meta),
+            "get_data.make_pm25_data": lambda: get_data.make_pm25_data(years, ids, files, clean_info, outfile),
+            "get_data.read_pm25_csv": lambda: get_data.read_pm25_csv(outfile),
+            "get_data.to_sparse": lambda: get_data.to_sparse(df_pm25),
+            "get_data.concat_sparse": lambda: get_data.concat_sparse(frames),
+            "get_data.to_quantized": lambda: get_data.to_quantized(df_pm25),
+            "get_data.from_quantized": lambda: get_data.from_quantized(quantized),
+            "stats.convert_df": lambda: stats.convert_df(df_pm25),
+            "stats.to_matrix": lambda: stats.to_matrix(df_pm25),
+            "stats.calc_monthly_means": lambda: stats.calc_monthly_means(long),
+            "stats.calc_monthly_city_means": lambda: stats.calc_monthly_city_means(monthly),
+            "stats.calc_daily_means": lambda: stats.calc_daily_means(long),
+            "stats.calc_coverage": lambda: stats.calc_coverage(daily),
+            "stats.calc_availability": lambda: stats.calc_availability(long),
+            "stats.count_overnorm_days": lambda: stats.count_overnorm_days(daily, 15, min_coverage=0.75),
+            "stats.top_bottom_stations": lambda: stats.top_bottom_stations(over, year),
+            "stats.wojew_over_treshold": lambda: stats.wojew_over_treshold(long.copy(), wojew_dict),
+        }
+        for name, func in cases.items():
+            results[name] = measure(func, repeat)
+            print(f"{name:<34} {results[name]['time_s']:8.3f} s {results[name]['peak_mb']:9.1f} MB", flush=True)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    Porównuje wyniki z punktem odniesienia.
+
+    Args:
+        results (dict): Bieżące wyniki.
+        baseline (dict): Zapisany punkt odniesienia.
+        tolerance (float): Dopuszczalny względny wzrost (np. 1.5 = o 50%).
+
+    Returns:
+        list[str]: Opisy regresji (pusta lista, gdy brak).
+    """
+    regressions = []
+    for name, base in baseline["results"].items():
+        if name not in results:
+            continue
+        for metric in ["time_s", "peak_mb"]:
+            # bardzo krótkie pomiary są zbyt zaszumione, by je porównywać
+            if metric == "time_s" and base[metric] < 0.01:
+                continue
+            ratio = results[name][metric] / base[metric] if base[metric] else 1.0
+            if ratio > tolerance:
+                regressions.append(f"{name} {metric}: {base[metric]:.3f} -> {results[name][metric]:.3f} (x{ratio:.2f})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--stations", type=int, default=50)
+    parser.add_argument("--years", type=int, nargs="+", default=[2015, 2018])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", default=baseline_path)
+    parser.add_argument("--save-baseline", action="store_true", help="zapisz wyniki jako punkt odniesienia")
+    parser.add_argument("--tolerance", type=float, default=1.5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        results = run(args.stations, args.years, args.repeat, workdir)
+
+    params = {"stations": args.stations, "years": args.years}
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"params": params, "results": results}, f, indent=2)
+        print(f"Zapisano punkt odniesienia: {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        return
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline["params"] != params:
+        print(f"Punkt odniesienia dotyczy innych parametrów ({baseline['params']}) - pomijam porównanie.")
+        return
+    regressions = compare(results, baseline, args.tolerance)
+    for line in regressions:
+        print("REGRESJA:", line)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
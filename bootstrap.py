@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+
+from stats import check_single_pollutant
+
+# domyślna liczba prób bootstrap
+n_resamples = 1000
+# największa liczba elementów tablicy prób (grupa x próba x dzień) liczonej naraz
+batch_elements = 20_000_000
+
+
+def _padded(values, group_codes, n_groups):
+    """
+    Układa wartości grup w macierz (grupa x pozycja) uzupełnioną NaN.
+
+    Args:
+        values (numpy.ndarray): Wartości posortowane według grupy.
+        group_codes (numpy.ndarray): Numery grup (niemalejące).
+        n_groups (int): Liczba grup.
+
+    Returns:
+        tuple: Macierz wartości i liczba wartości w każdej grupie.
+    """
+    sizes = np.bincount(group_codes, minlength=n_groups)
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    position = np.arange(len(values)) - starts[group_codes]
+    out = np.full((n_groups, sizes.max(initial=1)), np.nan)
+    out[group_codes, position] = values
+    return out, sizes
+
+
+def resample_means(values, sizes, n=None, seed=None):
+    """
+    Losuje próby bootstrap średnich wszystkich grup jednocześnie.
+
+    Indeksy losowania ze zwracaniem są generowane naraz dla bloku grup
+    (grupa x próba x pozycja), a średnie liczone jednym przebiegiem po osi
+    pozycji; bloki grup są dobierane tak, aby tablica miała najwyżej
+    batch_elements elementów.
+
+    Args:
+        values (numpy.ndarray): Macierz (grupa x pozycja) z wartościami na początku wierszy.
+        sizes (numpy.ndarray): Liczba wartości w każdej grupie.
+        n (int | None): Liczba prób (domyślnie n_resamples).
+        seed (int | None): Ziarno generatora (ten sam seed - ten sam wynik).
+
+    Returns:
+        numpy.ndarray: Średnie prób (grupa x próba); NaN dla pustych grup.
+    """
+    n = n_resamples if n is None else n
+    rng = np.random.default_rng(seed)
+    n_groups, width = values.shape
+    out = np.full((n_groups, n), np.nan)
+    step = max(1, batch_elements // max(1, n * width))
+    flat = np.nan_to_num(values).ravel()
+    used = (np.arange(width) < sizes[:, None]).astype(float)
+    for start in range(0, n_groups, step):
+        block = slice(start, start + step)
+        size = sizes[block, None, None]
+        # indeks losowany z [0, liczba wartości grupy); pozycje poza grupą mają wagę 0
+        u = rng.random((len(size), n, width), dtype=np.float32)
+        idx = np.minimum((u * size).astype(np.int32), np.maximum(size - 1, 0))
+        idx += (np.arange(start, start + len(size), dtype=np.int32) * width)[:, None, None]
+        total = np.einsum("gnw,gw->gn", flat[idx], used[block])
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out[block] = np.where(size[:, :, 0] > 0, total / size[:, :, 0], np.nan)
+    return out
+
+
+def bootstrap_means(daily, by=("Miejscowość",), n=None, level=0.95, seed=None):
+    """
+    Wyznacza przedziały ufności średnich miesięcznych metodą bootstrap dni.
+
+    Dla każdego miesiąca i grupy (domyślnie miejscowości) losowane są ze
+    zwracaniem średnie dzienne; gdy grupą nie jest stacja, średnią dzienną
+    grupy jest średnia stacji z danej doby. Wszystkie grupy i miesiące są
+    liczone jedną operacją na tablicach (zob. resample_means).
+
+    Args:
+        daily (pandas.DataFrame): Dzienne średnie (wynik calc_daily_means).
+        by (tuple[str]): Kolumny grup, np. ("Miejscowość",) albo ("Miejscowość", "Kod stacji");
+            dane kilku wskaźników wymagają kolumny "Wskaźnik" w grupach.
+        n (int | None): Liczba prób (domyślnie n_resamples).
+        level (float): Poziom ufności przedziału percentylowego.
+        seed (int | None): Ziarno generatora dla powtarzalnych wyników.
+
+    Returns:
+        pandas.DataFrame: Kolumny Rok, Miesiąc, grupy, Mean PM25 (średnia średnich dziennych),
+            Dolna granica, Górna granica i Liczba dni.
+
+    Raises:
+        ValueError: Gdy dane zawierają kilka wskaźników, a grupy ich nie rozróżniają.
+    """
+    by = list(by)
+    if "Wskaźnik" not in by:
+        check_single_pollutant(daily)
+    df = daily[daily["Daily mean PM25"].notna()]
+    dates = pd.to_datetime(df["Data"])
+    keys = [dates.dt.year.rename("Rok"), dates.dt.month.rename("Miesiąc"), *[df[k] for k in by]]
+    if "Kod stacji" not in by:
+        # średnia stacji grupy w każdej dobie
+        days = df.groupby([*keys, dates.rename("Data")])["Daily mean PM25"].mean()
+    else:
+        days = df.set_index([*keys, dates.rename("Data")])["Daily mean PM25"].sort_index()
+
+    groups = days.index.droplevel("Data")
+    codes, uniques = pd.factorize(groups, sort=True)
+    order = np.argsort(codes, kind="stable")
+    values, sizes = _padded(days.to_numpy(dtype=float)[order], codes[order], len(uniques))
+
+    replicates = resample_means(values, sizes, n, seed)
+    alpha = (1 - level) / 2
+    lower, upper = np.quantile(replicates, [alpha, 1 - alpha], axis=1)
+
+    out = pd.DataFrame(list(uniques), columns=["Rok", "Miesiąc", *by])
+    out["Mean PM25"] = np.nansum(values, axis=1) / sizes
+    out["Dolna granica"] = lower
+    out["Górna granica"] = upper
+    out["Liczba dni"] = sizes
+    return out
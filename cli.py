@@ -0,0 +1,306 @@
+"""
+Wiersz poleceń dla pipeline'u PM2.5.
+
+Przykłady (z katalogu głównego repozytorium):
+    python -m cli build --config config.example.json --out PM25.csv
+    python -m cli shard init --root /wspolny/build --config config.example.json
+    python -m cli shard work --root /wspolny/build    (na każdym węźle)
+    python -m cli shard merge --root /wspolny/build --out PM25.csv
+    python -m cli stats PM25.csv --what overnorm --threshold 15 --out over.csv
+    python -m cli plot PM25.csv --what heatmaps --out heatmaps.png
+
+Ciężkie biblioteki (pandas, requests, matplotlib, seaborn) są importowane dopiero
+wewnątrz podkomendy, która ich potrzebuje, więc np. zadania cron korzystające
+tylko z build/stats nie ładują bibliotek do wykresów.
+"""
+import argparse
+import json
+import sys
+
+
+def load_config(path):
+    """
+    Wczytuje konfigurację pipeline'u z pliku JSON.
+
+    Klucze lat w JSON są napisami, dlatego zamieniane są na liczby całkowite
+    (z wyjątkiem klucza "meta" w gios_url_ids).
+
+    Args:
+        path (str): Ścieżka do pliku JSON.
+
+    Returns:
+        dict: Konfiguracja z kluczami years, gios_url_ids, gios_pm25_file, opcjonalnie gios_files (pliki kilku wskaźników, zob. make_multi_data), clean_info (bez niego układ arkuszy jest rozpoznawany automatycznie) i wojew_dict.
+    """
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+
+    def int_keys(d):
+        return {int(k) if k.isdigit() else k: v for k, v in d.items()}
+
+    for key in ["gios_url_ids", "gios_pm25_file", "gios_files", "clean_info"]:
+        if key in config:
+            config[key] = int_keys(config[key])
+    return config
+
+
+def _write_table(df, out):
+    """Zapisuje tabelę do CSV albo na standardowe wyjście."""
+    if out:
+        df.to_csv(out, index=False)
+    else:
+        df.to_csv(sys.stdout, index=False)
+
+
+def cmd_fetch(args):
+    """Pobiera surowe archiwum jednego roku (lub metadane) i zapisuje do CSV."""
+    import get_data
+
+    config = load_config(args.config)
+    if args.year is None:
+        df = get_data.download_gios_meta(config["gios_url_ids"]["meta"])
+    else:
+        df = get_data.download_gios_archive(
+            args.year, config["gios_url_ids"][args.year], config["gios_pm25_file"][args.year]
+        )
+    df.to_csv(args.out, index=False)
+
+
+def cmd_build(args):
+    """Uruchamia pełny pipeline make_pm25_data (dla gios_files w konfiguracji - kilka wskaźników)."""
+    import get_data
+
+    config = load_config(args.config)
+    get_data.make_pm25_data(
+        years=config["years"],
+        gios_url_ids=config["gios_url_ids"],
+        gios_pm25_file=config.get("gios_files") or config["gios_pm25_file"],
+        clean_info=config.get("clean_info"),
+        outfile=args.out,
+        join=args.join,
+        validate=args.validate,
+    )
+
+
+def cmd_stats(args):
+    """Liczy wybraną tabelę statystyk z pliku CSV zapisanego przez build."""
+    import get_data
+    import stats
+
+    long = stats.convert_df(get_data.read_pm25_csv(args.data, quantized=args.quantized), decode=False)
+
+    if args.what == "monthly":
+        out = stats.calc_monthly_means(long, min_coverage=args.min_coverage)
+    elif args.what == "city":
+        out = stats.calc_monthly_city_means(
+            stats.calc_monthly_means(long, min_coverage=args.min_coverage)
+        )
+    else:
+        daily = stats.calc_daily_means(long, with_coverage=True)
+        if args.what == "daily":
+            out = daily
+        elif args.what == "coverage":
+            out = stats.calc_coverage(daily, min_coverage=args.min_coverage or 0.75)
+        else:
+            out = stats.count_overnorm_days(daily, args.threshold, min_coverage=args.min_coverage)
+            if args.what == "top_bottom":
+                year = args.year or int(out["Rok"].max())
+                out = stats.top_bottom_stations(out, year=year, n=args.n)
+    _write_table(out, args.out)
+
+
+def cmd_export(args):
+    """Zapisuje średnie dzienne, miesięczne i liczby dni z przekroczeniem do bazy SQLite."""
+    import export_sql
+    import get_data
+    import stats
+
+    wojew_dict = load_config(args.config)["wojew_dict"] if args.config else None
+    long = stats.convert_df(get_data.read_pm25_csv(args.data))
+    daily = stats.calc_daily_means(long, with_coverage=True)
+    written = export_sql.export_tables(
+        args.db,
+        daily=daily,
+        monthly=stats.calc_monthly_means(long, min_coverage=args.min_coverage, with_coverage=True),
+        overnorm=stats.count_overnorm_days(daily, args.threshold, min_coverage=args.min_coverage),
+        wojew_dict=wojew_dict,
+    )
+    for name, rows in written.items():
+        print(f"{name}: {rows}")
+
+
+def cmd_serve(args):
+    """Uruchamia lokalny serwer HTTP z danymi z pliku CSV zapisanego przez build."""
+    import service
+
+    wojew_dict = load_config(args.config)["wojew_dict"] if args.config else None
+    dataset = service.Dataset.from_csv(args.data, wojew_dict)
+    server = service.make_server(dataset, args.host, args.port)
+    print(f"Serwer: http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def cmd_shard(args):
+    """Budowa podzielona na zadania: manifest, pracownik, stan zadań albo łączenie wyników."""
+    import sharded
+
+    if args.action == "init":
+        if not args.config:
+            raise SystemExit("shard init wymaga --config")
+        config = load_config(args.config)
+        sharded.create_manifest(
+            args.root,
+            years=config["years"],
+            gios_url_ids=config["gios_url_ids"],
+            gios_files=config.get("gios_files") or config["gios_pm25_file"],
+            clean_info=config.get("clean_info"),
+            join=args.join,
+        )
+    elif args.action == "work":
+        done = sharded.work(args.root)
+        print(f"Wykonane zadania: {', '.join(done) or '-'}")
+    elif args.action == "status":
+        _write_table(sharded.Manifest(args.root).status(), None)
+    else:
+        sharded.merge(args.root, args.out)
+
+
+def cmd_plot(args):
+    """Rysuje wybrany wykres z pliku CSV zapisanego przez build i zapisuje go do pliku."""
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    import get_data
+    import plots
+    import stats
+
+    long = stats.convert_df(get_data.read_pm25_csv(args.data))
+    years = args.years
+
+    if args.what == "means":
+        ci = None
+        if args.ci:
+            import bootstrap
+
+            ci = bootstrap.bootstrap_means(stats.calc_daily_means(long), seed=0)
+        fig = plots.plot_means(stats.calc_monthly_means(long), cities=args.cities, years=years, show=False, ci=ci)
+    elif args.what == "heatmaps":
+        fig = plots.heatmaps_means(plots.MonthCube.from_means(stats.calc_monthly_means(long)), years=years)
+    elif args.what == "overnorm":
+        over = stats.count_overnorm_days(stats.calc_daily_means(long), args.threshold)
+        selected = stats.top_bottom_stations(over, year=years[-1], n=args.n)
+        fig = plots.plot_overnorm(over, selected, years=years, show=False)
+    else:
+        config = load_config(args.config)
+        long = long[long["datetime"].dt.year == years[-1]]
+        counts = stats.wojew_over_treshold(long, config["wojew_dict"], args.threshold)
+        fig = plots.plot_wojewodztwa(counts, year=years[-1], treshold=args.threshold, show=False)
+
+    fig.savefig(args.out, bbox_inches="tight")
+    plt.close(fig)
+
+
+def build_parser():
+    """
+    Tworzy parser argumentów wiersza poleceń.
+
+    Returns:
+        argparse.ArgumentParser: Parser z podkomendami fetch, build, stats, export, serve, shard i plot.
+    """
+    parser = argparse.ArgumentParser(prog="python -m cli", description="Pipeline danych PM2.5 (GIOŚ).")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("fetch", help="pobierz surowe dane jednego roku lub metadane")
+    p.add_argument("--config", required=True, help="plik JSON z konfiguracją")
+    p.add_argument("--year", type=int, help="rok archiwum (bez podania - metadane)")
+    p.add_argument("--out", required=True, help="plik wyjściowy CSV")
+    p.set_defaults(func=cmd_fetch)
+
+    p = sub.add_parser("build", help="zbuduj połączony zbiór PM2.5 (make_pm25_data)")
+    p.add_argument("--config", required=True, help="plik JSON z konfiguracją")
+    p.add_argument("--out", default="PM25.csv", help="plik wyjściowy CSV")
+    p.add_argument(
+        "--join", choices=["inner", "outer"], default="inner",
+        help="inner - stacje ze wszystkich lat, outer - wszystkie stacje (kolumny rzadkie)",
+    )
+    p.add_argument(
+        "--validate", action="store_true",
+        help="sprawdź jakość danych, zamaskuj błędne pomiary i zapisz raport <out>_issues.csv",
+    )
+    p.set_defaults(func=cmd_build)
+
+    p = sub.add_parser("stats", help="policz statystyki z pliku zbudowanego przez build")
+    p.add_argument("data", help="plik CSV z danymi PM2.5")
+    p.add_argument(
+        "--what",
+        choices=["monthly", "city", "daily", "coverage", "overnorm", "top_bottom"],
+        default="overnorm",
+    )
+    p.add_argument("--threshold", type=float, default=15.0, help="dobowa norma PM2.5")
+    p.add_argument("--min-coverage", type=float, default=None, help="minimalne pokrycie danymi (np. 0.75)")
+    p.add_argument("--year", type=int, help="rok dla top_bottom (domyślnie ostatni)")
+    p.add_argument("--n", type=int, default=3, help="liczba stacji dla top_bottom")
+    p.add_argument(
+        "--quantized", action="store_true",
+        help="trzymaj pomiary jako liczby całkowite (int16/int32) i licz średnie bez dekodowania",
+    )
+    p.add_argument("--out", help="plik wyjściowy CSV (domyślnie standardowe wyjście)")
+    p.set_defaults(func=cmd_stats)
+
+    p = sub.add_parser("export", help="zapisz tabele statystyk do bazy SQLite")
+    p.add_argument("data", help="plik CSV z danymi PM2.5")
+    p.add_argument("--db", required=True, help="plik bazy SQLite")
+    p.add_argument("--config", help="plik JSON z wojew_dict (kolumna Województwo)")
+    p.add_argument("--threshold", type=float, default=15.0, help="dobowa norma PM2.5")
+    p.add_argument("--min-coverage", type=float, default=None, help="minimalne pokrycie danymi (np. 0.75)")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("serve", help="udostępnij statystyki lokalnym serwerem HTTP (JSON/CSV)")
+    p.add_argument("data", help="plik CSV z danymi PM2.5")
+    p.add_argument("--config", help="plik JSON z wojew_dict (dla /wojewodztwa)")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8000)
+    p.set_defaults(func=cmd_serve)
+
+    p = sub.add_parser("shard", help="budowa podzielona na zadania (rok, wskaźnik) dla wielu węzłów")
+    p.add_argument(
+        "action", choices=["init", "work", "status", "merge"],
+        help="init - manifest zadań, work - pracownik, status - stan zadań, merge - połączenie wyników",
+    )
+    p.add_argument("--root", required=True, help="wspólny katalog budowy (np. na dysku sieciowym)")
+    p.add_argument("--config", help="plik JSON z konfiguracją (dla init)")
+    p.add_argument("--join", choices=["inner", "outer"], default="inner", help="sposób łączenia lat (dla init)")
+    p.add_argument("--out", default="PM25.csv", help="plik wyjściowy CSV (dla merge)")
+    p.set_defaults(func=cmd_shard)
+
+    p = sub.add_parser("plot", help="zapisz wykres do pliku PNG/SVG")
+    p.add_argument("data", help="plik CSV z danymi PM2.5")
+    p.add_argument("--what", choices=["means", "heatmaps", "overnorm", "wojewodztwa"], default="heatmaps")
+    p.add_argument("--years", type=int, nargs="+", default=[2015, 2018, 2021, 2024])
+    p.add_argument("--cities", nargs="+", default=["Warszawa", "Katowice"])
+    p.add_argument("--threshold", type=float, default=15.0, help="dobowa norma PM2.5")
+    p.add_argument("--n", type=int, default=3, help="liczba stacji dla overnorm")
+    p.add_argument("--ci", action="store_true", help="pasma 95%% przedziałów ufności (bootstrap) dla means")
+    p.add_argument("--config", help="plik JSON z wojew_dict (dla wojewodztwa)")
+    p.add_argument("--out", required=True, help="plik wyjściowy (PNG/SVG)")
+    p.set_defaults(func=cmd_plot)
+
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.func is cmd_plot and args.what == "wojewodztwa" and not args.config:
+        parser.error("--config jest wymagany dla --what wojewodztwa")
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+import concurrent.futures
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from stats import check_single_pollutant, to_matrix
+
+# liczba stacji w jednym bloku macierzy korelacji
+block_size = 256
+
+
+def station_matrix(data):
+    """
+    Zamienia dane PM2.5 na macierz (czas x stacja).
+
+    Args:
+        data (pandas.DataFrame): Dane godzinowe w formacie szerokim z MultiIndex
+            albo dzienne średnie (wynik calc_daily_means).
+
+    Returns:
+        tuple: Macierz wartości (numpy.ndarray) i kolumny stacji
+            (pandas.MultiIndex (Miejscowość, Kod stacji)).
+
+    Raises:
+        ValueError: Gdy dane zawierają kilka wskaźników (stats.check_single_pollutant).
+    """
+    check_single_pollutant(data)
+    if "Daily mean PM25" not in data.columns:
+        _, values, stations = to_matrix(data)
+        return values, stations
+    keys = ["Miejscowość", "Kod stacji"]
+    wide = data.pivot_table(values="Daily mean PM25", index="Data", columns=keys, dropna=False)
+    # dropna=False tworzy wszystkie kombinacje poziomów; zostają tylko istniejące stacje
+    stations = pd.MultiIndex.from_frame(data[keys].drop_duplicates()).sort_values()
+    return wide.reindex(columns=stations).to_numpy(dtype=float), stations
+
+
+def _block_sums(x_i, m_i, x_j, m_j):
+    """
+    Liczy sumy potrzebne do korelacji par stacji z dwóch bloków po wspólnych godzinach.
+
+    Każda suma to jedno mnożenie macierzy: maska pomiarów wybiera godziny,
+    w których obie stacje pary mają pomiar.
+
+    Args:
+        x_i (numpy.ndarray): Wartości bloku i (braki jako 0).
+        m_i (numpy.ndarray): Maska pomiarów bloku i (0/1).
+        x_j (numpy.ndarray): Wartości bloku j (braki jako 0).
+        m_j (numpy.ndarray): Maska pomiarów bloku j (0/1).
+
+    Returns:
+        tuple: Korelacje i liczby wspólnych pomiarów (blok i x blok j).
+    """
+    n = m_i.T @ m_j
+    sx = x_i.T @ m_j
+    sy = m_i.T @ x_j
+    sxx = (x_i * x_i).T @ m_j
+    syy = m_i.T @ (x_j * x_j)
+    sxy = x_i.T @ x_j
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = n * sxy - sx * sy
+        var = (n * sxx - sx * sx) * (n * syy - sy * sy)
+        corr = cov / np.sqrt(var)
+    return np.clip(corr, -1.0, 1.0), n
+
+
+def pairwise_corr(values, min_periods=24, block=None, dtype=np.float64, workers=None):
+    """
+    Oblicza korelacje Pearsona wszystkich par kolumn po wspólnych (niepustych) wierszach.
+
+    Macierz jest liczona blokami stacji (block x block), więc pamięć pośrednia
+    nie zależy od liczby stacji, a bloki mieszczą się w pamięci podręcznej.
+    Kolumny są wcześniej centrowane średnią, dzięki czemu sumy w float32
+    zachowują dokładność. Bloki mogą być liczone w wątkach (mnożenie macierzy
+    NumPy zwalnia GIL).
+
+    Args:
+        values (numpy.ndarray): Macierz (czas x stacja) z NaN w miejscu braków.
+        min_periods (int): Minimalna liczba wspólnych pomiarów; dla mniejszej korelacja to NaN.
+        block (int | None): Liczba stacji w bloku (domyślnie block_size).
+        dtype (numpy.dtype): Typ akumulacji (np.float64 albo np.float32).
+        workers (int | None): Liczba wątków (None lub 1 - obliczenia w bieżącym wątku).
+
+    Returns:
+        tuple: Macierz korelacji i macierz liczby wspólnych pomiarów (stacja x stacja).
+    """
+    block = block or block_size
+    valid = ~np.isnan(values)
+    mean = np.nanmean(np.where(valid.any(axis=0), values, 0.0), axis=0)
+    x = np.where(valid, values - mean, 0.0).astype(dtype)
+    m = valid.astype(dtype)
+
+    k = values.shape[1]
+    corr = np.full((k, k), np.nan)
+    count = np.zeros((k, k), dtype=np.int64)
+    starts = range(0, k, block)
+    pairs = [(i, j) for i, j in itertools.product(starts, starts) if i <= j]
+
+    def compute(pair):
+        i, j = pair
+        si, sj = slice(i, i + block), slice(j, j + block)
+        c, n = _block_sums(x[:, si], m[:, si], x[:, sj], m[:, sj])
+        n = np.rint(n).astype(np.int64)
+        c = np.where(n >= min_periods, c, np.nan)
+        # macierz jest symetryczna: blok (j, i) to transpozycja bloku (i, j)
+        corr[si, sj], count[si, sj] = c, n
+        corr[sj, si], count[sj, si] = c.T, n.T
+
+    if workers is None or workers <= 1:
+        for pair in pairs:
+            compute(pair)
+    else:
+        with concurrent.futures.ThreadPoolExecutor(workers) as pool:
+            list(pool.map(compute, pairs))
+    return corr, count
+
+
+def corr_matrix(data, min_periods=None, block=None, dtype=np.float64, workers=None):
+    """
+    Tworzy macierz korelacji pomiarów wszystkich stacji.
+
+    Args:
+        data (pandas.DataFrame): Dane godzinowe w formacie szerokim z MultiIndex
+            albo dzienne średnie (wynik calc_daily_means).
+        min_periods (int | None): Minimalna liczba wspólnych pomiarów
+            (domyślnie 24 godziny albo 7 dni dla średnich dziennych).
+        block (int | None): Liczba stacji w bloku (domyślnie block_size).
+        dtype (numpy.dtype): Typ akumulacji (np.float64 albo np.float32).
+        workers (int | None): Liczba wątków.
+
+    Returns:
+        pandas.DataFrame: Korelacje (stacja x stacja) z kolumnami i indeksem (Miejscowość, Kod stacji).
+    """
+    values, stations = station_matrix(data)
+    if min_periods is None:
+        min_periods = 7 if "Daily mean PM25" in data.columns else 24
+    corr, _ = pairwise_corr(values, min_periods, block, dtype, workers)
+    return pd.DataFrame(corr, index=stations, columns=stations)
+
+
+def redundant_pairs(corr, threshold=0.95):
+    """
+    Wybiera pary stacji o korelacji nie mniejszej niż threshold (potencjalnie zbędne stacje).
+
+    Args:
+        corr (pandas.DataFrame): Wynik corr_matrix.
+        threshold (float): Minimalna korelacja.
+
+    Returns:
+        pandas.DataFrame: Pary stacji (Miejscowość 1, Kod stacji 1, Miejscowość 2,
+            Kod stacji 2) z korelacją, od najwyższej.
+    """
+    values = corr.to_numpy()
+    i, j = np.nonzero(np.triu(values >= threshold, k=1))
+    stations = corr.index
+    out = pd.DataFrame({
+        "Miejscowość 1": stations.get_level_values(0)[i],
+        "Kod stacji 1": stations.get_level_values(1)[i],
+        "Miejscowość 2": stations.get_level_values(0)[j],
+        "Kod stacji 2": stations.get_level_values(1)[j],
+        "Korelacja": values[i, j],
+    })
+    return out.sort_values("Korelacja", ascending=False, kind="stable").reset_index(drop=True)
+
+
+def city_coherence(corr):
+    """
+    Porównuje korelacje stacji w obrębie miejscowości z korelacjami z pozostałymi stacjami.
+
+    Pozwala sprawdzić przypisanie stacji do miejscowości (add_city): stacje
+    jednej miejscowości powinny być ze sobą skorelowane silniej niż z resztą.
+
+    Args:
+        corr (pandas.DataFrame): Wynik corr_matrix.
+
+    Returns:
+        pandas.DataFrame: Dla każdej miejscowości z co najmniej dwiema stacjami: liczba stacji,
+            średnia korelacja w miejscowości, średnia korelacja z innymi stacjami i minimalna
+            korelacja w miejscowości.
+    """
+    values = corr.to_numpy()
+    cities = corr.index.get_level_values(0)
+    codes, names = pd.factorize(cities)
+    same = codes[:, None] == codes[None, :]
+    off_diagonal = ~np.eye(len(codes), dtype=bool)
+
+    rows = []
+    for k, city in enumerate(names):
+        member = codes == k
+        if member.sum() < 2:
+            continue
+        inside = values[np.ix_(member, member)][off_diagonal[np.ix_(member, member)]]
+        outside = values[member][~same[member]]
+        rows.append({
+            "Miejscowość": city,
+            "Liczba stacji": int(member.sum()),
+            "Korelacja w miejscowości": np.nanmean(inside) if np.isfinite(inside).any() else np.nan,
+            "Korelacja z innymi": np.nanmean(outside) if np.isfinite(outside).any() else np.nan,
+            "Minimalna korelacja": np.nanmin(inside) if np.isfinite(inside).any() else np.nan,
+        })
+    return pd.DataFrame(rows, columns=[
+        "Miejscowość", "Liczba stacji", "Korelacja w miejscowości", "Korelacja z innymi", "Minimalna korelacja"
+    ])
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+
+from stats import check_single_pollutant
+
+
+def _daily_series(daily, by, wojew_dict):
+    """
+    Przygotowuje dzienne średnie na wybranym poziomie agregacji.
+
+    Dla miast i województw dzienna wartość to średnia z dziennych średnich stacji.
+
+    Args:
+        daily (pandas.DataFrame): Dzienne średnie PM2.5 (wynik calc_daily_means).
+        by (str): "Kod stacji", "Miejscowość" albo "Województwo".
+        wojew_dict (dict | None): Słownik kodów województw (Kod: Nazwa).
+
+    Returns:
+        tuple: DataFrame z kolumnami kluczy, Data i PM25 oraz lista kluczy.
+
+    Raises:
+        ValueError: Gdy dane zawierają kilka wskaźników albo poziom agregacji jest nieznany.
+    """
+    check_single_pollutant(daily)
+    df = daily.copy()
+    df["PM25"] = pd.to_numeric(df["Daily mean PM25"], errors="coerce")
+
+    if by == "Kod stacji":
+        keys = ["Miejscowość", "Kod stacji"]
+        return df[keys + ["Data", "PM25"]], keys
+    if by == "Województwo":
+        if wojew_dict is None:
+            raise ValueError("Grupowanie po województwach wymaga słownika wojew_dict.")
+        df["Województwo"] = df["Kod stacji"].str[:2].map(wojew_dict)
+    elif by != "Miejscowość":
+        raise ValueError(f"Nieznany poziom agregacji: {by}")
+
+    keys = [by]
+    out = df.groupby(keys + ["Data"], as_index=False)["PM25"].mean()
+    return out, keys
+
+
+def detect_episodes(daily, threshold, by="Kod stacji", wojew_dict=None, min_length=1, max_gap=0):
+    """
+    Wyznacza epizody smogowe - serie kolejnych dni z przekroczeniem progu PM2.5.
+
+    Serie są wyznaczane jednym kodowaniem długości serii (run-length encoding)
+    na posortowanych danych wszystkich stacji jednocześnie, bez pętli po stacjach.
+
+    Args:
+        daily (pandas.DataFrame): Dzienne średnie PM2.5 (wynik calc_daily_means).
+        threshold (float): Wartość graniczna normy PM2.5.
+        by (str): "Kod stacji", "Miejscowość" albo "Województwo".
+        wojew_dict (dict | None): Słownik kodów województw, wymagany dla by="Województwo".
+        min_length (int): Minimalna długość epizodu w dniach.
+        max_gap (int): Maksymalna liczba dni bez przekroczenia (lub bez danych),
+            która nie przerywa epizodu.
+
+    Returns:
+        pandas.DataFrame: Epizody z datą początku i końca, długością, liczbą dni
+            z przekroczeniem i maksymalną dzienną średnią.
+    """
+    df, keys = _daily_series(daily, by, wojew_dict)
+    df = df[df["PM25"] > threshold].sort_values(keys + ["Data"], kind="stable")
+
+    group = df.groupby(keys, sort=False).ngroup().to_numpy()
+    days = pd.to_datetime(df["Data"]).to_numpy().astype("datetime64[D]").astype(np.int64)
+    values = df["PM25"].to_numpy()
+
+    # początek epizodu: zmiana grupy albo przerwa dłuższa niż max_gap dni
+    new_run = np.ones(len(df), dtype=bool)
+    new_run[1:] = (group[1:] != group[:-1]) | (np.diff(days) > max_gap + 1)
+    starts = np.flatnonzero(new_run)
+    ends = np.r_[starts[1:], len(df)] - 1
+
+    columns = keys + ["Początek", "Koniec", "Długość [dni]", "Dni z przekroczeniem", "Maksimum PM25"]
+    if len(starts) == 0:
+        return pd.DataFrame(columns=columns)
+
+    out = df[keys].iloc[starts].reset_index(drop=True)
+    out["Początek"] = days[starts].astype("datetime64[D]")
+    out["Koniec"] = days[ends].astype("datetime64[D]")
+    out["Długość [dni]"] = days[ends] - days[starts] + 1
+    out["Dni z przekroczeniem"] = ends - starts + 1
+    out["Maksimum PM25"] = np.maximum.reduceat(values, starts)
+
+    out = out[out["Długość [dni]"] >= min_length]
+    return out[columns].reset_index(drop=True)
@@ -0,0 +1,167 @@
+import contextlib
+import datetime
+import itertools
+import sqlite3
+
+import pandas as pd
+
+# tabele bazy i kolumny, na których zakładane są indeksy
+sql_tables = {
+    "daily": ("daily_means", [["Kod stacji"], ["Miejscowość"], ["Województwo"], ["Data"]]),
+    "monthly": ("monthly_means", [["Kod stacji"], ["Miejscowość"], ["Województwo"], ["Rok", "Miesiąc"]]),
+    "overnorm": ("overnorm_days", [["Kod stacji"], ["Województwo"], ["Rok"]]),
+}
+
+# liczba wierszy przekazywanych w jednym wywołaniu executemany
+batch_size = 50_000
+
+
+def _quote(name):
+    """Zwraca nazwę kolumny lub tabeli w cudzysłowie SQL."""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _sql_type(series):
+    """
+    Dobiera typ kolumny SQLite do typu kolumny pandas.
+
+    Args:
+        series (pandas.Series): Kolumna tabeli.
+
+    Returns:
+        str: INTEGER, REAL albo TEXT.
+    """
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_integer_dtype(series):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(series):
+        return "REAL"
+    return "TEXT"
+
+
+def _add_wojewodztwo(table, wojew_dict):
+    """
+    Dodaje kolumnę Województwo na podstawie dwuliterowego prefiksu kodu stacji.
+
+    Args:
+        table (pandas.DataFrame): Tabela z kolumną "Kod stacji".
+        wojew_dict (dict | None): Słownik kodów województw (Kod: Nazwa).
+
+    Returns:
+        pandas.DataFrame: Tabela z kolumną Województwo (pustą, gdy brak słownika).
+    """
+    table = table.copy()
+    if "Województwo" not in table.columns:
+        codes = table["Kod stacji"].astype(str).str[:2]
+        table["Województwo"] = codes.map(wojew_dict) if wojew_dict else None
+    return table
+
+
+def _rows(table):
+    """
+    Zamienia tabelę na krotki wartości obsługiwanych przez sqlite3 (daty jako tekst ISO, NaN jako NULL).
+
+    Wiersze są tworzone leniwie, kolejnymi fragmentami po batch_size wierszy,
+    więc w pamięci nie powstaje lista wszystkich wierszy tabeli.
+
+    Args:
+        table (pandas.DataFrame): Tabela do zapisu.
+
+    Yields:
+        tuple: Kolejne wiersze tabeli.
+    """
+    for start in range(0, len(table), batch_size):
+        chunk = table.iloc[start:start + batch_size]
+        columns = []
+        for name in chunk.columns:
+            col = chunk[name]
+            if pd.api.types.is_datetime64_any_dtype(col):
+                col = col.dt.strftime("%Y-%m-%d %H:%M:%S")
+            elif col.dtype == object and len(col) and isinstance(col.iloc[0], datetime.date):
+                col = col.map(lambda d: d.isoformat() if isinstance(d, datetime.date) else d)
+            # astype(object) zamienia typy numpy (np.int64, np.float64) na typy Pythona
+            columns.append(col.astype(object).where(col.notna(), None).tolist())
+        yield from zip(*columns)
+
+
+def _write_table(con, name, table, indexes):
+    """
+    Zastępuje tabelę w bazie i zakłada indeksy.
+
+    Args:
+        con (sqlite3.Connection): Połączenie z bazą.
+        name (str): Nazwa tabeli.
+        table (pandas.DataFrame): Dane do zapisu.
+        indexes (list[list[str]]): Kolumny kolejnych indeksów.
+    """
+    cols = ", ".join(f"{_quote(c)} {_sql_type(table[c])}" for c in table.columns)
+    con.execute(f"DROP TABLE IF EXISTS {_quote(name)}")
+    con.execute(f"CREATE TABLE {_quote(name)} ({cols})")
+
+    insert = f"INSERT INTO {_quote(name)} VALUES ({', '.join('?' * len(table.columns))})"
+    rows = _rows(table)
+    while batch := list(itertools.islice(rows, batch_size)):
+        con.executemany(insert, batch)
+
+    # indeksy zakładane po wstawieniu danych są budowane jednym sortowaniem
+    for k, index_cols in enumerate(indexes):
+        if all(c in table.columns for c in index_cols):
+            con.execute(
+                f"CREATE INDEX {_quote(f'idx_{name}_{k}')} ON {_quote(name)} "
+                f"({', '.join(_quote(c) for c in index_cols)})"
+            )
+
+
+def export_tables(db_path, daily=None, monthly=None, overnorm=None, wojew_dict=None):
+    """
+    Zapisuje tabele wynikowe do lokalnej bazy SQLite z indeksami.
+
+    Wszystkie tabele są zapisywane w jednej transakcji (wstawianie partiami
+    przez executemany); istniejące tabele o tych samych nazwach są zastępowane.
+    Do każdej tabeli dodawana jest kolumna Województwo.
+
+    Args:
+        db_path (str): Ścieżka do pliku bazy.
+        daily (pandas.DataFrame | None): Wynik calc_daily_means (tabela daily_means).
+        monthly (pandas.DataFrame | None): Wynik calc_monthly_means (tabela monthly_means).
+        overnorm (pandas.DataFrame | None): Wynik count_overnorm_days (tabela overnorm_days).
+        wojew_dict (dict | None): Słownik kodów województw (Kod: Nazwa).
+
+    Returns:
+        dict: Liczba zapisanych wierszy dla każdej tabeli.
+    """
+    tables = {"daily": daily, "monthly": monthly, "overnorm": overnorm}
+    written = {}
+    # isolation_level=None i jawne BEGIN obejmują transakcją także DROP/CREATE
+    with contextlib.closing(sqlite3.connect(db_path, isolation_level=None)) as con:
+        con.execute("BEGIN")
+        try:
+            for key, table in tables.items():
+                if table is None:
+                    continue
+                name, indexes = sql_tables[key]
+                _write_table(con, name, _add_wojewodztwo(table, wojew_dict), indexes)
+                written[name] = len(table)
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+        con.execute("COMMIT")
+    return written
+
+
+def query(db_path, sql, params=()):
+    """
+    Wykonuje zapytanie SQL na bazie z export_tables i zwraca wynik jako DataFrame.
+
+    Nazwy kolumn zawierające spacje lub polskie znaki należy ująć w cudzysłów,
+    np. SELECT "Kod stacji", AVG("Daily mean PM25") FROM daily_means ...
+
+    Args:
+        db_path (str): Ścieżka do pliku bazy.
+        sql (str): Zapytanie SQL (parametry jako "?").
+        params (tuple): Wartości parametrów zapytania.
+
+    Returns:
+        pandas.DataFrame: Wynik zapytania.
+    """
+    with contextlib.closing(sqlite3.connect(db_path)) as con:
+        return pd.read_sql_query(sql, con, params=params)
@@ -0,0 +1,270 @@
+import numpy as np
+import pandas as pd
+
+from stats import hour_slots, to_matrix
+
+# metody uzupełniania w kolejności stosowania przez fill_gaps
+fill_methods = ["linear", "previous_day", "neighbour"]
+# maksymalna długość luki [h] uzupełnianej regresją względem sąsiadów
+neighbour_max_gap = 24 * 31
+
+
+def _gaps(valid, hours):
+    """
+    Wyznacza dla każdej komórki poprzedni i następny pomiar oraz długość luki.
+
+    Indeksy poprzedniego i następnego pomiaru to skumulowane maksimum/minimum
+    indeksów wierszy, więc cała macierz jest przetwarzana naraz.
+
+    Args:
+        valid (numpy.ndarray): Maska pomiarów (godzina x stacja).
+        hours (numpy.ndarray): Numery godzin wierszy.
+
+    Returns:
+        tuple: Indeksy poprzedniego i następnego pomiaru (obcięte do zakresu
+            wierszy), długość luki [h] oraz maska braków leżących między
+            pierwszym a ostatnim pomiarem stacji.
+    """
+    n = len(valid)
+    rows = np.arange(n)[:, None]
+    prev = np.maximum.accumulate(np.where(valid, rows, -1), axis=0)
+    nxt = np.minimum.accumulate(np.where(valid, rows, n)[::-1], axis=0)[::-1]
+    inner = ~valid & (prev >= 0) & (nxt < n)
+    prev, nxt = np.clip(prev, 0, n - 1), np.clip(nxt, 0, n - 1)
+    return prev, nxt, hours[nxt] - hours[prev] - 1, inner
+
+
+def _row_hours(n, times):
+    """Numery godzin wierszy; bez znaczników czasu każdy wiersz to kolejna godzina."""
+    return np.arange(n) if times is None else hour_slots(pd.DatetimeIndex(times))
+
+
+def fill_linear(values, max_gap=3, times=None):
+    """
+    Uzupełnia krótkie luki interpolacją liniową między sąsiednimi pomiarami.
+
+    Dla każdej komórki wyznaczany jest indeks poprzedniego i następnego pomiaru
+    (zob. _gaps), więc cała macierz jest przetwarzana naraz, bez pętli po
+    stacjach i lukach. Długość luki i wagi interpolacji
+    liczone są w godzinach według znaczników czasu, więc brakujące wiersze
+    (dziury w indeksie czasu) wydłużają lukę.
+
+    Args:
+        values (numpy.ndarray): Macierz pomiarów (godzina x stacja) z NaN w miejscu braków.
+        max_gap (int): Maksymalna długość luki [h], która jest uzupełniana.
+        times (pandas.DatetimeIndex | None): Znaczniki czasu wierszy; bez nich
+            każdy wiersz to kolejna godzina.
+
+    Returns:
+        numpy.ndarray: Macierz z uzupełnionymi lukami (luki dłuższe i brzegowe pozostają NaN).
+    """
+    hours = _row_hours(len(values), times)
+    prev, nxt, gap, inner = _gaps(~np.isnan(values), hours)
+    fill = inner & (gap <= max_gap)
+    h_prev, h_next = hours[prev], hours[nxt]
+
+    cols = np.broadcast_to(np.arange(values.shape[1]), values.shape)
+    v_prev = values[prev, cols]
+    v_next = values[nxt, cols]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        weight = (hours[:, None] - h_prev) / (h_next - h_prev)
+    out = values.copy()
+    out[fill] = (v_prev + (v_next - v_prev) * weight)[fill]
+    return out
+
+
+def fill_previous_day(values, times):
+    """
+    Uzupełnia braki pomiarem z tej samej godziny poprzedniej doby.
+
+    Wiersze poprzedniej doby są wyszukiwane po znacznikach czasu, więc brakujące
+    lub powtórzone wiersze nie przesuwają dopasowania; źródłem powtórzonej
+    godziny jest jej pierwsze wystąpienie.
+
+    Args:
+        values (numpy.ndarray): Macierz pomiarów (godzina x stacja).
+        times (pandas.DatetimeIndex): Znaczniki czasu wierszy.
+
+    Returns:
+        numpy.ndarray: Macierz z uzupełnionymi brakami.
+    """
+    slots = hour_slots(pd.DatetimeIndex(times))
+    unique, first = np.unique(slots, return_index=True)
+    pos = np.minimum(np.searchsorted(unique, slots - 24), len(unique) - 1)
+    has_source = unique[pos] == slots - 24
+
+    out = values.copy()
+    previous = np.full(values.shape, np.nan)
+    previous[has_source] = values[first[pos[has_source]]]
+    fill = np.isnan(out) & ~np.isnan(previous)
+    out[fill] = previous[fill]
+    return out
+
+
+def correlated_neighbours(values, k=3):
+    """
+    Wybiera dla każdej stacji k stacji o najbardziej skorelowanych pomiarach.
+
+    Korelacje wszystkich par liczone są jednym mnożeniem macierzy
+    standaryzowanych pomiarów (braki jako zera).
+
+    Args:
+        values (numpy.ndarray): Macierz pomiarów (godzina x stacja).
+        k (int): Liczba sąsiadów.
+
+    Returns:
+        numpy.ndarray: Indeksy sąsiadów (stacja, k), od najlepiej skorelowanego.
+    """
+    valid = ~np.isnan(values)
+    mean = np.nanmean(values, axis=0)
+    std = np.nanstd(values, axis=0)
+    std[~(std > 0)] = 1.0
+    z = np.where(valid, (values - mean) / std, 0.0)
+    counts = valid.T.astype(float) @ valid.astype(float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        corr = (z.T @ z) / counts
+    corr[~np.isfinite(corr)] = -np.inf
+    np.fill_diagonal(corr, -np.inf)
+    k = min(k, values.shape[1] - 1)
+    return np.argsort(-corr, axis=1, kind="stable")[:, :k]
+
+
+def nearest_neighbours(stations, meta, k=3):
+    """
+    Wybiera dla każdej stacji k najbliższych stacji z tej samej tabeli (indeks KD).
+
+    Stacje bez współrzędnych w metadanych dostają sąsiadów dobranych korelacją
+    (zob. fill_gaps).
+
+    Args:
+        stations (pandas.MultiIndex): Kolumny stacji (Miejscowość, Kod stacji).
+        meta (pandas.DataFrame): Metadane GIOŚ ze współrzędnymi.
+        k (int): Liczba sąsiadów.
+
+    Returns:
+        numpy.ndarray: Indeksy sąsiadów (stacja, k); -1 gdy brak współrzędnych.
+    """
+    from spatial import StationIndex
+
+    codes = stations.get_level_values("Kod stacji")
+    index = StationIndex.from_meta(meta, stations=codes)
+    position = pd.Index(codes).get_indexer(index.codes)
+
+    out = np.full((len(codes), min(k, len(codes) - 1)), -1)
+    k = min(out.shape[1], len(index.codes) - 1)
+    if k < 1:
+        return out
+    _, idx = index.query(index.coords["lat"], index.coords["lon"], k=k + 1)
+    # stacja jest usuwana z wyników po indeksie (przy tych samych współrzędnych
+    # nie musi być pierwsza); gdy jej nie ma, odpada ostatni, najdalszy wynik
+    own = idx == np.arange(len(idx))[:, None]
+    own[~own.any(axis=1), -1] = True
+    out[position, :k] = position[idx[~own].reshape(len(idx), k)]
+    return out
+
+
+def fill_neighbours(values, neighbours, min_overlap=24 * 7, max_gap=neighbour_max_gap, times=None):
+    """
+    Uzupełnia braki regresją liniową względem pomiarów sąsiednich stacji.
+
+    Dla każdej stacji i każdego z jej sąsiadów (kolejno) współczynniki regresji
+    y = a + b * x liczone są naraz dla wszystkich stacji z sum po wspólnych
+    godzinach; braki uzupełnia pierwszy sąsiad, który ma w tej godzinie pomiar.
+    Uzupełniane są tylko luki między pierwszym a ostatnim pomiarem stacji, nie
+    dłuższe niż max_gap, więc okresy, w których stacja nie działała (np. całe
+    lata przy join="outer"), pozostają puste.
+
+    Args:
+        values (numpy.ndarray): Macierz pomiarów (godzina x stacja).
+        neighbours (numpy.ndarray): Indeksy sąsiadów (stacja, k); -1 oznacza brak sąsiada.
+        min_overlap (int): Minimalna liczba wspólnych godzin potrzebna do regresji.
+        max_gap (int): Maksymalna długość luki [h], która jest uzupełniana.
+        times (pandas.DatetimeIndex | None): Znaczniki czasu wierszy; bez nich
+            każdy wiersz to kolejna godzina.
+
+    Returns:
+        numpy.ndarray: Macierz z uzupełnionymi brakami.
+    """
+    out = values.copy()
+    y = values
+    y_valid = ~np.isnan(y)
+    _, _, gap, inner = _gaps(y_valid, _row_hours(len(values), times))
+    allowed = inner & (gap <= max_gap)
+    for rank in range(neighbours.shape[1]):
+        nbr = neighbours[:, rank]
+        has_nbr = nbr >= 0
+        x = np.where(has_nbr, values[:, np.where(has_nbr, nbr, 0)], np.nan)
+        x_valid = ~np.isnan(x)
+
+        both = y_valid & x_valid
+        count = both.sum(axis=0)
+        xs, ys = np.where(both, x, 0.0), np.where(both, y, 0.0)
+        sx, sy = xs.sum(axis=0), ys.sum(axis=0)
+        sxx, sxy = (xs * xs).sum(axis=0), (xs * ys).sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            slope = (count * sxy - sx * sy) / (count * sxx - sx * sx)
+            intercept = (sy - slope * sx) / count
+        usable = (count >= min_overlap) & np.isfinite(slope) & np.isfinite(intercept)
+
+        fill = np.isnan(out) & allowed & x_valid & usable
+        cols = np.nonzero(fill)[1]
+        out[fill] = intercept[cols] + slope[cols] * x[fill]
+    return out
+
+
+def fill_gaps(
+    df_pm25, methods=None, max_gap=3, meta=None, k=3, min_overlap=24 * 7, neighbour_gap=neighbour_max_gap
+):
+    """
+    Uzupełnia brakujące pomiary godzinowe wszystkich stacji.
+
+    Metody są stosowane kolejno i każda uzupełnia tylko braki pozostawione przez
+    poprzednie:
+    - "linear" - interpolacja liniowa luk nie dłuższych niż max_gap godzin,
+    - "previous_day" - pomiar z tej samej godziny poprzedniej doby,
+    - "neighbour" - regresja względem najbliższych (meta) lub najbardziej
+      skorelowanych stacji, dla luk nie dłuższych niż neighbour_gap godzin
+      w okresie działania stacji.
+
+    Args:
+        df_pm25 (pandas.DataFrame): Dane PM2.5 w formacie szerokim z MultiIndex.
+        methods (list[str] | None): Metody w kolejności stosowania (domyślnie fill_methods).
+        max_gap (int): Maksymalna długość luki dla interpolacji liniowej [h].
+        meta (pandas.DataFrame | None): Metadane GIOŚ; bez nich sąsiedzi dobierani są korelacją.
+        k (int): Liczba sąsiadów dla metody "neighbour".
+        min_overlap (int): Minimalna liczba wspólnych godzin dla regresji.
+        neighbour_gap (int): Maksymalna długość luki dla metody "neighbour" [h].
+
+    Returns:
+        tuple: Uzupełnione dane w formacie szerokim oraz DataFrame o tych samych
+            kolumnach z nazwą metody w uzupełnionych komórkach (None w pozostałych).
+    """
+    methods = fill_methods if methods is None else list(methods)
+    unknown = set(methods) - set(fill_methods)
+    if unknown:
+        raise ValueError(f"Nieznane metody uzupełniania: {sorted(unknown)}")
+
+    times, values, stations = to_matrix(df_pm25)
+    method_of = np.full(values.shape, None, dtype=object)
+
+    for method in methods:
+        if method == "linear":
+            filled = fill_linear(values, max_gap, times)
+        elif method == "previous_day":
+            filled = fill_previous_day(values, times)
+        else:
+            neighbours = correlated_neighbours(values, k)
+            if meta is not None:
+                nearest = nearest_neighbours(stations, meta, k)
+                located = (nearest >= 0).all(axis=1)
+                neighbours[located] = nearest[located]
+            filled = fill_neighbours(values, neighbours, min_overlap, neighbour_gap, times)
+        method_of[np.isnan(values) & ~np.isnan(filled)] = method
+        values = filled
+
+    first = df_pm25.columns[0]
+    out = pd.DataFrame(values, columns=stations, index=df_pm25.index)
+    out.insert(0, first, df_pm25[first])
+    imputed = pd.DataFrame(method_of, columns=stations, index=df_pm25.index)
+    imputed.insert(0, first, df_pm25[first])
+    return out, imputed
@@ -1,11 +1,219 @@
+import numpy as np
 import pandas as pd
 import requests
 import zipfile
 import io
+import hashlib
+import os
+import re
+import time
+import concurrent.futures
+import datetime
+import functools
+
+from instrument import stage
 
 gios_archive_url = "https://powietrze.gios.gov.pl/pjp/archives/downloadFile/"
 
-def download_gios_archive(year, gios_id, filename):
+# parametry pobierania (można je zmienić przed uruchomieniem make_pm25_data)
+download_retries = 5
+download_backoff = 1.0  # sekundy, podwajane przy każdej kolejnej próbie
+download_timeout = (10, 60)  # (połączenie, odczyt) w sekundach
+download_cache_dir = None  # katalog na pobrane archiwa i fragmenty .part
+
+# liczba początkowych wierszy arkusza czytanych przy rozpoznawaniu układu
+sniff_rows = 50
+_timestamp_pattern = re.compile(r"^\d{4}-\d{2}-\d{2}[ T]\d{1,2}:\d{2}")
+_station_code_pattern = re.compile(r"^[A-Z][a-z][A-Za-z0-9]{4,}$")
+
+# największa liczba miejsc po przecinku rozpoznawana przy kwantyzacji
+max_decimals = 4
+
+
+def _expected_size(response, offset):
+    """
+    Ustala oczekiwany rozmiar całego pliku na podstawie nagłówków odpowiedzi.
+
+    Args:
+        response (requests.Response): Odpowiedź serwera.
+        offset (int): Liczba bajtów pobranych wcześniej (dla odpowiedzi 206).
+
+    Returns:
+        int | None: Rozmiar pliku w bajtach albo None, gdy serwer go nie podał.
+    """
+    content_range = response.headers.get("Content-Range")
+    if content_range and "/" in content_range and not content_range.endswith("*"):
+        return int(content_range.rsplit("/", 1)[1])
+    length = response.headers.get("Content-Length")
+    if length is None:
+        return None
+    return int(length) + (offset if response.status_code == 206 else 0)
+
+
+def _sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def fetch_bytes(url, sha256=None, cache_dir=None, retries=None, backoff=None, timeout=None, chunk_size=1 << 16):
+    """
+    Pobiera plik z wznawianiem przerwanych transferów, ponawianiem i weryfikacją.
+
+    Po zerwaniu połączenia kolejna próba prosi serwer (nagłówek Range) tylko
+    o brakującą część pliku. Próby są ponawiane z wykładniczo rosnącą przerwą.
+    Kompletność sprawdzana jest względem rozmiaru podanego przez serwer, a gdy
+    podano sha256 - także sumą kontrolną. Z katalogiem cache_dir pobrane bajty
+    trafiają do pliku .part, więc pobieranie można wznowić także w kolejnym
+    uruchomieniu, a gotowe archiwum (z plikiem .sha256) jest używane ponownie.
+
+    Args:
+        url (str): Adres pliku.
+        sha256 (str | None): Oczekiwana suma SHA-256 pliku.
+        cache_dir (str | None): Katalog na pobrane pliki (domyślnie download_cache_dir).
+        retries (int | None): Liczba ponownych prób (domyślnie download_retries).
+        backoff (float | None): Przerwa przed pierwszą ponowną próbą w sekundach (domyślnie download_backoff).
+        timeout (tuple | None): Limity czasu połączenia i odczytu (domyślnie download_timeout).
+        chunk_size (int): Rozmiar odczytywanych fragmentów w bajtach.
+
+    Returns:
+        bytes: Zawartość pliku.
+
+    Raises:
+        requests.RequestException: Gdy pobranie nie powiodło się po wszystkich próbach.
+        ValueError: Gdy suma kontrolna nie zgadza się z oczekiwaną.
+    """
+    retries = download_retries if retries is None else retries
+    backoff = download_backoff if backoff is None else backoff
+    timeout = download_timeout if timeout is None else timeout
+    cache_dir = cache_dir or download_cache_dir
+
+    final_path = part_path = None
+    buf = bytearray()
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        name = url.rstrip("/").rsplit("/", 1)[-1]
+        final_path = os.path.join(cache_dir, name)
+        part_path = final_path + ".part"
+        if os.path.exists(final_path):
+            with open(final_path, "rb") as f:
+                data = f.read()
+            known = sha256
+            if known is None and os.path.exists(final_path + ".sha256"):
+                with open(final_path + ".sha256") as f:
+                    known = f.read().strip()
+            if known is None or _sha256(data) == known:
+                return data
+            os.remove(final_path)
+        if os.path.exists(part_path):
+            with open(part_path, "rb") as f:
+                buf = bytearray(f.read())
+
+    for attempt in range(retries + 1):
+        try:
+            headers = {"Range": f"bytes={len(buf)}-"} if buf else {}
+            response = requests.get(url, headers=headers, stream=True, timeout=timeout)
+            try:
+                if response.status_code == 416 and buf:
+                    # zakres poza plikiem - fragment zawiera już cały plik
+                    break
+                response.raise_for_status()  # jeśli błąd HTTP, zatrzymaj
+                if response.status_code != 206:
+                    # serwer zignorował Range - pobieranie od początku
+                    buf.clear()
+                total = _expected_size(response, len(buf))
+                part = open(part_path, "wb" if not buf else "ab") if part_path else None
+                try:
+                    for chunk in response.iter_content(chunk_size):
+                        buf.extend(chunk)
+                        if part:
+                            part.write(chunk)
+                finally:
+                    if part:
+                        part.close()
+            finally:
+                response.close()
+            if total is not None and len(buf) < total:
+                raise requests.ConnectionError(f"Przerwane pobieranie {url}: {len(buf)} z {total} B")
+            break
+        except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError,
+                requests.HTTPError) as e:
+            server_error = isinstance(e, requests.HTTPError) and e.response is not None and e.response.status_code >= 500
+            if isinstance(e, requests.HTTPError) and not server_error:
+                raise
+            if attempt == retries:
+                raise
+            time.sleep(backoff * 2 ** attempt)
+
+    data = bytes(buf)
+    digest = _sha256(data)
+    if sha256 is not None and digest != sha256:
+        if part_path and os.path.exists(part_path):
+            os.remove(part_path)
+        raise ValueError(f"Niezgodna suma kontrolna {url}: {digest} zamiast {sha256}")
+    if final_path:
+        with open(final_path, "wb") as f:
+            f.write(data)
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        with open(final_path + ".sha256", "w") as f:
+            f.write(digest)
+    return data
+
+
+def _is_timestamp(value):
+    """Sprawdza, czy komórka arkusza zawiera znacznik czasu pomiaru."""
+    if isinstance(value, (datetime.datetime, pd.Timestamp)):
+        return True
+    return isinstance(value, str) and bool(_timestamp_pattern.match(value.strip()))
+
+
+def sniff_layout(content, max_rows=None):
+    """
+    Rozpoznaje układ arkusza GIOŚ (parametry clean_pm25) na podstawie pierwszych wierszy.
+
+    Arkusz jest otwierany w trybie tylko do odczytu (openpyxl read_only), który
+    czyta wiersze strumieniowo, więc czytane jest tylko max_rows początkowych
+    wierszy zamiast całego pliku. Wierszem nagłówka jest wiersz "Kod stacji"
+    (albo, gdy go brak, wiersz z największą liczbą kodów stacji), a usuwane są
+    wszystkie wiersze przed pierwszym znacznikiem czasu.
+
+    Args:
+        content (bytes): Zawartość pliku XLSX.
+        max_rows (int | None): Liczba czytanych wierszy (domyślnie sniff_rows).
+
+    Returns:
+        dict: Parametry clean_pm25 (header_row, drop_rows).
+
+    Raises:
+        ValueError: Gdy w początkowych wierszach nie ma nagłówka stacji lub znacznika czasu.
+    """
+    import openpyxl
+
+    wb = openpyxl.load_workbook(io.BytesIO(content), read_only=True, data_only=True)
+    try:
+        rows = list(wb.worksheets[0].iter_rows(max_row=max_rows or sniff_rows, values_only=True))
+    finally:
+        wb.close()
+
+    first_data = next((i for i, row in enumerate(rows) if row and _is_timestamp(row[0])), None)
+    if first_data is None:
+        raise ValueError(f"Nie znaleziono znacznika czasu w pierwszych {len(rows)} wierszach arkusza.")
+
+    header_row = None
+    best = 0
+    for i, row in enumerate(rows[:first_data]):
+        label = str(row[0]).strip().lower() if row and row[0] is not None else ""
+        if label == "kod stacji":
+            header_row = i
+            break
+        codes = sum(isinstance(v, str) and bool(_station_code_pattern.match(v.strip())) for v in row[1:])
+        if codes > best:
+            header_row, best = i, codes
+    if header_row is None:
+        raise ValueError("Nie znaleziono wiersza z kodami stacji przed pierwszym znacznikiem czasu.")
+    return {"header_row": header_row, "drop_rows": list(range(first_data))}
+
+
+def download_gios_archive(year, gios_id, filename, sha256=None, layout=False):
     """
     Pobiera archiwum GIOŚ i wczytuje wskazany plik Excel do DataFrame.
 
@@ -13,29 +221,96 @@ def download_gios_archive(year, gios_id, filename):
         year (int): Rok danych.
         gios_id (str): Identyfikator archiwum GIOŚ.
         filename (str): Nazwa pliku Excel w archiwum ZIP.
+        sha256 (str | None): Oczekiwana suma SHA-256 archiwum.
+        layout (bool): Czy przed wczytaniem całego arkusza rozpoznać jego układ (sniff_layout).
 
     Returns:
-        pandas.DataFrame: Dane PM2.5 wczytane z pliku Excel.
+        pandas.DataFrame: Dane PM2.5 wczytane z pliku Excel; dla layout=True krotka
+            (DataFrame, parametry clean_pm25).
     """
     
-    # Pobranie archiwum ZIP do pamięci
+    # Pobranie archiwum ZIP do pamięci (z wznawianiem i ponawianiem)
     url = f"{gios_archive_url}{gios_id}"
-    response = requests.get(url)
-    response.raise_for_status()  # jeśli błąd HTTP, zatrzymaj
+    with stage("download", year=year) as st:
+        content = fetch_bytes(url, sha256=sha256)
+        st.set(cells=len(content))
 
     # Otwórz zip w pamięci
-    with zipfile.ZipFile(io.BytesIO(response.content)) as z:
+    with zipfile.ZipFile(io.BytesIO(content)) as z:
         # znajdź właściwy plik z PM2.5
         if not filename:
-            print(f"Błąd: nie znaleziono {filename}.")
+            raise ValueError(f"Błąd: nie podano pliku z danymi dla roku {year}.")
+        # plik jest rozpakowywany raz - te same bajty służą do rozpoznania układu i parsowania
+        data = z.read(filename)
+
+    info = None
+    if layout:
+        # błędny układ wychodzi na jaw przed parsowaniem całego arkusza
+        with stage("sniff_layout", year=year, filename=filename):
+            try:
+                info = sniff_layout(data)
+            except ValueError as e:
+                raise ValueError(f"Błąd przy rozpoznawaniu układu {year}: {e}") from e
+    # wczytaj plik do pandas
+    with stage("parse_excel", year=year, filename=filename) as st:
+        try:
+            df = _read_sheet(data)
+        except Exception as e:
+            raise ValueError(f"Błąd przy wczytywaniu {year}: {e}") from e
+        st.set_result(df)
+    return (df, info) if layout else df
+
+
+def _read_sheet(content):
+    """Wczytuje arkusz Excel bez nagłówka (funkcja wywoływana w procesach roboczych)."""
+    return pd.read_excel(io.BytesIO(content), header=None)
+
+
+def download_gios_members(year, gios_id, filenames, workers=None, layout=False):
+    """
+    Pobiera archiwum GIOŚ raz i wczytuje z niego kilka plików Excel równolegle.
+
+    Każdy roczny ZIP zawiera arkusze wielu wskaźników i czasów uśredniania;
+    zamiast pobierać archiwum osobno dla każdego wskaźnika, wszystkie wskazane
+    pliki są rozpakowywane z jednej kopii i parsowane w osobnych procesach.
+
+    Args:
+        year (int): Rok danych.
+        gios_id (str): Identyfikator archiwum GIOŚ.
+        filenames (dict): Nazwy plików w archiwum, np. {"PM25": "2015_PM25_1g.xlsx", "PM10": "2015_PM10_1g.xlsx"}.
+        workers (int | None): Liczba procesów (domyślnie liczba plików, najwyżej liczba rdzeni).
+        layout (bool): Czy przed parsowaniem rozpoznać układ każdego arkusza (sniff_layout).
+
+    Returns:
+        dict: Surowe arkusze {klucz z filenames: pandas.DataFrame}; dla layout=True krotka
+            (arkusze, parametry clean_pm25 dla każdego klucza).
+    """
+    url = f"{gios_archive_url}{gios_id}"
+    with stage("download", year=year) as st:
+        content = fetch_bytes(url)
+        st.set(cells=len(content))
+
+    with zipfile.ZipFile(io.BytesIO(content)) as z:
+        members = {key: z.read(name) for key, name in filenames.items()}
+
+    layouts = None
+    if layout:
+        with stage("sniff_layout", year=year, files=list(filenames.values())):
+            try:
+                layouts = {key: sniff_layout(data) for key, data in members.items()}
+            except ValueError as e:
+                raise ValueError(f"Błąd przy rozpoznawaniu układu {year}: {e}") from e
+
+    workers = workers or min(len(members), os.cpu_count() or 1)
+    with stage("parse_excel", year=year, files=list(filenames.values())) as st:
+        if workers <= 1 or len(members) == 1:
+            sheets = {key: _read_sheet(data) for key, data in members.items()}
         else:
-            # wczytaj plik do pandas
-            with z.open(filename) as f:
-                try:
-                    df = pd.read_excel(f, header=None)
-                except Exception as e:
-                    print(f"Błąd przy wczytywaniu {year}: {e}")
-    return df
+            with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+                parsed = pool.map(_read_sheet, members.values())
+                sheets = dict(zip(members.keys(), parsed))
+        st.set(rows=sum(len(df) for df in sheets.values()), cells=sum(df.size for df in sheets.values()))
+    return (sheets, layouts) if layout else sheets
 
 
 def download_gios_meta(gios_id):
@@ -52,11 +327,12 @@ def download_gios_meta(gios_id):
 
     # Pobranie metadanych do pamięci
     url = f"{gios_archive_url}{gios_id}"
-    response = requests.get(url)
-    response.raise_for_status()  # jeśli błąd HTTP, zatrzymaj
+    with stage("download_meta") as st:
+        content = fetch_bytes(url)
 
-    # wczytaj plik do pandas
-    df = pd.read_excel(io.BytesIO(response.content))
+        # wczytaj plik do pandas
+        df = pd.read_excel(io.BytesIO(content))
+        st.set_result(df)
     return df
 
 
@@ -163,49 +439,432 @@ def add_city(df, meta):
     return df
 
 
-def make_pm25_data(years, gios_url_ids, gios_pm25_file, clean_info, outfile):
+def _clean_year(df, info, years, **fields):
+    """
+    Czyści surowy arkusz jednego rocznika: clean_pm25 i midnight.
+
+    Args:
+        df (pandas.DataFrame): Surowy arkusz z archiwum.
+        info (dict): Parametry clean_pm25 (header_row, drop_rows).
+        years (list[int]): Lista analizowanych lat.
+        **fields: Pola zdarzeń instrumentacji (np. year, pollutant).
+
+    Returns:
+        pandas.DataFrame: Oczyszczone dane z kodami stacji z arkusza.
+    """
+    # cleaning
+    with stage("clean_pm25", **fields) as st:
+        df = clean_pm25(df, **info)
+        st.set_result(df)
+
+    # midnight fix
+    with stage("midnight", **fields) as st:
+        df = midnight(df)
+        # making sure that after midnight fix cleaned data contains only chosen years
+        df = df[df["datetime"].dt.year.isin(years)]
+        st.set_result(df)
+    return df
+
+
+def _prepare_year(df, info, years, meta, **fields):
+    """
+    Czyści dane jednego rocznika: clean_pm25, midnight i update_stations.
+
+    Args:
+        df (pandas.DataFrame): Surowy arkusz z archiwum.
+        info (dict): Parametry clean_pm25 (header_row, drop_rows).
+        years (list[int]): Lista analizowanych lat.
+        meta (pandas.DataFrame): Metadane GIOŚ.
+        **fields: Pola zdarzeń instrumentacji (np. year, pollutant).
+
+    Returns:
+        pandas.DataFrame: Oczyszczone dane z aktualnymi kodami stacji.
+    """
+    df = _clean_year(df, info, years, **fields)
+
+    # station code updates
+    with stage("update_stations", **fields) as st:
+        df = update_stations(df, meta)
+        st.set_result(df)
+    return df
+
+
+def _to_float(column):
+    """
+    Zamienia kolumnę pomiarów na liczby (spacje, przecinek dziesiętny, puste wartości jako NaN).
+
+    Args:
+        column (pandas.Series): Kolumna jednej stacji.
+
+    Returns:
+        numpy.ndarray: Wartości typu float.
+    """
+    if not pd.api.types.is_numeric_dtype(column):
+        column = pd.to_numeric(
+            column.astype(str).str.strip().str.replace(",", ".", regex=False),
+            errors="coerce",
+        )
+    return column.to_numpy(dtype=float, na_value=np.nan)
+
+
+def to_sparse(df_pm25):
+    """
+    Zamienia kolumny stacji na kolumny rzadkie (pandas.SparseDtype), w których
+    zapisywane są tylko istniejące pomiary.
+
+    Args:
+        df_pm25 (pandas.DataFrame): Dane PM2.5 w formacie szerokim.
+
+    Returns:
+        pandas.DataFrame: Dane z pierwszą kolumną datetime i rzadkimi kolumnami stacji.
+    """
+    data = {df_pm25.columns[0]: df_pm25[df_pm25.columns[0]]}
+    for col in df_pm25.columns[1:]:
+        data[col] = pd.arrays.SparseArray(_to_float(df_pm25[col]), fill_value=np.nan)
+    df = pd.DataFrame(data, index=df_pm25.index)
+    df.columns = df_pm25.columns
+    return df
+
+
+def _is_exact(values, decimals):
+    """Sprawdza, czy wartości (bez NaN) są dokładne przy decimals miejscach po przecinku."""
+    scaled = values[np.isfinite(values)] * 10 ** decimals
+    return np.allclose(scaled, np.rint(scaled), rtol=0, atol=1e-6)
+
+
+def _decimals(values, limit=None):
+    """
+    Wyznacza najmniejszą liczbę miejsc po przecinku, przy której wartości są dokładne.
+
+    Args:
+        values (numpy.ndarray): Wartości (NaN jest pomijany).
+        limit (int | None): Największa sprawdzana liczba miejsc (domyślnie max_decimals).
+
+    Returns:
+        int | None: Liczba miejsc po przecinku albo None, gdy wartości nie są dokładne
+            nawet przy limit miejscach.
+    """
+    limit = max_decimals if limit is None else limit
+    return next((d for d in range(limit + 1) if _is_exact(values, d)), None)
+
+
+def to_quantized(df_pm25, decimals=None):
+    """
+    Zapisuje pomiary stacji jako liczby całkowite przeskalowane o 10 ** decimals.
+
+    Typ kolumn to int16 (4 razy mniej pamięci niż float64), a gdy zakres
+    wartości przy danej dokładności się w nim nie mieści - int32 (2 razy mniej
+    pamięci). Skala nie jest zmniejszana, aby zmieścić się w int16, bo
+    zaokrąglenie zmieniłoby pomiary: int16 mieści wartości do 3276.7 przy
+    jednym miejscu po przecinku i do 327.67 przy dwóch, więc dane GIOŚ
+    z 3-4 miejscami po przecinku są zapisywane w int32. Brak pomiaru to
+    najmniejsza wartość typu. Skala i wartość brakująca są zapisywane w attrs,
+    z których korzystają convert_df i to_matrix.
+
+    Args:
+        df_pm25 (pandas.DataFrame): Dane PM2.5 w formacie szerokim.
+        decimals (int | None): Liczba miejsc po przecinku; domyślnie najmniejsza,
+            przy której wszystkie wartości są zapisane dokładnie (najwyżej max_decimals).
+
+    Returns:
+        pandas.DataFrame: Dane z pierwszą kolumną datetime i całkowitymi kolumnami stacji.
+
+    Raises:
+        ValueError: Gdy wartości nie są dokładne przy wybranej liczbie miejsc po przecinku
+            (kwantyzacja zmieniłaby pomiary) albo nie mieszczą się w int32.
+    """
+    stations = df_pm25.columns[1:]
+    values = np.column_stack([_to_float(df_pm25[c]) for c in stations]) if len(stations) \
+        else np.empty((len(df_pm25), 0))
+    if decimals is None:
+        decimals = _decimals(values)
+        if decimals is None:
+            raise ValueError(
+                f"Wartości PM2.5 mają więcej niż {max_decimals} miejsc po przecinku - "
+                "kwantyzacja nie zachowałaby ich dokładnie; pozostaw dane jako float."
+            )
+    elif not _is_exact(values, decimals):
+        raise ValueError(f"Wartości PM2.5 nie są dokładne przy {decimals} miejscach po przecinku.")
+    scale = 10 ** decimals
+
+    scaled = np.rint(values * scale)
+    missing = np.isnan(scaled)
+    largest = np.abs(scaled[~missing]).max(initial=0)
+    for dtype in (np.int16, np.int32):
+        # najmniejsza wartość typu jest zarezerwowana dla braku pomiaru
+        if largest <= np.iinfo(dtype).max:
+            break
+    else:
+        raise ValueError(f"Wartości PM2.5 nie mieszczą się w int32 przy {decimals} miejscach po przecinku.")
+    sentinel = np.iinfo(dtype).min
+    codes = np.where(missing, sentinel, scaled).astype(dtype)
+
+    data = {df_pm25.columns[0]: df_pm25[df_pm25.columns[0]]}
+    data.update({col: codes[:, k] for k, col in enumerate(stations)})
+    df = pd.DataFrame(data, index=df_pm25.index)
+    df.columns = df_pm25.columns
+    df.attrs.update(pm25_scale=scale, pm25_missing=int(sentinel))
+    return df
+
+
+def from_quantized(df_pm25):
     """
-    Wykonuje pełny pipeline przetwarzania danych PM2.5.
+    Zamienia dane z to_quantized z powrotem na wartości float (NaN dla braków).
+
+    Args:
+        df_pm25 (pandas.DataFrame): Dane skwantowane.
+
+    Returns:
+        pandas.DataFrame: Dane PM2.5 w formacie szerokim z kolumnami float.
+    """
+    scale, missing = df_pm25.attrs["pm25_scale"], df_pm25.attrs["pm25_missing"]
+    stations = df_pm25.columns[1:]
+    codes = df_pm25[stations].to_numpy()
+    values = np.where(codes == missing, np.nan, codes / scale)
+
+    data = {df_pm25.columns[0]: df_pm25[df_pm25.columns[0]]}
+    data.update({col: values[:, k] for k, col in enumerate(stations)})
+    df = pd.DataFrame(data, index=df_pm25.index)
+    df.columns = df_pm25.columns
+    return df
+
+
+def concat_sparse(frames):
+    """
+    Łączy roczniki po czasie z zachowaniem wszystkich stacji (outer join).
+
+    Każda stacja jest kolumną rzadką, więc lata, w których stacja nie istniała,
+    nie zajmują pamięci - rozmiar wyniku zależy od liczby faktycznych pomiarów,
+    a nie od iloczynu liczby godzin i stacji.
+
+    Args:
+        frames (list[pandas.DataFrame]): Oczyszczone roczniki z kolumną datetime.
+
+    Returns:
+        pandas.DataFrame: Dane z kolumną datetime i rzadkimi kolumnami wszystkich stacji.
+    """
+    stations = list(dict.fromkeys(c for df in frames for c in df.columns if c != "datetime"))
+    data = {"datetime": pd.concat([df["datetime"] for df in frames], ignore_index=True)}
+    for code in stations:
+        parts = []
+        for df in frames:
+            values = _to_float(df[code]) if code in df.columns else np.full(len(df), np.nan)
+            parts.append(pd.Series(pd.arrays.SparseArray(values, fill_value=np.nan)))
+        data[code] = pd.concat(parts, ignore_index=True)
+    return pd.DataFrame(data)
+
+
+def _concat_years(frames, join="inner"):
+    """
+    Łączy oczyszczone roczniki po czasie.
+
+    Args:
+        frames (list[pandas.DataFrame]): Roczniki z kolumną datetime i aktualnymi kodami stacji.
+        join (str): "inner" - tylko stacje obecne we wszystkich latach,
+            "outer" - wszystkie stacje w kolumnach rzadkich (zob. concat_sparse).
+
+    Returns:
+        pandas.DataFrame: Połączone dane.
+    """
+    if join == "outer":
+        return concat_sparse(frames)
+    return pd.concat(frames, axis=0, join="inner", ignore_index=True)
+
+
+def _merge_pollutants(frames):
+    """
+    Zestawia dane wskaźników (po add_city) po czasie pomiaru.
+
+    Args:
+        frames (dict): Dane wskaźników {wskaźnik: DataFrame z MultiIndex (Miejscowość, Kod stacji)}.
+
+    Returns:
+        pandas.DataFrame: Dane z kolumnami MultiIndex (Wskaźnik, Miejscowość, Kod stacji).
+    """
+    indexed = [df.set_index(("datetime", "")) for df in frames.values()]
+    df_multi = pd.concat(indexed, axis=1, keys=list(frames), names=["Wskaźnik"])
+    df_multi.insert(0, ("datetime", "", ""), df_multi.index)
+    df_multi = df_multi.reset_index(drop=True)
+    df_multi.columns.names = ["Wskaźnik", "Miejscowość", "Kod stacji"]
+    return df_multi
+
+
+def _year_info(info, pollutant):
+    """Wybiera parametry czyszczenia wskaźnika (wspólne dla roku albo słownik {wskaźnik: parametry})."""
+    if isinstance(info, dict) and pollutant in info:
+        return info[pollutant]
+    return info
+
+
+def make_pm25_data(years, gios_url_ids, gios_pm25_file, clean_info, outfile, join="inner", validate=False,
+                   workers=None):
+    """
+    Wykonuje pełny pipeline przetwarzania danych PM2.5 (lub kilku wskaźników).
+
+    Gdy dla lat podane są słowniki plików {wskaźnik: plik}, archiwum każdego roku
+    jest pobierane raz, a arkusze wskaźników wczytywane z niego równolegle
+    (download_gios_members). Lata każdego wskaźnika są łączone osobno (wskaźnik
+    może występować tylko w części lat), a wynik ma dodatkowy poziom kolumn
+    "Wskaźnik". Postać długa takich danych (stats.convert_df) zachowuje nazwę
+    kolumny wartości PM25, a wskaźnik wiersza podaje kolumna "Wskaźnik".
 
     Args:
         years (list[int]): Lista analizowanych lat.
         gios_url_ids (dict): Identyfikatory archiwów i metadanych GIOŚ.
-        gios_pm25_file (dict): Nazwy plików PM2.5 dla poszczególnych lat.
-        clean_info (dict): Parametry czyszczenia danych.
+        gios_pm25_file (dict): Nazwy plików PM2.5 dla poszczególnych lat albo słowniki
+            {wskaźnik: plik}, np. {2015: {"PM25": "2015_PM25_1g.xlsx", "PM10": "2015_PM10_1g.xlsx"}};
+            przy słownikach sama nazwa pliku oznacza rok z samym PM2.5.
+        clean_info (dict | None): Parametry czyszczenia danych; wartość może być wspólna dla roku
+            albo słownikiem {wskaźnik: parametry}. Dla lat bez wpisu (albo z wartością "auto")
+            układ arkusza jest rozpoznawany przez sniff_layout.
         outfile (str): Nazwa pliku wyjściowego CSV.
+        join (str): "inner" - tylko stacje obecne we wszystkich latach,
+            "outer" - wszystkie stacje w kolumnach rzadkich (zob. concat_sparse).
+        validate (bool): Czy sprawdzić jakość danych (validation.validate), zamaskować
+            błędne pomiary i zapisać raport problemów do pliku <outfile>_issues.csv.
+        workers (int | None): Liczba procesów parsujących arkusze jednego roku (dla słowników plików).
 
     Returns:
-        tuple: DataFrame z danymi PM2.5 oraz DataFrame z metadanymi.
+        tuple: DataFrame z danymi PM2.5 (z kolumnami (Wskaźnik, Miejscowość, Kod stacji)
+            dla słowników plików) oraz DataFrame z metadanymi.
     """
+    if join not in ("inner", "outer"):
+        raise ValueError(f"Nieznany sposób łączenia lat: {join}")
+    multi = any(isinstance(files, dict) for files in gios_pm25_file.values())
+    # lata z samą nazwą pliku to w danych wielowskaźnikowych lata z samym PM2.5
+    gios_files = {y: f if isinstance(f, dict) else {"PM25": f} for y, f in gios_pm25_file.items()}
+
+    with stage("make_pm25_data", years=list(years)) as total:
+        # downloading (with layout detection for years without clean_info)
+        clean_info = dict(clean_info or {})
+        data = {}
+        for y in years:
+            if multi:
+                download = functools.partial(download_gios_members, y, gios_url_ids[y], gios_files[y], workers)
+            else:
+                download = functools.partial(download_gios_archive, y, gios_url_ids[y], gios_pm25_file[y])
+            if clean_info.get(y) in (None, "auto"):
+                data[y], clean_info[y] = download(layout=True)
+            else:
+                data[y] = download()
+            if not multi:
+                data[y] = {"PM25": data[y]}
+        meta = download_gios_meta(gios_url_ids["meta"])
+
+        # wskaźniki ze wszystkich lat, w kolejności pierwszego wystąpienia
+        pollutants = list(dict.fromkeys(p for y in years for p in data[y]))
+        frames, issues = {}, []
+        for p in pollutants:
+            fields = {"pollutant": p} if multi else {}
+            cleaned = [
+                _prepare_year(data[y][p], _year_info(clean_info[y], p), years, meta, year=y, **fields)
+                for y in years if p in data[y]
+            ]
+
+            # merging years by shared stations (or all stations, stored sparsely)
+            with stage("concat", join=join, **fields) as st:
+                df = _concat_years(cleaned, join)
+                st.set_result(df)
+
+            # adding cities (MultiIndex)
+            with stage("add_city", **fields) as st:
+                df = add_city(df, meta)
+                st.set_result(df)
+
+            if validate:
+                import validation
+
+                with stage("validate", **fields) as st:
+                    df, report = validation.validate(df, mask=True)
+                    if multi:
+                        report.insert(0, "Wskaźnik", p)
+                    issues.append(report)
+                    st.set_result(report)
+            frames[p] = df
+
+        if multi:
+            with stage("merge_pollutants") as st:
+                df_pm25 = _merge_pollutants(frames)
+                st.set_result(df_pm25)
+        else:
+            df_pm25 = frames["PM25"]
+        if validate:
+            pd.concat(issues, ignore_index=True).to_csv(os.path.splitext(outfile)[0] + "_issues.csv", index=None)
 
+        with stage("write_csv") as st:
+            df_pm25.to_csv(outfile, index=None)
+            st.set_result(df_pm25)
+        total.set_result(df_pm25)
+    return df_pm25, meta
 
-    # downloading
-    data = {y: download_gios_archive(y, gios_url_ids[y], gios_pm25_file[y]) for y in years}
-    meta = download_gios_meta(gios_url_ids["meta"])
 
-    # cleaning 
-    cleaned = {
-    y: clean_pm25(data[y], **clean_info[y])
-    for y in years
-    }
+def make_multi_data(years, gios_url_ids, gios_files, clean_info, outfile, workers=None, join="inner",
+                    validate=False):
+    """
+    Wykonuje pipeline dla wielu wskaźników (np. PM2.5, PM10, NO2) z jednego pobrania archiwum na rok.
 
-    # midnight fix
-    cleaned = {y: midnight(df) for y, df in cleaned.items()}
-    
-    # making sure that after midnight fix cleaned data contains only chosen years
-    cleaned = {
-    y: df[df["datetime"].dt.year.isin(years)]
-    for y, df in cleaned.items()
-    }
+    Odpowiada make_pm25_data ze słownikami plików {wskaźnik: plik} dla lat.
 
-    # station code updates
-    cleaned = {y: update_stations(df, meta) for y, df in cleaned.items()}
+    Args:
+        years (list[int]): Lista analizowanych lat.
+        gios_url_ids (dict): Identyfikatory archiwów i metadanych GIOŚ.
+        gios_files (dict): Pliki wskaźników dla lat, np. {2015: {"PM25": "2015_PM25_1g.xlsx", "PM10": "2015_PM10_1g.xlsx"}}.
+        clean_info (dict | None): Parametry czyszczenia dla lat (jak w make_pm25_data).
+        outfile (str): Nazwa pliku wyjściowego CSV.
+        workers (int | None): Liczba procesów parsujących arkusze jednego roku.
+        join (str): Sposób łączenia lat ("inner" albo "outer", zob. make_pm25_data).
+        validate (bool): Czy sprawdzić jakość danych (zob. make_pm25_data).
 
-    # merging years by shared stations
-    df_pm25 = pd.concat([cleaned[y] for y in years], axis=0, join="inner", ignore_index=True)
+    Returns:
+        tuple: DataFrame z kolumnami MultiIndex (Wskaźnik, Miejscowość, Kod stacji) oraz DataFrame z metadanymi.
+    """
+    files = {y: f if isinstance(f, dict) else {"PM25": f} for y, f in gios_files.items()}
+    return make_pm25_data(years, gios_url_ids, files, clean_info, outfile, join, validate, workers)
+
+
+def select_pollutant(df_multi, pollutant):
+    """
+    Wybiera jeden wskaźnik z danych wielowskaźnikowych w formacie make_pm25_data.
+
+    Args:
+        df_multi (pandas.DataFrame): Wynik make_multi_data.
+        pollutant (str): Nazwa wskaźnika, np. "PM10".
+
+    Returns:
+        pandas.DataFrame: Dane w formacie szerokim z MultiIndex (Miejscowość, Kod stacji).
+    """
+    df = df_multi[[df_multi.columns[0]] + [c for c in df_multi.columns if c[0] == pollutant]].copy()
+    df.columns = pd.MultiIndex.from_tuples(
+        [("datetime", "")] + [c[1:] for c in df.columns[1:]],
+        names=["Miejscowość", "Kod stacji"]
+    )
+    return df
 
-    # adding cities (MultiIndex)
-    df_pm25 = add_city(df_pm25, meta)
 
-    df_pm25.to_csv(outfile, index=None)
-    return df_pm25, meta
\ No newline at end of file
+def read_pm25_csv(path, pollutants=False, sparse=False, quantized=False):
+    """
+    Wczytuje dane PM2.5 zapisane przez make_pm25_data (lub make_multi_data).
+
+    Args:
+        path (str): Ścieżka do pliku CSV z dwuwierszowym nagłówkiem (miejscowość, stacja).
+        pollutants (bool): Czy plik ma dodatkowy wiersz nagłówka ze wskaźnikiem (make_multi_data).
+        sparse (bool): Czy zamienić kolumny stacji na rzadkie (jak przy join="outer").
+        quantized (bool): Czy zapisać pomiary jako liczby całkowite (zob. to_quantized).
+
+    Returns:
+        pandas.DataFrame: Dane PM2.5 w formacie szerokim z MultiIndex, jak zwraca make_pm25_data.
+    """
+    names = ["Miejscowość", "Kod stacji"]
+    if pollutants:
+        names = ["Wskaźnik"] + names
+    df = pd.read_csv(path, header=list(range(len(names))))
+    df.columns = pd.MultiIndex.from_tuples(
+        [("datetime",) + ("",) * (len(names) - 1)] + list(df.columns[1:]),
+        names=names
+    )
+    df[df.columns[0]] = pd.to_datetime(df[df.columns[0]])
+    if sparse:
+        df = to_sparse(df)
+    elif quantized:
+        df = to_quantized(df)
+    return df
\ No newline at end of file
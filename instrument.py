@@ -0,0 +1,234 @@
+import contextlib
+import functools
+import json
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+# stan instrumentacji; przy wyłączonej każdy etap kosztuje jedno sprawdzenie flagi
+_enabled = False
+_trace_memory = False
+_hooks = []
+_stack = []
+
+
+class Stage:
+    """
+    Pomiar jednego etapu przetwarzania (czas zegarowy, czas CPU, pamięć, rozmiar danych).
+
+    Args:
+        name (str): Nazwa etapu, np. "clean_pm25".
+        fields (dict): Dodatkowe pola zdarzenia, np. year=2015.
+    """
+
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = fields
+        self.rows = None
+        self.cells = None
+        self.peak = 0
+
+    def set(self, rows=None, cells=None):
+        """
+        Zapisuje liczbę przetworzonych wierszy i komórek.
+
+        Args:
+            rows (int | None): Liczba wierszy.
+            cells (int | None): Liczba komórek.
+        """
+        self.rows = rows if rows is not None else self.rows
+        self.cells = cells if cells is not None else self.cells
+
+    def set_result(self, result):
+        """
+        Ustala rozmiar danych na podstawie wyniku etapu (DataFrame/Series).
+
+        Args:
+            result (object): Wynik etapu.
+        """
+        if isinstance(result, (pd.DataFrame, pd.Series)):
+            self.set(rows=len(result), cells=int(result.size))
+
+
+class _NullStage:
+    """Etap używany przy wyłączonej instrumentacji - ignoruje wszystkie wywołania."""
+
+    def set(self, rows=None, cells=None):
+        pass
+
+    def set_result(self, result):
+        pass
+
+
+_null_stage = _NullStage()
+
+
+def enable(memory=False):
+    """
+    Włącza instrumentację.
+
+    Args:
+        memory (bool): Czy mierzyć szczytowe zużycie pamięci (tracemalloc, zauważalnie spowalnia).
+    """
+    global _enabled, _trace_memory
+    _enabled = True
+    _trace_memory = memory
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def disable():
+    """Wyłącza instrumentację (i śledzenie pamięci, jeśli było włączone)."""
+    global _enabled, _trace_memory
+    if _trace_memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _enabled = False
+    _trace_memory = False
+
+
+def is_enabled():
+    """Zwraca True, gdy instrumentacja jest włączona."""
+    return _enabled
+
+
+def add_hook(hook):
+    """
+    Rejestruje funkcję wywoływaną dla każdego zdarzenia.
+
+    Args:
+        hook (callable): Funkcja przyjmująca słownik zdarzenia.
+    """
+    _hooks.append(hook)
+
+
+def remove_hook(hook):
+    """
+    Usuwa zarejestrowaną funkcję.
+
+    Args:
+        hook (callable): Funkcja dodana przez add_hook.
+    """
+    _hooks.remove(hook)
+
+
+def json_hook(stream=None):
+    """
+    Tworzy funkcję zapisującą zdarzenia jako JSON (jedno zdarzenie w wierszu).
+
+    Args:
+        stream (file | None): Strumień wyjściowy (domyślnie sys.stderr).
+
+    Returns:
+        callable: Funkcja do przekazania do add_hook.
+    """
+    def hook(event):
+        out = stream or sys.stderr
+        out.write(json.dumps(event, ensure_ascii=False, default=str) + "\n")
+        out.flush()
+    return hook
+
+
+def _emit(event):
+    for hook in list(_hooks):
+        hook(event)
+
+
+@contextlib.contextmanager
+def stage(name, **fields):
+    """
+    Mierzy etap przetwarzania i po jego zakończeniu emituje zdarzenie.
+
+    Zdarzenie zawiera nazwę etapu, dodatkowe pola (np. year), wall_s, cpu_s,
+    peak_mb (gdy włączono pomiar pamięci), rows, cells oraz status "ok" albo
+    "error" z opisem wyjątku. Wyjątek jest przekazywany dalej.
+
+    Args:
+        name (str): Nazwa etapu.
+        **fields: Dodatkowe pola zdarzenia.
+
+    Yields:
+        Stage: Obiekt pozwalający zapisać liczbę wierszy i komórek.
+    """
+    if not _enabled:
+        yield _null_stage
+        return
+
+    current = Stage(name, fields)
+    if _trace_memory:
+        # szczyt rodzica do tej chwili zapamiętywany przed wyzerowaniem licznika
+        if _stack:
+            _stack[-1].peak = max(_stack[-1].peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+    _stack.append(current)
+
+    status, error = "ok", None
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        yield current
+    except BaseException as e:
+        status, error = "error", f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        _stack.pop()
+        event = {"event": "stage", "stage": name, **fields, "status": status}
+        if error:
+            event["error"] = error
+        event.update({"wall_s": wall, "cpu_s": cpu, "rows": current.rows, "cells": current.cells})
+        if _trace_memory and tracemalloc.is_tracing():
+            peak = max(current.peak, tracemalloc.get_traced_memory()[1])
+            event["peak_mb"] = peak / 2**20
+            if _stack:
+                _stack[-1].peak = max(_stack[-1].peak, peak)
+        _emit(event)
+
+
+def instrumented(name):
+    """
+    Dekorator mierzący wywołania funkcji jako etap o podanej nazwie.
+
+    Przy wyłączonej instrumentacji wywołuje funkcję bezpośrednio.
+
+    Args:
+        name (str): Nazwa etapu, np. "stats.calc_daily_means".
+
+    Returns:
+        callable: Dekorator.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with stage(name) as st:
+                result = func(*args, **kwargs)
+                st.set_result(result)
+            return result
+        return wrapper
+    return decorator
+
+
+@contextlib.contextmanager
+def recording(memory=False):
+    """
+    Włącza instrumentację na czas bloku i zbiera zdarzenia do listy.
+
+    Args:
+        memory (bool): Czy mierzyć szczytowe zużycie pamięci.
+
+    Yields:
+        list[dict]: Lista zdarzeń uzupełniana w trakcie działania bloku.
+    """
+    events = []
+    was_enabled = _enabled
+    if not was_enabled:
+        enable(memory=memory)
+    add_hook(events.append)
+    try:
+        yield events
+    finally:
+        remove_hook(events.append)
+        if not was_enabled:
+            disable()
@@ -0,0 +1,327 @@
+import asyncio
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from stats import hour_slots
+
+# liczba dni przechowywanych w buforze każdej stacji
+buffer_days = 7
+# odstęp między kolejnymi odpytaniami źródła danych [s]
+poll_interval = 15 * 60
+
+
+class LiveBuffers:
+    """
+    Bieżące pomiary godzinowe stacji w buforach cyklicznych o stałym rozmiarze.
+
+    Pomiary wszystkich stacji są trzymane w jednej macierzy (stacja x godzina),
+    w której kolumna godziny to jej numer modulo długość bufora; przesunięcie
+    okna czyści tylko kolumny nowych godzin. Średnie kroczące i przekroczenia
+    liczone są bezpośrednio na macierzy, bez budowania DataFrame.
+
+    Doba obejmuje godziny 01:00-24:00, tak jak w calc_daily_means
+    (pomiar z 00:00 należy do poprzedniej doby).
+
+    Args:
+        stations (list[str]): Kody stacji (nowe stacje z danych są dopisywane).
+        days (int): Liczba dni przechowywanych dla każdej stacji.
+        thresholds (list[float]): Dobowe normy PM2.5, dla których liczone są przekroczenia.
+    """
+
+    def __init__(self, stations=(), days=buffer_days, thresholds=(15.0,)):
+        self.codes = pd.Index(list(stations), dtype=object)
+        self.hours = days * 24
+        self.thresholds = list(thresholds)
+        self.values = np.full((len(self.codes), self.hours), np.nan)
+        self.latest = None
+
+    def _station_rows(self, codes):
+        """Zwraca wiersze macierzy dla kodów stacji, dopisując nieznane stacje."""
+        rows = self.codes.get_indexer(codes)
+        if (rows < 0).any():
+            new = pd.Index(pd.unique(np.asarray(codes, dtype=object)[rows < 0]), dtype=object)
+            self.codes = self.codes.append(new)
+            self.values = np.vstack([self.values, np.full((len(new), self.hours), np.nan)])
+            rows = self.codes.get_indexer(codes)
+        return rows
+
+    def _advance(self, newest):
+        """Przesuwa okno bufora do godziny newest, czyszcząc kolumny nowych godzin."""
+        if self.latest is None or newest - self.latest >= self.hours:
+            self.values[:] = np.nan
+        elif newest > self.latest:
+            self.values[:, np.arange(self.latest + 1, newest + 1) % self.hours] = np.nan
+        else:
+            return
+        self.latest = newest
+
+    def push(self, codes, times, values):
+        """
+        Zapisuje pomiary do buforów.
+
+        Pomiary późniejsze niż najnowsza godzina przesuwają okno; pomiary
+        z godzin w oknie (np. poprawione przez źródło) nadpisują poprzednie
+        wartości, a starsze są pomijane.
+
+        Args:
+            codes (array-like): Kody stacji.
+            times (array-like): Znaczniki czasu pomiarów.
+            values (array-like): Wartości PM2.5 (NaN - brak pomiaru).
+
+        Returns:
+            int: Liczba zapisanych pomiarów.
+        """
+        if len(codes) == 0:
+            return 0
+        slots = hour_slots(pd.DatetimeIndex(times))
+        values = np.asarray(values, dtype=float)
+        rows = self._station_rows(codes)
+
+        self._advance(slots.max())
+        keep = slots > self.latest - self.hours
+        self.values[rows[keep], slots[keep] % self.hours] = values[keep]
+        return int(keep.sum())
+
+    def window(self, hours):
+        """
+        Zwraca ostatnie godziny bufora w kolejności od najstarszej.
+
+        Args:
+            hours (int): Liczba godzin (najwyżej długość bufora).
+
+        Returns:
+            numpy.ndarray: Macierz (stacja, hours); NaN przy braku pomiaru.
+        """
+        hours = min(hours, self.hours)
+        if self.latest is None:
+            return np.full((len(self.codes), hours), np.nan)
+        return self.values[:, np.arange(self.latest - hours + 1, self.latest + 1) % self.hours]
+
+    def rolling_mean(self, hours=24, min_count=1):
+        """
+        Oblicza średnią z ostatnich godzin dla każdej stacji.
+
+        Args:
+            hours (int): Długość okna [h].
+            min_count (int): Minimalna liczba pomiarów w oknie.
+
+        Returns:
+            tuple: Średnie (NaN poniżej min_count) i liczby pomiarów (numpy.ndarray).
+        """
+        window = self.window(hours)
+        valid = ~np.isnan(window)
+        count = valid.sum(axis=1)
+        total = np.where(valid, window, 0.0).sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(count >= max(min_count, 1), total / count, np.nan)
+        return mean, count
+
+    def day_mean(self):
+        """
+        Oblicza średnią bieżącej doby (dotychczasowe godziny doby najnowszego pomiaru).
+
+        Returns:
+            tuple: Początek doby (pandas.Timestamp | None), średnie i liczby pomiarów (numpy.ndarray).
+        """
+        if self.latest is None:
+            return None, *self.rolling_mean(0)
+        # godzina s kończy się o s:00, więc doba zaczyna się po godzinie podzielnej przez 24
+        hours_in_day = (self.latest - 1) % 24 + 1
+        mean, count = self.rolling_mean(hours_in_day)
+        start = pd.Timestamp(0) + pd.Timedelta(hours=int(self.latest - hours_in_day))
+        return start, mean, count
+
+    def status(self, min_coverage=None):
+        """
+        Zwraca bieżący stan wszystkich stacji: średnie i przekroczenia norm.
+
+        Przekroczenie dobowe (jak w count_overnorm_days) dotyczy średniej bieżącej
+        doby, przekroczenie kroczące - średniej z ostatnich 24 godzin.
+
+        Args:
+            min_coverage (float | None): Minimalny odsetek godzin z pomiarem
+                (względem 24 h), poniżej którego przekroczenie nie jest zgłaszane.
+
+        Returns:
+            dict: Klucze "Doba", "Ostatnia godzina", "Kod stacji", "Ostatni pomiar",
+                "Średnia 24h", "Liczba godzin 24h", "Średnia dobowa", "Liczba godzin"
+                oraz dla każdej normy t: "Przekroczenie t" i "Przekroczenie 24h t"
+                (tablice numpy o długości liczby stacji).
+        """
+        last = self.window(1)[:, 0]
+        rolling, rolling_count = self.rolling_mean(24)
+        day, daily, daily_count = self.day_mean()
+        min_hours = 0 if min_coverage is None else min_coverage * 24
+
+        out = {
+            "Doba": day,
+            "Ostatnia godzina": None if self.latest is None
+            else pd.Timestamp(0) + pd.Timedelta(hours=int(self.latest)),
+            "Kod stacji": self.codes.to_numpy(),
+            "Ostatni pomiar": last,
+            "Średnia 24h": rolling,
+            "Liczba godzin 24h": rolling_count,
+            "Średnia dobowa": daily,
+            "Liczba godzin": daily_count,
+        }
+        for t in self.thresholds:
+            out[f"Przekroczenie {t}"] = (daily > t) & (daily_count >= min_hours)
+            out[f"Przekroczenie 24h {t}"] = (rolling > t) & (rolling_count >= min_hours)
+        return out
+
+    def to_frame(self, min_coverage=None):
+        """
+        Zwraca stan stacji (status) jako DataFrame, np. do wyświetlenia w panelu.
+
+        Args:
+            min_coverage (float | None): Jak w status.
+
+        Returns:
+            pandas.DataFrame: Wiersz dla każdej stacji.
+        """
+        status = self.status(min_coverage)
+        day, hour = status.pop("Doba"), status.pop("Ostatnia godzina")
+        return pd.DataFrame(status).assign(**{"Doba": day, "Ostatnia godzina": hour})
+
+
+def parse_records(payload):
+    """
+    Zamienia odpowiedź źródła bieżących pomiarów na tablice.
+
+    Obsługiwane są:
+    - lista rekordów z kluczami "Kod stacji", "datetime" i "PM25",
+    - odpowiedź API GIOŚ ("Lista danych pomiarowych" z kluczami
+      "Kod stanowiska", "Data" i "Wartość"; kod stacji to część kodu
+      stanowiska przed pierwszym "-").
+
+    Args:
+        payload (list | dict): Zdekodowana odpowiedź JSON.
+
+    Returns:
+        tuple: Kody stacji (list), znaczniki czasu (pandas.DatetimeIndex) i wartości (numpy.ndarray).
+
+    Raises:
+        ValueError: Gdy format odpowiedzi nie jest rozpoznany.
+    """
+    if isinstance(payload, dict) and "Lista danych pomiarowych" in payload:
+        rows = payload["Lista danych pomiarowych"]
+        keys = ("Kod stanowiska", "Data", "Wartość")
+    elif isinstance(payload, list):
+        rows = payload
+        keys = ("Kod stacji", "datetime", "PM25")
+    else:
+        raise ValueError("Nieznany format danych bieżących.")
+
+    try:
+        codes = [str(r[keys[0]]).split("-")[0] for r in rows]
+        times = pd.DatetimeIndex([r[keys[1]] for r in rows])
+        values = np.array([np.nan if r[keys[2]] is None else r[keys[2]] for r in rows], dtype=float)
+    except (KeyError, TypeError) as e:
+        raise ValueError(f"Niepełny rekord danych bieżących: {e}") from e
+    return codes, times, values
+
+
+def http_feed(url, timeout=None):
+    """
+    Tworzy źródło bieżących pomiarów odpytujące adres HTTP (zapytanie w osobnym wątku).
+
+    Args:
+        url (str): Adres zwracający JSON w formacie obsługiwanym przez parse_records.
+        timeout (tuple | None): Limity czasu połączenia i odczytu (domyślnie get_data.download_timeout).
+
+    Returns:
+        callable: Funkcja asynchroniczna zwracająca wynik parse_records.
+    """
+    import requests
+
+    from get_data import download_timeout
+
+    timeout = download_timeout if timeout is None else timeout
+
+    def get():
+        response = requests.get(url, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+
+    async def feed():
+        return parse_records(await asyncio.to_thread(get))
+
+    return feed
+
+
+def file_feed(directory):
+    """
+    Tworzy źródło bieżących pomiarów z plików JSON wrzucanych do katalogu.
+
+    Każde odpytanie wczytuje nowe pliki *.json (w kolejności nazw), a wczytane
+    pliki dostają rozszerzenie .done.
+
+    Args:
+        directory (str): Katalog z plikami.
+
+    Returns:
+        callable: Funkcja asynchroniczna zwracająca wynik parse_records.
+    """
+
+    def read():
+        codes, times, values = [], [], []
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(directory, name)
+            with open(path, encoding="utf-8") as f:
+                c, t, v = parse_records(json.load(f))
+            os.replace(path, path + ".done")
+            codes += c
+            times.append(t)
+            values.append(v)
+        if not codes:
+            return [], pd.DatetimeIndex([]), np.array([])
+        return codes, times[0].append(times[1:]), np.concatenate(values)
+
+    async def feed():
+        return await asyncio.to_thread(read)
+
+    return feed
+
+
+async def ingest(buffers, feed, interval=poll_interval, ticks=None, stop=None, on_update=None, on_error=None):
+    """
+    Odpytuje źródło bieżących pomiarów co interval sekund i aktualizuje bufory.
+
+    Args:
+        buffers (LiveBuffers): Bufory stacji.
+        feed (callable): Funkcja asynchroniczna zwracająca (kody, czasy, wartości), np. http_feed.
+        interval (float): Odstęp między odpytaniami [s].
+        ticks (int | None): Liczba odpytań (None - do ustawienia stop).
+        stop (asyncio.Event | None): Zdarzenie kończące pętlę.
+        on_update (callable | None): Wywoływana po każdym odpytaniu z wynikiem buffers.status().
+        on_error (callable | None): Wywoływana z wyjątkiem nieudanego odpytania;
+            bez niej wyjątek przerywa pętlę.
+
+    Returns:
+        int: Liczba wykonanych odpytań.
+    """
+    stop = stop or asyncio.Event()
+    done = 0
+    while not stop.is_set() and (ticks is None or done < ticks):
+        try:
+            buffers.push(*await feed())
+        except Exception as e:
+            if on_error is None:
+                raise
+            on_error(e)
+        else:
+            if on_update is not None:
+                on_update(buffers.status())
+        done += 1
+        if ticks is not None and done >= ticks:
+            break
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+    return done
@@ -1,81 +1,178 @@
+import concurrent.futures
+import math
+import os
+
+import numpy as np
 import seaborn as sns
 import pandas as pd
+import matplotlib
 import matplotlib.pyplot as plt
 
-def plot_means(monthly_means, cities, years):
+
+class MonthCube:
+    """
+    Średnie miesięczne PM2.5 miejscowości jako tablica (miejscowość, rok, miesiąc).
+
+    Tablica jest budowana raz, jednym przejściem po tabeli średnich, a funkcje
+    rysujące (plot_means, heatmaps_means) wybierają z niej fragmenty indeksami,
+    bez ponownego filtrowania i pivotowania tabeli dla każdej miejscowości.
+
+    Args:
+        cities (pandas.Index): Miejscowości (w kolejności pierwszego wystąpienia).
+        years (pandas.Index): Lata (rosnąco).
+        values (numpy.ndarray): Średnie o kształcie (miejscowość, rok, 12); NaN przy braku danych.
+    """
+
+    def __init__(self, cities, years, values):
+        self.cities = cities
+        self.years = years
+        self.values = values
+
+    @classmethod
+    def from_means(cls, means, value="Mean PM25"):
+        """
+        Buduje kostkę ze średnich miesięcznych stacji lub miejscowości.
+
+        Dla średnich stacji (calc_monthly_means) wartość miejscowości to średnia
+        stacji, tak jak w calc_monthly_city_means.
+
+        Args:
+            means (pandas.DataFrame): Tabela z kolumnami Rok, Miesiąc, Miejscowość i value.
+            value (str): Kolumna z wartościami (np. "Dolna granica" z bootstrap_means).
+
+        Returns:
+            MonthCube: Kostka średnich miesięcznych.
+        """
+        year = pd.to_numeric(means["Rok"], errors="coerce")
+        month = pd.to_numeric(means["Miesiąc"], errors="coerce")
+        value = pd.to_numeric(means[value], errors="coerce").to_numpy(dtype=float)
+        keep = (year.notna() & month.between(1, 12)).to_numpy()
+
+        city_codes, cities = pd.factorize(means["Miejscowość"][keep])
+        year_codes, years = pd.factorize(year[keep].astype(int), sort=True)
+        month_codes = month[keep].astype(int).to_numpy() - 1
+        value = value[keep]
+
+        # średnia w komórce kostki: suma i liczba pomiarów zliczane przez bincount
+        flat = (city_codes * len(years) + year_codes) * 12 + month_codes
+        size = len(cities) * len(years) * 12
+        valid = ~np.isnan(value)
+        total = np.bincount(flat[valid], weights=value[valid], minlength=size)
+        count = np.bincount(flat[valid], minlength=size)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cube = np.where(count > 0, total / count, np.nan)
+        return cls(pd.Index(cities), pd.Index(years), cube.reshape(len(cities), len(years), 12))
+
+    def select(self, cities=None, years=None):
+        """
+        Zwraca fragment kostki dla wybranych miejscowości i lat.
+
+        Args:
+            cities (list[str] | None): Miejscowości (domyślnie wszystkie).
+            years (list[int] | None): Lata (domyślnie wszystkie).
+
+        Returns:
+            numpy.ndarray: Tablica (miejscowość, rok, 12); NaN dla miejscowości lub lat spoza kostki.
+        """
+        c = np.arange(len(self.cities)) if cities is None else self.cities.get_indexer(list(cities))
+        y = np.arange(len(self.years)) if years is None else self.years.get_indexer(list(years))
+        out = self.values[np.clip(c, 0, None)][:, np.clip(y, 0, None)]
+        out[c < 0] = np.nan
+        out[:, y < 0] = np.nan
+        return out
+
+
+def _as_cube(means):
+    """Zwraca kostkę średnich miesięcznych (tabela jest przeliczana przez MonthCube.from_means)."""
+    return means if isinstance(means, MonthCube) else MonthCube.from_means(means)
+
+
+def plot_means(monthly_means, cities, years, show=True, ci=None):
     """
     Rysuje wykres liniowy trendu średnich miesięcznych PM2.5 dla wybranych miast i lat.
 
     Args:
-        monthly_means (pandas.DataFrame): Średnie miesięczne PM2.5 dla stacji.
+        monthly_means (pandas.DataFrame | MonthCube): Średnie miesięczne PM2.5 dla stacji
+            albo gotowa kostka (MonthCube.from_means).
         cities (list[str]): Lista nazw miejscowości.
         years (list[int]): Lista lat do porównania.
+        show (bool): Czy wyświetlić wykres; przy False figura jest zwracana (np. do zapisu).
+        ci (pandas.DataFrame | None): Przedziały ufności miejscowości (bootstrap.bootstrap_means),
+            rysowane jako pasma wokół linii.
 
     Returns:
-        None: Funkcja wyświetla wykres.
-    """
-    # filtrowanie danych do wybranych miast oraz liczenie średniej miesięcznej dla miasta
-    city_monthly = (
-        monthly_means[monthly_means["Miejscowość"].isin(cities)]
-        .groupby(["Rok", "Miesiąc", "Miejscowość"])["Mean PM25"]
-        .mean()
-        .reset_index()
-    )
-
-    # ;pivot danych tak żeby łatwiej było stworzyć wykres
-    df = city_monthly[city_monthly["Rok"].isin(years)]
-    df = df.pivot_table(
-        values="Mean PM25",
-        index="Miesiąc",
-        columns=["Miejscowość", "Rok"]
-    )
-
-    plt.figure()
-    for city in cities:
-        for year in years:
-            plt.plot(df.index, df[(city, year)], label=f"{city} {year}")
+        matplotlib.figure.Figure | None: Figura (gdy show=False).
+    """
+    data = _as_cube(monthly_means).select(cities, years)
+    months = np.arange(1, 13)
+    if ci is not None:
+        lower = MonthCube.from_means(ci, "Dolna granica").select(cities, years)
+        upper = MonthCube.from_means(ci, "Górna granica").select(cities, years)
+
+    fig = plt.figure()
+    for i, city in enumerate(cities):
+        for j, year in enumerate(years):
+            (line,) = plt.plot(months, data[i, j], label=f"{city} {year}")
+            if ci is not None:
+                plt.fill_between(months, lower[i, j], upper[i, j], color=line.get_color(), alpha=0.2)
 
     plt.legend()
     plt.xlabel("Miesiąc")
     plt.ylabel("Średnia miesięczna wartość PM25")
     plt.title(
-        f"Trend średnich miesięcznych PM2.5 w Warszawie i Katowicach w latach {years[0]} i {years[1]}"
+        f"Trend średnich miesięcznych PM2.5: {', '.join(map(str, cities))}, lata {', '.join(map(str, years))}"
     )
     plt.grid(True)
-    plt.show()
+    return _finish(fig, show)
+
+
+def _finish(fig, show):
+    """
+    Wyświetla figurę albo zwraca ją bez wyświetlania (tryb bez interfejsu graficznego).
 
+    Args:
+        fig (matplotlib.figure.Figure): Gotowa figura.
+        show (bool): Czy wyświetlić figurę.
 
-def heatmaps_means(city_monthly, years):
+    Returns:
+        matplotlib.figure.Figure | None: Figura (gdy show=False).
+    """
+    if show:
+        plt.show()
+        return None
+    return fig
+
+
+def heatmaps_means(city_monthly, years, ncols=3):
     """
     Tworzy heatmapy średnich miesięcznych stężeń PM2.5 dla każdej miejscowości.
 
+    Liczba wierszy siatki wynika z liczby miejscowości (ncols heatmap w wierszu).
+
     Args:
-        city_monthly (pandas.DataFrame): Średnie miesięczne PM2.5 dla miejscowości.
+        city_monthly (pandas.DataFrame | MonthCube): Średnie miesięczne PM2.5 dla miejscowości
+            (lub stacji) albo gotowa kostka (MonthCube.from_means).
         years (list[int]): Lista lat uwzględnianych na heatmapach.
+        ncols (int): Maksymalna liczba heatmap w jednym wierszu siatki.
 
     Returns:
         matplotlib.figure.Figure: Obiekt figury z heatmapami.
     """
-    
-    df = city_monthly.copy()
-    # weryfikacja, że kolumny mają poprawne typy (czyli liczbowe)
-    df["Mean PM25"] = pd.to_numeric(df["Mean PM25"], errors="coerce")
-    df["Rok"] = pd.to_numeric(df["Rok"], errors="coerce").astype("Int64")
-    df["Miesiąc"] = pd.to_numeric(df["Miesiąc"], errors="coerce").astype("Int64")
-    # filtrowanie wybranych lat
-    df = df[df["Rok"].isin(years)]
-
-    cities = df["Miejscowość"].unique()
-    vmin, vmax = df["Mean PM25"].min(), df["Mean PM25"].max()
-
-    # siatka wykresów i dla każdego miasta heatmapa
-    fig, axes = plt.subplots(6, 3, figsize=(18, 36))
+    cube = _as_cube(city_monthly)
+    data = cube.select(years=years)
+    # miejscowości z jakimkolwiek pomiarem w wybranych latach
+    has_data = ~np.isnan(data).all(axis=(1, 2))
+    cities, data = cube.cities[has_data], data[has_data]
+    vmin, vmax = (np.nanmin(data), np.nanmax(data)) if len(data) else (None, None)
+
+    # siatka wykresów dopasowana do liczby miast i dla każdego miasta heatmapa
+    ncols = max(1, min(ncols, len(cities)))
+    nrows = max(1, math.ceil(len(cities) / ncols))
+    fig, axes = plt.subplots(nrows, ncols, figsize=(6 * ncols, 6 * nrows), squeeze=False)
     axes = axes.flatten()
 
-    for ax, city in zip(axes, cities):
-        data = df[df["Miejscowość"] == city]
-        pivot = data.pivot(index="Rok", columns="Miesiąc", values="Mean PM25")
-        pivot = pivot.reindex(years)
+    for ax, city, values in zip(axes, cities, data):
+        pivot = pd.DataFrame(values, index=pd.Index(years, name="Rok"), columns=pd.Index(range(1, 13), name="Miesiąc"))
         hm = sns.heatmap(pivot, vmin=vmin, vmax=vmax, ax=ax)
 
         ax.set_title(city, fontsize=16)
@@ -92,7 +189,7 @@ def heatmaps_means(city_monthly, years):
     return fig
 
 
-def plot_overnorm(over_counts, selected, years):
+def plot_overnorm(over_counts, selected, years, show=True):
     """
     Rysuje wykres słupkowy liczby dni z przekroczeniem normy PM2.5 dla wybranych stacji.
 
@@ -100,9 +197,10 @@ def plot_overnorm(over_counts, selected, years):
         over_counts (pandas.DataFrame): Liczba dni z przekroczeniem normy PM2.5.
         selected (pandas.DataFrame): Wybrane stacje do wizualizacji.
         years (list[int]): Lista lat uwzględnianych na wykresie.
+        show (bool): Czy wyświetlić wykres; przy False figura jest zwracana (np. do zapisu).
 
     Returns:
-        None: Funkcja wyświetla wykres.
+        matplotlib.figure.Figure | None: Figura (gdy show=False).
     """
 
     df = over_counts.copy()
@@ -111,7 +209,7 @@ def plot_overnorm(over_counts, selected, years):
     df = df[df["Rok"].isin(years)]
     y_col = df.columns[-1]
 
-    plt.figure()
+    fig = plt.figure()
     sns.barplot(data=df, x="Kod stacji", y=y_col, hue="Rok")
     plt.title("Liczba dni z przekroczeniem normy dobowej PM2.5")
     plt.xlabel("Stacja")
@@ -119,9 +217,9 @@ def plot_overnorm(over_counts, selected, years):
     plt.xticks(rotation=45)
     plt.grid(True)
     plt.tight_layout()
-    plt.show()
+    return _finish(fig, show)
 
-def plot_wojewodztwa(df: pd.DataFrame, year: int = 2024, treshold: int = 15):
+def plot_wojewodztwa(df: pd.DataFrame, year: int = 2024, treshold: int = 15, show: bool = True):
     """
     Rysuje wykres słupkowy liczby dni z przekroczeniem normy PM2.5 dla wszystkich województw.
     
@@ -129,9 +227,10 @@ def plot_wojewodztwa(df: pd.DataFrame, year: int = 2024, treshold: int = 15):
         df (pandas.DataFrame): Liczba dni z przekroczeniem normy PM2.5.
         year (int): Rok pochodzenia danych uwzględnianych na wykresie.
         treshold (int): maksymalne dopuszczalne stężenie PM2.5
+        show (bool): Czy wyświetlić wykres; przy False figura jest zwracana (np. do zapisu).
 
     Returns:
-        None: Funkcja wyświetla wykres.
+        matplotlib.figure.Figure | None: Figura (gdy show=False).
     """
 
     sns.set_theme(style="whitegrid", context="talk")
@@ -167,4 +266,189 @@ def plot_wojewodztwa(df: pd.DataFrame, year: int = 2024, treshold: int = 15):
     ax.set_ylabel(f"Liczba dni z przekroczeniem progu {treshold} µg/m³")
 
     plt.tight_layout()
-    plt.show()
\ No newline at end of file
+    return _finish(fig, show)
+
+def heatmap_profile(profile, station=None, city=None):
+    """
+    Rysuje heatmapę profilu dobowego PM2.5 (godzina x dzień tygodnia lub miesiąc).
+
+    Args:
+        profile (pandas.DataFrame): Profil dobowy (wynik calc_profiles).
+        station (str | None): Kod stacji; jeśli brak, profile stacji są uśredniane.
+        city (str | None): Miejscowość, do której ograniczane są stacje.
+
+    Returns:
+        matplotlib.figure.Figure: Obiekt figury z heatmapą.
+    """
+    df = profile.copy()
+    group_col = "Dzień tygodnia" if "Dzień tygodnia" in df.columns else "Miesiąc"
+    if city is not None:
+        df = df[df["Miejscowość"] == city]
+    if station is not None:
+        df = df[df["Kod stacji"] == station]
+
+    pivot = df.pivot_table(values="Mean PM25", index=group_col, columns="Godzina")
+    if group_col == "Dzień tygodnia":
+        pivot.index = pivot.index.map(dict(enumerate(["Pn", "Wt", "Śr", "Cz", "Pt", "So", "Nd"])))
+
+    fig, ax = plt.subplots(figsize=(14, 5))
+    hm = sns.heatmap(pivot, ax=ax)
+    ax.set_title(f"Profil dobowy PM2.5: {station or city or 'wszystkie stacje'}", fontsize=14)
+    ax.set_xlabel("Godzina", fontsize=12)
+    ax.set_ylabel(group_col, fontsize=12)
+
+    cbar = hm.collections[0].colorbar
+    cbar.set_label("PM2.5 [ug/m3]", fontsize=12)
+
+    plt.tight_layout()
+    return fig
+
+
+def plot_timeseries(pyramid, stations, start=None, end=None, max_points=2000, method="envelope", show=True):
+    """
+    Rysuje przebieg PM2.5 wybranych stacji w rozdzielczości dopasowanej do zakresu czasu.
+
+    Z piramidy (pyramid.Pyramid) wybierany jest najdrobniejszy poziom
+    (godzina, doba, tydzień, miesiąc), który mieści się w max_points punktach.
+    Poza poziomem godzinowym rysowana jest średnia z pasmem min-max (method="envelope")
+    albo seria godzinowa zredukowana metodą LTTB (method="lttb"), zachowująca
+    pojedyncze godzinowe szczyty.
+
+    Args:
+        pyramid (pyramid.Pyramid): Piramida danych godzinowych.
+        stations (list[str]): Kody stacji.
+        start (str | pandas.Timestamp | None): Początek zakresu.
+        end (str | pandas.Timestamp | None): Koniec zakresu.
+        max_points (int): Maksymalna liczba punktów na serię.
+        method (str): "envelope" albo "lttb".
+        show (bool): Czy wyświetlić wykres; przy False figura jest zwracana (np. do zapisu).
+
+    Returns:
+        matplotlib.figure.Figure | None: Figura (gdy show=False).
+    """
+    from pyramid import lttb
+
+    if method not in ("envelope", "lttb"):
+        raise ValueError(f"Nieznana metoda: {method}")
+
+    fig, ax = plt.subplots(figsize=(14, 5))
+    level = pyramid.level_for(start, end, max_points)
+    for station in stations:
+        if level != "hour" and method == "lttb":
+            _, df = pyramid.series(station, start, end, level="hour")
+            keep = lttb(df["datetime"].to_numpy(), df["mean"].to_numpy(), max_points)
+            ax.plot(df["datetime"].iloc[keep], df["mean"].iloc[keep], linewidth=0.8, label=station)
+            continue
+
+        _, df = pyramid.series(station, start, end, level=level)
+        line, = ax.plot(df["datetime"], df["mean"], linewidth=0.8, label=station)
+        if level != "hour":
+            ax.fill_between(df["datetime"], df["min"], df["max"], color=line.get_color(), alpha=0.2, linewidth=0)
+
+    names = {"hour": "godzinowe", "day": "dobowe", "week": "tygodniowe", "month": "miesięczne"}
+    detail = "godzinowe (LTTB)" if level != "hour" and method == "lttb" else names[level]
+    ax.set_title(f"Stężenia PM2.5 - dane {detail}")
+    ax.set_xlabel("Czas")
+    ax.set_ylabel("PM2.5 [ug/m3]")
+    ax.legend()
+    ax.grid(True)
+    fig.tight_layout()
+    return _finish(fig, show)
+
+
+# funkcje rysujące, które przyjmują parametr show (pozostałe zawsze zwracają figurę)
+_show_param = {"plot_means", "plot_overnorm", "plot_wojewodztwa", "plot_timeseries"}
+
+
+def _init_worker():
+    """Ustawia w procesie roboczym backend Agg (bez okien i interfejsu graficznego)."""
+    matplotlib.use("Agg")
+
+
+def _render(job, outdir, fmt, dpi):
+    """
+    Rysuje jedną figurę, zapisuje ją do pliku i od razu zamyka.
+
+    Args:
+        job (tuple): (nazwa pliku, nazwa funkcji z plots, argumenty, argumenty nazwane).
+        outdir (str): Katalog docelowy.
+        fmt (str): Format pliku ("png" albo "svg").
+        dpi (int): Rozdzielczość obrazów rastrowych.
+
+    Returns:
+        str: Ścieżka zapisanego pliku.
+    """
+    name, plot, args, kwargs = job
+    if plot in _show_param:
+        kwargs = {**kwargs, "show": False}
+    fig = globals()[plot](*args, **kwargs)
+    path = os.path.join(outdir, f"{name}.{fmt}")
+    try:
+        fig.savefig(path, format=fmt, dpi=dpi, bbox_inches="tight")
+    finally:
+        plt.close(fig)
+    return path
+
+
+def group_jobs(plot, data, by, group_param=None, prefix=None, **kwargs):
+    """
+    Tworzy listę zadań export_figures: jedną figurę dla każdej wartości kolumny `by`.
+
+    Każde zadanie dostaje tylko wiersze swojej grupy (mniej danych do przesłania
+    do procesów roboczych).
+
+    Args:
+        plot (str): Nazwa funkcji z plots, np. "heatmaps_means".
+        data (pandas.DataFrame): Dane przekazywane jako pierwszy argument funkcji.
+        by (str): Kolumna grupująca, np. "Miejscowość", "Kod stacji", "Rok".
+        group_param (str | None): Parametr funkcji, który dostaje listę [wartość grupy]
+            (np. "cities" dla plot_means).
+        prefix (str | None): Początek nazw plików (domyślnie nazwa funkcji).
+        **kwargs: Pozostałe argumenty funkcji rysującej.
+
+    Returns:
+        list[tuple]: Zadania (nazwa pliku, funkcja, argumenty, argumenty nazwane).
+    """
+    jobs = []
+    for value, group in data.groupby(by, sort=True):
+        job_kwargs = dict(kwargs)
+        if group_param is not None:
+            job_kwargs[group_param] = [value]
+        jobs.append((f"{prefix or plot}_{value}", plot, (group,), job_kwargs))
+    return jobs
+
+
+def export_figures(jobs, outdir, fmt="png", workers=None, dpi=100):
+    """
+    Rysuje wiele figur w procesach roboczych i zapisuje je prosto do plików PNG/SVG.
+
+    Procesy (także bieżący przy workers=1, na czas eksportu) używają backendu Agg,
+    funkcje rysujące są wywoływane z show=False, a każda figura jest zamykana
+    zaraz po zapisie, więc zużycie pamięci nie rośnie z liczbą figur.
+
+    Args:
+        jobs (list[tuple]): Zadania (nazwa pliku, funkcja z plots, argumenty, argumenty nazwane),
+            np. z group_jobs.
+        outdir (str): Katalog docelowy (tworzony, jeśli nie istnieje).
+        fmt (str): "png" albo "svg".
+        workers (int | None): Liczba procesów (domyślnie liczba rdzeni); 1 - bez procesów.
+        dpi (int): Rozdzielczość obrazów rastrowych.
+
+    Returns:
+        list[str]: Ścieżki zapisanych plików w kolejności zadań.
+    """
+    if fmt not in ("png", "svg"):
+        raise ValueError(f"Nieobsługiwany format: {fmt}")
+    os.makedirs(outdir, exist_ok=True)
+    workers = min(workers or os.cpu_count() or 1, max(len(jobs), 1))
+
+    if workers <= 1:
+        backend = matplotlib.get_backend()
+        _init_worker()
+        try:
+            return [_render(job, outdir, fmt, dpi) for job in jobs]
+        finally:
+            matplotlib.use(backend)
+    with concurrent.futures.ProcessPoolExecutor(workers, initializer=_init_worker) as pool:
+        futures = [pool.submit(_render, job, outdir, fmt, dpi) for job in jobs]
+        return [f.result() for f in futures]
\ No newline at end of file
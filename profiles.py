@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+
+from stats import to_matrix
+
+# nazwa kolumny grupującej dla każdego rodzaju profilu
+profile_groups = {"weekday": "Dzień tygodnia", "month": "Miesiąc"}
+
+
+def hourly_cube(df_pm25):
+    """
+    Układa dane godzinowe wszystkich stacji w tablicę (doba, godzina, stacja).
+
+    Pomiar oznaczony godziną końca okresu uśredniania (np. 01:00 albo 23:59:59
+    po korekcie midnight) trafia do godziny jego początku (0-23) w tej samej dobie,
+    zgodnie z przypisaniem do dni w calc_daily_means. Tablica obejmuje tylko
+    doby obecne w danych (bez lat, które nie zostały wczytane), a powtórzone
+    znaczniki czasu są uśredniane z pominięciem braków.
+
+    Args:
+        df_pm25 (pandas.DataFrame): Dane PM2.5 w formacie szerokim z MultiIndex.
+
+    Returns:
+        tuple: Tablica (doba, 24, stacja), doby obecne w danych (pandas.DatetimeIndex)
+            oraz kolumny stacji.
+    """
+    times, values, stations = to_matrix(df_pm25)
+    slot = times.round("h") - pd.Timedelta(hours=1)
+    days, day_idx = np.unique(slot.normalize(), return_inverse=True)
+    cell = day_idx.ravel() * 24 + slot.hour.to_numpy()
+
+    valid = ~np.isnan(values)
+    sums = np.zeros((len(days) * 24, len(stations)))
+    counts = np.zeros((len(days) * 24, len(stations)))
+    np.add.at(sums, cell, np.where(valid, values, 0.0))
+    np.add.at(counts, cell, valid)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cube = np.where(counts > 0, sums / counts, np.nan)
+    return cube.reshape(len(days), 24, len(stations)), pd.DatetimeIndex(days), stations
+
+
+def calc_profiles(df_pm25, kind="weekday", months=None):
+    """
+    Oblicza profile dobowe PM2.5 (godzina x dzień tygodnia albo godzina x miesiąc) dla każdej stacji.
+
+    Zamiast grupowania danych długich dane są przekształcane jednym reshape
+    do tablicy (doba, godzina, stacja), a średnie liczone są mnożeniem macierzy
+    przez macierz przynależności dób do grup z pominięciem braków danych.
+
+    Args:
+        df_pm25 (pandas.DataFrame): Dane PM2.5 w formacie szerokim z MultiIndex.
+        kind (str): "weekday" (dzień tygodnia, 0 = poniedziałek) albo "month" (miesiąc).
+        months (list[int] | None): Opcjonalne ograniczenie do wybranych miesięcy
+            (np. sezon grzewczy [1, 2, 3, 10, 11, 12]).
+
+    Returns:
+        pandas.DataFrame: Średnie PM2.5 i liczba pomiarów dla każdej stacji, grupy i godziny.
+    """
+    if kind not in profile_groups:
+        raise ValueError(f"Nieznany rodzaj profilu: {kind}")
+
+    cube, days, stations = hourly_cube(df_pm25)
+    if months is not None:
+        keep = days.month.isin(months)
+        cube, days = cube[keep], days[keep]
+
+    if kind == "weekday":
+        group, n_groups, labels = days.dayofweek.to_numpy(), 7, np.arange(7)
+    else:
+        group, n_groups, labels = days.month.to_numpy() - 1, 12, np.arange(1, 13)
+
+    n_days, _, n_stations = cube.shape
+    membership = np.zeros((n_days, n_groups))
+    membership[np.arange(n_days), group] = 1.0
+
+    valid = ~np.isnan(cube)
+    flat = np.where(valid, cube, 0.0).reshape(n_days, -1)
+    sums = (membership.T @ flat).reshape(n_groups, 24, n_stations)
+    counts = (membership.T @ valid.reshape(n_days, -1)).reshape(n_groups, 24, n_stations)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = sums / counts
+
+    out = pd.DataFrame({
+        "Miejscowość": np.tile(stations.get_level_values(0), n_groups * 24),
+        "Kod stacji": np.tile(stations.get_level_values(1), n_groups * 24),
+        profile_groups[kind]: np.repeat(labels, 24 * n_stations),
+        "Godzina": np.tile(np.repeat(np.arange(24), n_stations), n_groups),
+        "Mean PM25": means.ravel(),
+        "Liczba godzin": counts.ravel().astype(np.int64),
+    })
+    return out
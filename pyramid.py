@@ -0,0 +1,205 @@
+import numpy as np
+import pandas as pd
+
+from stats import to_matrix
+
+# poziomy piramidy od najdrobniejszego
+pyramid_levels = ["hour", "day", "week", "month"]
+
+
+def _bin_starts(times, level):
+    """
+    Zwraca początek przedziału (doby, tygodnia, miesiąca) dla każdego znacznika czasu.
+
+    Pomiar z 23:59:59 (po korekcie midnight) należy do doby, w której się kończy,
+    tak jak w calc_daily_means.
+
+    Args:
+        times (pandas.DatetimeIndex): Znaczniki czasu.
+        level (str): "day", "week" albo "month".
+
+    Returns:
+        pandas.DatetimeIndex: Początki przedziałów.
+    """
+    if level == "day":
+        return times.floor("D")
+    if level == "week":
+        return times.to_period("W").start_time
+    return times.to_period("M").start_time
+
+
+def _reduce(keys, total, count, low, high):
+    """
+    Łączy kolejne wiersze o tym samym kluczu (dane posortowane po czasie).
+
+    Suma i liczba pomiarów (zamiast średniej) pozwalają liczyć poziomy wyższe
+    z niższych bez ponownego przechodzenia po danych godzinowych.
+
+    Args:
+        keys (pandas.DatetimeIndex): Początki przedziałów dla wierszy.
+        total (numpy.ndarray): Sumy pomiarów (wiersz x stacja).
+        count (numpy.ndarray): Liczby pomiarów.
+        low (numpy.ndarray): Minima.
+        high (numpy.ndarray): Maksima.
+
+    Returns:
+        dict: Poziom piramidy z kluczami times, total, count, min, max.
+    """
+    change = np.ones(len(keys), dtype=bool)
+    change[1:] = keys[1:] != keys[:-1]
+    starts = np.flatnonzero(change)
+    if len(starts) == 0:
+        return {"times": keys[:0], "total": total[:0], "count": count[:0], "min": low[:0], "max": high[:0]}
+    with np.errstate(invalid="ignore"):
+        return {
+            "times": keys[starts],
+            "total": np.add.reduceat(total, starts, axis=0),
+            "count": np.add.reduceat(count, starts, axis=0),
+            "min": np.fmin.reduceat(low, starts, axis=0),
+            "max": np.fmax.reduceat(high, starts, axis=0),
+        }
+
+
+class Pyramid:
+    """
+    Wielorozdzielcza piramida danych godzinowych: godzina -> doba -> tydzień -> miesiąc.
+
+    Dla każdego poziomu i stacji przechowywane są minimum, średnia (jako suma
+    i liczba pomiarów) oraz maksimum, więc wykres dowolnego zakresu czasu
+    korzysta z gotowych agregatów o liczbie punktów dopasowanej do długości zakresu.
+
+    Args:
+        df_pm25 (pandas.DataFrame): Dane PM2.5 w formacie szerokim z MultiIndex.
+    """
+
+    def __init__(self, df_pm25):
+        times, values, stations = to_matrix(df_pm25)
+        order = np.argsort(times.to_numpy(), kind="stable")
+        times, values = times[order], values[order]
+
+        self.stations = stations
+        self.codes = pd.Index(stations.get_level_values(-1))
+        valid = ~np.isnan(values)
+        hour = {
+            "times": times,
+            "total": np.where(valid, values, 0.0),
+            "count": valid.astype(np.int64),
+            "min": values,
+            "max": values,
+        }
+        day = _reduce(_bin_starts(times, "day"), hour["total"], hour["count"], hour["min"], hour["max"])
+        self.levels = {"hour": hour, "day": day}
+        for level in ["week", "month"]:
+            self.levels[level] = _reduce(
+                _bin_starts(day["times"], level), day["total"], day["count"], day["min"], day["max"]
+            )
+
+    def level_for(self, start=None, end=None, max_points=2000):
+        """
+        Wybiera najdrobniejszy poziom, który w zakresie ma nie więcej niż max_points punktów.
+
+        Args:
+            start (str | pandas.Timestamp | None): Początek zakresu.
+            end (str | pandas.Timestamp | None): Koniec zakresu.
+            max_points (int): Maksymalna liczba punktów na serię.
+
+        Returns:
+            str: Nazwa poziomu ("hour", "day", "week" albo "month").
+        """
+        for level in pyramid_levels:
+            lo, hi = self._span(level, start, end)
+            if hi - lo <= max_points:
+                return level
+        return pyramid_levels[-1]
+
+    def _span(self, level, start, end):
+        """Zwraca zakres wierszy poziomu odpowiadający przedziałowi czasu."""
+        times = self.levels[level]["times"]
+        lo = 0 if start is None else times.searchsorted(_bin_start(pd.Timestamp(start), level))
+        hi = len(times) if end is None else times.searchsorted(pd.Timestamp(end), side="right")
+        return lo, hi
+
+    def series(self, station, start=None, end=None, max_points=2000, level=None):
+        """
+        Zwraca serię jednej stacji w rozdzielczości dopasowanej do zakresu czasu.
+
+        Args:
+            station (str): Kod stacji.
+            start (str | pandas.Timestamp | None): Początek zakresu.
+            end (str | pandas.Timestamp | None): Koniec zakresu.
+            max_points (int): Maksymalna liczba punktów (dla automatycznego wyboru poziomu).
+            level (str | None): Wymuszony poziom piramidy.
+
+        Returns:
+            tuple: Nazwa poziomu oraz DataFrame z kolumnami datetime, min, mean, max i count.
+        """
+        k = self.codes.get_loc(station)
+        level = level or self.level_for(start, end, max_points)
+        data = self.levels[level]
+        lo, hi = self._span(level, start, end)
+
+        count = data["count"][lo:hi, k]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(count > 0, data["total"][lo:hi, k] / count, np.nan)
+        out = pd.DataFrame({
+            "datetime": data["times"][lo:hi],
+            "min": data["min"][lo:hi, k],
+            "mean": mean,
+            "max": data["max"][lo:hi, k],
+            "count": count,
+        })
+        return level, out
+
+
+def _bin_start(ts, level):
+    """Zwraca początek przedziału poziomu, do którego należy znacznik czasu."""
+    if level == "hour":
+        return ts
+    return _bin_starts(pd.DatetimeIndex([ts]), level)[0]
+
+
+def lttb(x, y, n_out):
+    """
+    Wybiera n_out punktów serii metodą Largest-Triangle-Three-Buckets.
+
+    Punkty są dzielone na kubełki, a z każdego wybierany jest punkt tworzący
+    największy trójkąt z punktem wybranym w poprzednim kubełku i średnią
+    następnego, dzięki czemu zachowane są szczyty i kształt przebiegu.
+    Braki danych są pomijane.
+
+    Args:
+        x (array-like): Współrzędne x (liczby lub znaczniki czasu), rosnące.
+        y (array-like): Wartości.
+        n_out (int): Liczba punktów wynikowych.
+
+    Returns:
+        numpy.ndarray: Indeksy wybranych punktów w tablicach wejściowych.
+    """
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        x = x.astype("datetime64[ns]").astype(np.int64)
+    x = x.astype(float)
+    y = np.asarray(y, dtype=float)
+
+    index = np.flatnonzero(~np.isnan(y))
+    x, y = x[index], y[index]
+    n = len(index)
+    if n_out >= n or n_out < 3:
+        return index
+
+    # pierwszy i ostatni punkt zawsze, pozostałe po jednym z n_out - 2 kubełków
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = np.empty(n_out, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            nxt = slice(edges[i + 1], edges[i + 2])
+            avg_x, avg_y = x[nxt].mean(), y[nxt].mean()
+        else:
+            avg_x, avg_y = x[n - 1], y[n - 1]
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return index[selected]
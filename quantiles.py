@@ -0,0 +1,275 @@
+import numpy as np
+import pandas as pd
+
+from stats import check_single_pollutant
+
+# kolumna z dziennymi średnimi zwracana przez calc_daily_means
+value_col = "Daily mean PM25"
+
+
+class TDigest:
+    """
+    Szkic kwantylowy (merging t-digest), który można łączyć między rocznikami i partiami danych.
+
+    Centroidy są przechowywane w tablicach NumPy, a kompresja odbywa się wektorowo:
+    każdy centroid trafia do kubełka wyznaczonego przez funkcję skali k1,
+    dzięki czemu ogony rozkładu (np. P95, P90.4) są odwzorowane dokładniej niż środek.
+
+    Args:
+        compression (float): Parametr dokładności (większy = więcej centroidów).
+    """
+
+    def __init__(self, compression=100):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = np.inf
+        self.max = -np.inf
+
+    @property
+    def count(self):
+        """Liczba wartości uwzględnionych w szkicu."""
+        return float(self.weights.sum())
+
+    def update(self, values):
+        """
+        Dodaje wartości do szkicu (wartości NaN są pomijane).
+
+        Args:
+            values (array-like): Nowe obserwacje.
+
+        Returns:
+            TDigest: Ten sam obiekt (pozwala łączyć wywołania).
+        """
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return self
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self._compress(
+            np.concatenate([self.means, values]),
+            np.concatenate([self.weights, np.ones(values.size)]),
+        )
+        return self
+
+    def merge(self, other):
+        """
+        Łączy dwa szkice bez ponownego przeglądania danych źródłowych.
+
+        Args:
+            other (TDigest): Drugi szkic.
+
+        Returns:
+            TDigest: Nowy szkic opisujący sumę obu zbiorów danych.
+        """
+        out = TDigest(max(self.compression, other.compression))
+        out.min = min(self.min, other.min)
+        out.max = max(self.max, other.max)
+        out._compress(
+            np.concatenate([self.means, other.means]),
+            np.concatenate([self.weights, other.weights]),
+        )
+        return out
+
+    def _compress(self, means, weights):
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+        total = weights.sum()
+        if means.size <= self.compression:
+            self.means, self.weights = means, weights
+            return
+
+        # kubełki wyznaczone przez funkcję skali k1 liczoną w środku każdego centroidu
+        q_mid = (np.cumsum(weights) - weights / 2) / total
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * q_mid - 1)
+        bucket = np.floor(k - k[0]).astype(np.int64)
+        _, bucket = np.unique(bucket, return_inverse=True)
+
+        new_weights = np.bincount(bucket, weights=weights)
+        self.means = np.bincount(bucket, weights=means * weights) / new_weights
+        self.weights = new_weights
+
+    def quantile(self, q):
+        """
+        Szacuje kwantyle rozkładu.
+
+        Args:
+            q (float | array-like): Rzędy kwantyli z przedziału [0, 1].
+
+        Returns:
+            numpy.ndarray | float: Oszacowane kwantyle.
+        """
+        q = np.asarray(q, dtype=float)
+        if self.weights.size == 0:
+            return np.full(q.shape, np.nan) if q.ndim else np.nan
+        total = self.weights.sum()
+        centers = (np.cumsum(self.weights) - self.weights / 2) / total
+        xp = np.concatenate([[0.0], centers, [1.0]])
+        fp = np.concatenate([[self.min], self.means, [self.max]])
+        return np.interp(q, xp, fp)
+
+    def to_dict(self):
+        """
+        Zapisuje szkic do słownika (np. do zapisu w JSON dla danego rocznika).
+
+        Returns:
+            dict: Parametry i centroidy szkicu.
+        """
+        return {
+            "compression": self.compression,
+            "min": float(self.min),
+            "max": float(self.max),
+            "means": self.means.tolist(),
+            "weights": self.weights.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Odtwarza szkic zapisany przez to_dict.
+
+        Args:
+            data (dict): Słownik ze szkicem.
+
+        Returns:
+            TDigest: Odtworzony szkic.
+        """
+        out = cls(data["compression"])
+        out.min, out.max = data["min"], data["max"]
+        out.means = np.asarray(data["means"], dtype=float)
+        out.weights = np.asarray(data["weights"], dtype=float)
+        return out
+
+
+def _group_keys(daily, by, wojew_dict):
+    """
+    Przygotowuje dane i klucze grupowania dla wybranego poziomu agregacji.
+
+    Args:
+        daily (pandas.DataFrame): Dzienne średnie PM2.5.
+        by (str): "Kod stacji", "Miejscowość" albo "Województwo".
+        wojew_dict (dict | None): Słownik kodów województw (Kod: Nazwa).
+
+    Returns:
+        tuple: DataFrame z danymi oraz lista kluczy grupowania.
+
+    Raises:
+        ValueError: Gdy dane zawierają kilka wskaźników albo poziom agregacji jest nieznany.
+    """
+    check_single_pollutant(daily)
+    df = daily.copy()
+    if by == "Kod stacji":
+        return df, ["Rok", "Miejscowość", "Kod stacji"]
+    if by == "Miejscowość":
+        return df, ["Rok", "Miejscowość"]
+    if by == "Województwo":
+        if wojew_dict is None:
+            raise ValueError("Grupowanie po województwach wymaga słownika wojew_dict.")
+        df["Województwo"] = df["Kod stacji"].str[:2].map(wojew_dict)
+        return df, ["Rok", "Województwo"]
+    raise ValueError(f"Nieznany poziom agregacji: {by}")
+
+
+def _quantile_columns(q):
+    return [f"P{qi * 100:g}" for qi in q]
+
+
+def build_sketches(daily, by="Kod stacji", wojew_dict=None, compression=100):
+    """
+    Buduje szkice t-digest dziennych średnich dla każdej grupy.
+
+    Szkice z różnych roczników lub partii danych można później połączyć
+    funkcją merge_sketches bez ponownego czytania danych godzinowych.
+
+    Args:
+        daily (pandas.DataFrame): Dzienne średnie PM2.5 (wynik calc_daily_means).
+        by (str): "Kod stacji", "Miejscowość" albo "Województwo".
+        wojew_dict (dict | None): Słownik kodów województw, wymagany dla by="Województwo".
+        compression (float): Parametr dokładności szkicu.
+
+    Returns:
+        dict: Słownik {krotka kluczy grupy: TDigest}; pusty dla pustych danych.
+    """
+    df, keys = _group_keys(daily, by, wojew_dict)
+    if df.empty:
+        return {}
+    df = df.sort_values(keys, kind="stable")
+    values = pd.to_numeric(df[value_col], errors="coerce").to_numpy(dtype=float)
+
+    # granice grup w posortowanych danych - jedno przejście zamiast filtrowania per grupa
+    codes = df.groupby(keys, sort=False).ngroup().to_numpy()
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    group_keys = df[keys].iloc[starts].itertuples(index=False, name=None)
+
+    return {
+        key: TDigest(compression).update(chunk)
+        for key, chunk in zip(group_keys, np.split(values, starts[1:]))
+    }
+
+
+def merge_sketches(*sketch_sets):
+    """
+    Łączy zestawy szkiców (np. z kolejnych lat lub partii) po kluczach grup.
+
+    Args:
+        *sketch_sets (dict): Słowniki zwrócone przez build_sketches.
+
+    Returns:
+        dict: Połączone szkice.
+    """
+    out = {}
+    for sketches in sketch_sets:
+        for key, digest in sketches.items():
+            out[key] = out[key].merge(digest) if key in out else digest
+    return out
+
+
+def sketch_quantiles(sketches, q, key_names):
+    """
+    Odczytuje kwantyle z zestawu szkiców.
+
+    Args:
+        sketches (dict): Słownik {krotka kluczy: TDigest}.
+        q (list[float]): Rzędy kwantyli, np. [0.5, 0.904, 0.95].
+        key_names (list[str]): Nazwy kolumn odpowiadające elementom kluczy.
+
+    Returns:
+        pandas.DataFrame: Kwantyle dla każdej grupy.
+    """
+    rows = [list(key) + list(digest.quantile(q)) for key, digest in sketches.items()]
+    return pd.DataFrame(rows, columns=list(key_names) + _quantile_columns(q))
+
+
+def calc_quantiles(daily, q=(0.5, 0.904, 0.95), by="Kod stacji", wojew_dict=None,
+                   method="exact", compression=100):
+    """
+    Oblicza roczne kwantyle dziennych średnich PM2.5 dla stacji, miast lub województw.
+
+    Dla miast i województw kwantyle liczone są z połączonych dziennych średnich
+    wszystkich stacji w grupie.
+
+    Args:
+        daily (pandas.DataFrame): Dzienne średnie PM2.5 (wynik calc_daily_means).
+        q (list[float]): Rzędy kwantyli, np. 0.904 dla percentyla 90.4 z raportowania UE.
+        by (str): "Kod stacji", "Miejscowość" albo "Województwo".
+        wojew_dict (dict | None): Słownik kodów województw, wymagany dla by="Województwo".
+        method (str): "exact" (sortowanie) albo "sketch" (t-digest).
+        compression (float): Parametr dokładności szkicu dla method="sketch".
+
+    Returns:
+        pandas.DataFrame: Kwantyle w kolumnach P50, P90.4, P95 itd. dla każdej grupy i roku.
+    """
+    q = list(q)
+    if method == "sketch":
+        _, keys = _group_keys(daily.head(0), by, wojew_dict)
+        sketches = build_sketches(daily, by, wojew_dict, compression)
+        return sketch_quantiles(sketches, q, keys)
+    if method != "exact":
+        raise ValueError(f"Nieznana metoda: {method}")
+
+    df, keys = _group_keys(daily, by, wojew_dict)
+    df[value_col] = pd.to_numeric(df[value_col], errors="coerce")
+    out = df.groupby(keys)[value_col].quantile(q).unstack()
+    out.columns = _quantile_columns(q)
+    return out.reset_index()
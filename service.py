@@ -0,0 +1,283 @@
+import collections
+import concurrent.futures
+import contextlib
+import http.server
+import json
+import threading
+import urllib.parse
+
+import pandas as pd
+
+import stats
+
+# liczba odpowiedzi przechowywanych w pamięci podręcznej
+cache_size = 256
+
+
+class Dataset:
+    """
+    Połączone dane PM2.5 i tabele pośrednie wczytane raz i trzymane w pamięci.
+
+    Dane długie, średnie dzienne i miesięczne (z liczbą godzin i pokryciem) są
+    liczone przy tworzeniu obiektu; zapytania filtrują gotowe tabele, a gotowe
+    odpowiedzi trafiają do pamięci podręcznej LRU (wspólnej dla wątków serwera).
+    Równoległe zapytania o to samo czekają na jedno obliczenie odpowiedzi.
+
+    Args:
+        df_pm25 (pandas.DataFrame): Dane PM2.5 w formacie szerokim (wynik make_pm25_data).
+        wojew_dict (dict | None): Słownik kodów województw (Kod: Nazwa), wymagany dla /wojewodztwa.
+    """
+
+    def __init__(self, df_pm25, wojew_dict=None):
+        self.wojew_dict = wojew_dict
+        self.long = stats.convert_df(df_pm25)
+        self.monthly = stats.calc_monthly_means(self.long, with_coverage=True)
+        self.daily = stats.calc_daily_means(self.long, with_coverage=True)
+        self.years = sorted(self.daily["Rok"].unique().tolist())
+        self._cache = collections.OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_csv(cls, path, wojew_dict=None):
+        """
+        Wczytuje dane zapisane przez make_pm25_data.
+
+        Args:
+            path (str): Plik CSV z danymi PM2.5.
+            wojew_dict (dict | None): Słownik kodów województw.
+
+        Returns:
+            Dataset: Dane gotowe do obsługi zapytań.
+        """
+        import get_data
+
+        return cls(get_data.read_pm25_csv(path), wojew_dict)
+
+    def monthly_means(self, year=None, city=None, station=None, min_coverage=None):
+        """Średnie miesięczne (calc_monthly_means) z opcjonalnym filtrem pokrycia."""
+        df = _filter(self.monthly, year=year, city=city, station=station)
+        if min_coverage is not None:
+            df = df.copy()
+            df.loc[df["Pokrycie"] < min_coverage, "Mean PM25"] = float("nan")
+        return df
+
+    def daily_means(self, year=None, city=None, station=None, start=None, end=None):
+        """Średnie dzienne (calc_daily_means) dla wybranych stacji i zakresu dat."""
+        df = _filter(self.daily, year=year, city=city, station=station)
+        if start is not None:
+            df = df[df["Data"] >= pd.Timestamp(start).date()]
+        if end is not None:
+            df = df[df["Data"] <= pd.Timestamp(end).date()]
+        return df
+
+    def overnorm(self, threshold=15.0, min_coverage=None, year=None):
+        """Liczba dni z przekroczeniem normy dla stacji (count_overnorm_days)."""
+        daily = _filter(self.daily, year=year)
+        return stats.count_overnorm_days(daily, threshold, min_coverage=min_coverage)
+
+    def ranking(self, year=None, threshold=15.0, n=3, min_coverage=None):
+        """Stacje z największą i najmniejszą liczbą dni z przekroczeniem (top_bottom_stations)."""
+        year = year or self.years[-1]
+        over = self.overnorm(threshold, min_coverage, year=year)
+        return stats.top_bottom_stations(over, year=year, n=n)
+
+    def wojewodztwa(self, year=None, threshold=15.0):
+        """Liczba dni z przekroczeniem normy w województwach (wojew_over_treshold)."""
+        if self.wojew_dict is None:
+            raise ValueError("Zestawienie województw wymaga słownika wojew_dict.")
+        year = year or self.years[-1]
+        long = self.long[self.long["datetime"].dt.year == year].copy()
+        counts = stats.wojew_over_treshold(long, self.wojew_dict, threshold)
+        return counts.rename("Liczba dni").reset_index()
+
+    def cached(self, key, compute):
+        """
+        Zwraca odpowiedź z pamięci podręcznej albo oblicza ją i zapamiętuje.
+
+        Gdy ta sama odpowiedź jest właśnie liczona w innym wątku, czeka na jej wynik.
+
+        Args:
+            key (tuple): Klucz zapytania.
+            compute (callable): Funkcja bez argumentów zwracająca odpowiedź.
+
+        Returns:
+            object: Odpowiedź.
+        """
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+            pending = self._pending.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._pending[key] = concurrent.futures.Future()
+        if not owner:
+            return pending.result()
+
+        try:
+            value = compute()
+        except Exception as e:
+            with self._lock:
+                del self._pending[key]
+            pending.set_exception(e)
+            raise
+        with self._lock:
+            del self._pending[key]
+            self._cache[key] = value
+            while len(self._cache) > cache_size:
+                self._cache.popitem(last=False)
+        pending.set_result(value)
+        return value
+
+
+def _filter(df, year=None, city=None, station=None):
+    """
+    Filtruje tabelę po roku, miejscowości i stacji.
+
+    Args:
+        df (pandas.DataFrame): Tabela z kolumnami Rok, Miejscowość, Kod stacji.
+        year (int | None): Rok.
+        city (str | None): Miejscowość.
+        station (str | None): Kod stacji.
+
+    Returns:
+        pandas.DataFrame: Wiersze spełniające wszystkie podane warunki.
+    """
+    mask = pd.Series(True, index=df.index)
+    if year is not None:
+        mask &= df["Rok"] == year
+    if city is not None:
+        mask &= df["Miejscowość"] == city
+    if station is not None:
+        mask &= df["Kod stacji"] == station
+    return df[mask]
+
+
+# punkty końcowe: nazwa metody Dataset i typy parametrów zapytania
+endpoints = {
+    "/monthly": ("monthly_means", {"year": int, "city": str, "station": str, "min_coverage": float}),
+    "/daily": ("daily_means", {"year": int, "city": str, "station": str, "start": str, "end": str}),
+    "/overnorm": ("overnorm", {"threshold": float, "min_coverage": float, "year": int}),
+    "/ranking": ("ranking", {"year": int, "threshold": float, "n": int, "min_coverage": float}),
+    "/wojewodztwa": ("wojewodztwa", {"year": int, "threshold": float}),
+}
+
+
+def _parse_params(query, types):
+    """
+    Zamienia parametry zapytania URL na argumenty metody Dataset.
+
+    Args:
+        query (str): Część zapytania adresu URL.
+        types (dict): Typy dozwolonych parametrów.
+
+    Returns:
+        tuple: Argumenty (dict) i format odpowiedzi ("json" albo "csv").
+
+    Raises:
+        ValueError: Gdy parametr jest nieznany lub ma złą wartość.
+    """
+    params = dict(urllib.parse.parse_qsl(query))
+    fmt = params.pop("format", "json")
+    if fmt not in ("json", "csv"):
+        raise ValueError(f"Nieznany format: {fmt}")
+    unknown = set(params) - set(types)
+    if unknown:
+        raise ValueError(f"Nieznane parametry: {sorted(unknown)}")
+    return {k: types[k](v) for k, v in params.items()}, fmt
+
+
+def _encode(df, fmt):
+    """
+    Koduje tabelę jako JSON (lista rekordów) albo CSV.
+
+    Args:
+        df (pandas.DataFrame): Tabela wynikowa.
+        fmt (str): "json" albo "csv".
+
+    Returns:
+        tuple: Treść odpowiedzi (bytes) i typ zawartości.
+    """
+    if fmt == "csv":
+        return df.to_csv(index=False).encode("utf-8"), "text/csv; charset=utf-8"
+    body = df.to_json(orient="records", date_format="iso", force_ascii=False)
+    return body.encode("utf-8"), "application/json; charset=utf-8"
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    dataset = None
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        if url.path == "/health":
+            return self._send(200, json.dumps({"status": "ok", "years": self.dataset.years}).encode(),
+                              "application/json; charset=utf-8")
+        if url.path not in endpoints:
+            return self._error(404, f"Nieznany adres: {url.path}")
+
+        method, types = endpoints[url.path]
+        try:
+            params, fmt = _parse_params(url.query, types)
+            key = (url.path, fmt, tuple(sorted(params.items())))
+            body, content_type = self.dataset.cached(
+                key, lambda: _encode(getattr(self.dataset, method)(**params), fmt)
+            )
+        except ValueError as e:
+            return self._error(400, str(e))
+        except Exception as e:
+            return self._error(500, f"{type(e).__name__}: {e}")
+        self._send(200, body, content_type)
+
+    def _error(self, status, message):
+        body = json.dumps({"error": message}, ensure_ascii=False).encode("utf-8")
+        self._send(status, body, "application/json; charset=utf-8")
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(dataset, host="127.0.0.1", port=8000):
+    """
+    Tworzy wielowątkowy serwer HTTP obsługujący zapytania o dane PM2.5.
+
+    Args:
+        dataset (Dataset): Dane trzymane w pamięci.
+        host (str): Adres nasłuchu.
+        port (int): Port (0 - dowolny wolny).
+
+    Returns:
+        http.server.ThreadingHTTPServer: Serwer (uruchamiany przez serve_forever).
+    """
+    handler = type("Handler", (_Handler,), {"dataset": dataset})
+    return http.server.ThreadingHTTPServer((host, port), handler)
+
+
+@contextlib.contextmanager
+def running(dataset, host="127.0.0.1", port=0):
+    """
+    Uruchamia serwer w wątku tła na czas bloku (np. w testach lub notatniku).
+
+    Args:
+        dataset (Dataset): Dane trzymane w pamięci.
+        host (str): Adres nasłuchu.
+        port (int): Port (0 - dowolny wolny).
+
+    Yields:
+        str: Adres bazowy serwera, np. "http://127.0.0.1:53211".
+    """
+    server = make_server(dataset, host, port)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://{host}:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
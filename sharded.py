@@ -0,0 +1,373 @@
+import contextlib
+import json
+import os
+import socket
+import threading
+import time
+
+import pandas as pd
+
+import get_data
+from instrument import stage
+
+# czas dzierżawy zadania [s]; pracownik odnawia ją co lease_seconds / 3
+lease_seconds = 15 * 60
+# liczba prób zadania, po której jest oznaczane jako nieudane
+max_attempts = 3
+
+
+def _write_json(path, data):
+    """Zapisuje JSON atomowo (plik tymczasowy i os.replace)."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+
+def _read_json(path):
+    """Wczytuje plik JSON."""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+@contextlib.contextmanager
+def _lock_file(root):
+    """Blokuje plik manifest.lock katalogu budowy (fcntl) na czas bloku."""
+    import fcntl
+
+    with open(os.path.join(root, "manifest.lock"), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def create_manifest(root, years, gios_url_ids, gios_files, clean_info=None, join="inner", archive_url=None):
+    """
+    Tworzy na wspólnym dysku manifest budowy podzielonej na zadania (rok, wskaźnik).
+
+    Manifest jest tworzony pod blokadą pliku manifest.lock, a wywołanie dla
+    istniejącego manifestu nic nie zmienia, więc może je wykonać każdy węzeł
+    przed uruchomieniem pracowników.
+
+    Args:
+        root (str): Wspólny katalog budowy.
+        years (list[int]): Lista analizowanych lat.
+        gios_url_ids (dict): Identyfikatory archiwów i metadanych GIOŚ.
+        gios_files (dict): Pliki dla lat: nazwa pliku PM2.5 (jak gios_pm25_file)
+            albo słownik {wskaźnik: plik} (jak w make_multi_data).
+        clean_info (dict | None): Parametry czyszczenia (jak w make_multi_data); bez wpisu
+            układ arkusza rozpoznaje pracownik (sniff_layout).
+        join (str): Sposób łączenia lat ("inner" albo "outer", zob. make_pm25_data).
+        archive_url (str | None): Adres archiwów (domyślnie get_data.gios_archive_url).
+
+    Returns:
+        str: Ścieżka pliku manifestu.
+
+    Raises:
+        ValueError: Gdy join ma nieznaną wartość.
+    """
+    if join not in ("inner", "outer"):
+        raise ValueError(f"Nieznany sposób łączenia lat: {join}")
+    path = os.path.join(root, "manifest.json")
+    os.makedirs(os.path.join(root, "parts"), exist_ok=True)
+    with _lock_file(root):
+        if not os.path.exists(path):
+            _write_manifest(root, path, years, gios_url_ids, gios_files, clean_info, join, archive_url)
+    return path
+
+
+def _write_manifest(root, path, years, gios_url_ids, gios_files, clean_info, join, archive_url):
+    """Zapisuje stan zadań i manifest (manifest na końcu, gdy stan jest już gotowy)."""
+    clean_info = clean_info or {}
+    multi = any(isinstance(gios_files[y], dict) for y in years)
+    jobs = []
+    for y in years:
+        files = gios_files[y] if isinstance(gios_files[y], dict) else {"PM25": gios_files[y]}
+        for p, filename in files.items():
+            info = clean_info.get(y)
+            if isinstance(info, dict) and p in info:
+                info = info[p]
+            jobs.append({
+                "id": f"{p}_{y}", "year": y, "pollutant": p, "gios_id": gios_url_ids[y],
+                "file": filename, "clean_info": None if info == "auto" else info,
+            })
+
+    _write_json(os.path.join(root, "state.json"), {
+        job["id"]: {"status": "pending", "worker": None, "expires": None, "attempts": 0, "error": None}
+        for job in jobs
+    })
+    _write_json(path, {
+        "years": list(years), "meta_id": gios_url_ids["meta"], "multi": multi, "join": join,
+        "archive_url": archive_url or get_data.gios_archive_url, "jobs": jobs,
+    })
+
+
+class Manifest:
+    """
+    Manifest zadań na wspólnym dysku z dzierżawą zadań chronioną blokadą pliku.
+
+    Stan zadań (state.json) jest czytany i zapisywany tylko pod blokadą fcntl
+    pliku manifest.lock, więc pracownicy na różnych węzłach nie przejmą tego
+    samego zadania. Zadanie przejęte przez pracownika, który przestał odnawiać
+    dzierżawę (np. awaria węzła), wraca do puli po jej wygaśnięciu.
+
+    Args:
+        root (str): Wspólny katalog budowy (z create_manifest).
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.config = _read_json(os.path.join(root, "manifest.json"))
+        self.jobs = {job["id"]: job for job in self.config["jobs"]}
+
+    def part_path(self, job_id):
+        """Zwraca ścieżkę wyniku częściowego zadania."""
+        return os.path.join(self.root, "parts", f"{job_id}.pkl")
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """Blokuje stan zadań na czas bloku i zapisuje jego zmiany."""
+        with _lock_file(self.root):
+            path = os.path.join(self.root, "state.json")
+            state = _read_json(path)
+            before = json.dumps(state, sort_keys=True)
+            yield state
+            if json.dumps(state, sort_keys=True) != before:
+                _write_json(path, state)
+
+    def claim(self, worker):
+        """
+        Przejmuje pierwsze wolne zadanie (oczekujące albo z wygasłą dzierżawą).
+
+        Zadanie z wygasłą dzierżawą po max_attempts próbach (np. pracownik ginie
+        przy każdej próbie z braku pamięci) jest oznaczane jako nieudane.
+
+        Args:
+            worker (str): Identyfikator pracownika.
+
+        Returns:
+            dict | None: Zadanie z manifestu albo None, gdy nie ma wolnych zadań.
+        """
+        now = time.time()
+        with self._locked() as state:
+            for job_id, job in state.items():
+                expired = job["status"] == "running" and job["expires"] < now
+                if expired and job["attempts"] >= max_attempts:
+                    job.update(status="failed", expires=None, error=f"Wygasła dzierżawa pracownika {job['worker']}")
+                elif job["status"] == "pending" or expired:
+                    job.update(status="running", worker=worker, expires=now + lease_seconds,
+                               attempts=job["attempts"] + 1)
+                    return self.jobs[job_id]
+        return None
+
+    def renew(self, job_id, worker):
+        """
+        Przedłuża dzierżawę zadania.
+
+        Args:
+            job_id (str): Identyfikator zadania.
+            worker (str): Identyfikator pracownika.
+
+        Returns:
+            bool: False, gdy zadanie przejął już inny pracownik.
+        """
+        with self._locked() as state:
+            job = state[job_id]
+            if job["status"] != "running" or job["worker"] != worker:
+                return False
+            job["expires"] = time.time() + lease_seconds
+            return True
+
+    def complete(self, job_id, worker):
+        """
+        Oznacza zadanie jako wykonane (wynik częściowy jest już zapisany).
+
+        Args:
+            job_id (str): Identyfikator zadania.
+            worker (str): Identyfikator pracownika.
+
+        Returns:
+            bool: False, gdy zadanie przejął już inny pracownik.
+        """
+        with self._locked() as state:
+            job = state[job_id]
+            if job["status"] != "running" or job["worker"] != worker:
+                return False
+            job.update(status="done", expires=None, error=None)
+            return True
+
+    def fail(self, job_id, worker, error):
+        """
+        Zwalnia zadanie po błędzie; po max_attempts próbach oznacza je jako nieudane.
+
+        Args:
+            job_id (str): Identyfikator zadania.
+            worker (str): Identyfikator pracownika.
+            error (str): Opis błędu.
+        """
+        with self._locked() as state:
+            job = state[job_id]
+            if job["worker"] != worker or job["status"] != "running":
+                return
+            status = "failed" if job["attempts"] >= max_attempts else "pending"
+            job.update(status=status, expires=None, error=error)
+
+    def status(self):
+        """
+        Zwraca stan zadań.
+
+        Returns:
+            pandas.DataFrame: Kolumny Zadanie, Rok, Wskaźnik, Stan, Pracownik, Próby, Błąd.
+        """
+        with self._locked() as state:
+            rows = [
+                {"Zadanie": job_id, "Rok": self.jobs[job_id]["year"], "Wskaźnik": self.jobs[job_id]["pollutant"],
+                 "Stan": job["status"], "Pracownik": job["worker"], "Próby": job["attempts"], "Błąd": job["error"]}
+                for job_id, job in state.items()
+            ]
+        return pd.DataFrame(rows)
+
+
+def run_job(manifest, job):
+    """
+    Wykonuje zadanie: pobiera arkusz, czyści go (clean_pm25, midnight) i zapisuje wynik częściowy.
+
+    Aktualizacja kodów stacji, łączenie lat i add_city wykonuje merge.
+
+    Args:
+        manifest (Manifest): Manifest budowy.
+        job (dict): Zadanie z manifestu.
+
+    Returns:
+        str: Ścieżka wyniku częściowego.
+    """
+    fields = {"year": job["year"], "pollutant": job["pollutant"]}
+    url = get_data.gios_archive_url
+    get_data.gios_archive_url = manifest.config["archive_url"]
+    try:
+        if job["clean_info"] is None:
+            df, info = get_data.download_gios_archive(job["year"], job["gios_id"], job["file"], layout=True)
+        else:
+            df, info = get_data.download_gios_archive(job["year"], job["gios_id"], job["file"]), job["clean_info"]
+    finally:
+        get_data.gios_archive_url = url
+    df = get_data._clean_year(df, info, manifest.config["years"], **fields)
+
+    path = manifest.part_path(job["id"])
+    with stage("write_part", **fields) as st:
+        tmp = f"{path}.{os.getpid()}.tmp"
+        df.to_pickle(tmp)
+        os.replace(tmp, path)
+        st.set_result(df)
+    return path
+
+
+def _heartbeat(manifest, job_id, worker, stop):
+    """Odnawia dzierżawę zadania do ustawienia stop."""
+    while not stop.wait(lease_seconds / 3):
+        if not manifest.renew(job_id, worker):
+            return
+
+
+def work(root, worker=None, wait=True, poll=5.0):
+    """
+    Wykonuje kolejne zadania z manifestu, dopóki są wolne.
+
+    Pracowników można uruchomić na dowolnej liczbie węzłów ze wspólnym
+    katalogiem root. Z wait=True pracownik czeka na zakończenie zadań innych
+    pracowników, aby przejąć je, gdy ich dzierżawa wygaśnie.
+
+    Args:
+        root (str): Wspólny katalog budowy.
+        worker (str | None): Identyfikator pracownika (domyślnie host:pid).
+        wait (bool): Czy czekać, aż wszystkie zadania zostaną zakończone.
+        poll (float): Odstęp sprawdzania stanu przy czekaniu [s].
+
+    Returns:
+        list[str]: Identyfikatory zadań wykonanych przez tego pracownika.
+    """
+    manifest = Manifest(root)
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    done = []
+    while True:
+        job = manifest.claim(worker)
+        if job is None:
+            running = (manifest.status()["Stan"] == "running").any()
+            if not (wait and running):
+                return done
+            time.sleep(poll)
+            continue
+
+        stop = threading.Event()
+        beat = threading.Thread(target=_heartbeat, args=(manifest, job["id"], worker, stop), daemon=True)
+        beat.start()
+        try:
+            run_job(manifest, job)
+        except Exception as e:
+            manifest.fail(job["id"], worker, f"{type(e).__name__}: {e}")
+        else:
+            if manifest.complete(job["id"], worker):
+                done.append(job["id"])
+        finally:
+            stop.set()
+            beat.join()
+
+
+def merge(root, outfile):
+    """
+    Łączy wyniki częściowe w zbiór taki jak z make_pm25_data (lub make_multi_data).
+
+    Kody stacji są aktualizowane według metadanych, lata każdego wskaźnika
+    łączone sposobem join z manifestu, a kolumny opisywane miejscowością (add_city).
+
+    Args:
+        root (str): Wspólny katalog budowy.
+        outfile (str): Nazwa pliku wyjściowego CSV.
+
+    Returns:
+        tuple: DataFrame z danymi oraz DataFrame z metadanymi.
+
+    Raises:
+        RuntimeError: Gdy nie wszystkie zadania są wykonane.
+    """
+    manifest = Manifest(root)
+    status = manifest.status()
+    unfinished = status[status["Stan"] != "done"]
+    if len(unfinished):
+        raise RuntimeError(f"Niewykonane zadania: {', '.join(unfinished['Zadanie'])}")
+
+    config = manifest.config
+    with stage("merge_shards", years=config["years"]) as total:
+        url = get_data.gios_archive_url
+        get_data.gios_archive_url = config["archive_url"]
+        try:
+            meta = get_data.download_gios_meta(config["meta_id"])
+        finally:
+            get_data.gios_archive_url = url
+
+        pollutants = list(dict.fromkeys(job["pollutant"] for job in config["jobs"]))
+        frames = {}
+        for p in pollutants:
+            parts = []
+            for job in config["jobs"]:
+                if job["pollutant"] == p:
+                    with stage("update_stations", year=job["year"], pollutant=p):
+                        parts.append(get_data.update_stations(pd.read_pickle(manifest.part_path(job["id"])), meta))
+            with stage("concat", join=config["join"], pollutant=p):
+                df = get_data._concat_years(parts, config["join"])
+            with stage("add_city", pollutant=p):
+                frames[p] = get_data.add_city(df, meta)
+
+        if config["multi"]:
+            with stage("merge_pollutants"):
+                df_out = get_data._merge_pollutants(frames)
+        else:
+            df_out = frames[pollutants[0]]
+
+        with stage("write_csv") as st:
+            df_out.to_csv(outfile, index=None)
+            st.set_result(df_out)
+        total.set_result(df_out)
+    return df_out, meta
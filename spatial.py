@@ -0,0 +1,225 @@
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from stats import check_single_pollutant
+
+# promień Ziemi w km
+earth_radius = 6371.0
+
+# kolumny współrzędnych w metadanych GIOŚ
+meta_lat_col = "WGS84 φ N"
+meta_lon_col = "WGS84 λ E"
+
+
+def _unit_vectors(lat, lon):
+    """
+    Zamienia współrzędne geograficzne na wektory jednostkowe w 3D.
+
+    Odległość euklidesowa (cięciwa) między wektorami jest monotoniczna względem
+    odległości po powierzchni Ziemi, więc drzewo KD na wektorach daje poprawnych sąsiadów.
+
+    Args:
+        lat (array-like): Szerokości geograficzne w stopniach.
+        lon (array-like): Długości geograficzne w stopniach.
+
+    Returns:
+        numpy.ndarray: Tablica (n, 3).
+    """
+    lat = np.radians(np.asarray(lat, dtype=float))
+    lon = np.radians(np.asarray(lon, dtype=float))
+    return np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+
+
+def station_coords(meta, lat_col=meta_lat_col, lon_col=meta_lon_col):
+    """
+    Wybiera współrzędne stacji z metadanych GIOŚ.
+
+    Args:
+        meta (pandas.DataFrame): Metadane GIOŚ (wynik download_gios_meta).
+        lat_col (str): Kolumna z szerokością geograficzną.
+        lon_col (str): Kolumna z długością geograficzną.
+
+    Returns:
+        pandas.DataFrame: Kolumny lat i lon indeksowane kodem stacji.
+    """
+    coords = meta[["Kod stacji", lat_col, lon_col]].dropna(subset=["Kod stacji"])
+    coords = coords.drop_duplicates(subset=["Kod stacji"]).set_index("Kod stacji")
+    coords.columns = ["lat", "lon"]
+    for col in ["lat", "lon"]:
+        coords[col] = pd.to_numeric(
+            coords[col].astype(str).str.strip().str.replace(",", ".", regex=False),
+            errors="coerce",
+        )
+    return coords.dropna()
+
+
+class StationIndex:
+    """
+    Indeks przestrzenny (drzewo KD) lokalizacji stacji pomiarowych.
+
+    Args:
+        coords (pandas.DataFrame): Współrzędne stacji (wynik station_coords).
+    """
+
+    def __init__(self, coords):
+        self.codes = coords.index.to_numpy()
+        self.coords = coords
+        self.tree = cKDTree(_unit_vectors(coords["lat"], coords["lon"]))
+
+    @classmethod
+    def from_meta(cls, meta, stations=None):
+        """
+        Tworzy indeks z metadanych GIOŚ.
+
+        Args:
+            meta (pandas.DataFrame): Metadane GIOŚ.
+            stations (list[str] | None): Opcjonalne ograniczenie do wybranych kodów stacji.
+
+        Returns:
+            StationIndex: Indeks stacji.
+        """
+        coords = station_coords(meta)
+        if stations is not None:
+            coords = coords[coords.index.isin(stations)]
+        return cls(coords)
+
+    def query(self, lat, lon, k=1):
+        """
+        Wyszukuje k najbliższych stacji dla wielu punktów jednocześnie.
+
+        Args:
+            lat (array-like): Szerokości geograficzne punktów.
+            lon (array-like): Długości geograficzne punktów.
+            k (int): Liczba sąsiadów.
+
+        Returns:
+            tuple: Odległości w km oraz indeksy stacji, obie tablice (n, k).
+        """
+        k = min(k, len(self.codes))
+        chord, idx = self.tree.query(_unit_vectors(np.atleast_1d(lat), np.atleast_1d(lon)), k=k)
+        chord, idx = chord.reshape(-1, k), idx.reshape(-1, k)
+        dist = 2 * earth_radius * np.arcsin(np.clip(chord / 2, 0, 1))
+        return dist, idx
+
+    def nearest(self, lat, lon, k=1):
+        """
+        Zwraca tabelę k najbliższych stacji dla podanych punktów.
+
+        Args:
+            lat (array-like): Szerokości geograficzne punktów.
+            lon (array-like): Długości geograficzne punktów.
+            k (int): Liczba sąsiadów.
+
+        Returns:
+            pandas.DataFrame: Numer punktu, ranga sąsiada, kod stacji i odległość w km.
+        """
+        dist, idx = self.query(lat, lon, k)
+        n_points, k = idx.shape
+        return pd.DataFrame({
+            "Punkt": np.repeat(np.arange(n_points), k),
+            "Ranga": np.tile(np.arange(1, k + 1), n_points),
+            "Kod stacji": self.codes[idx.ravel()],
+            "Odległość [km]": dist.ravel(),
+        })
+
+
+def pivot_means(table):
+    """
+    Przekształca dzienne lub miesięczne średnie do macierzy (krok czasu x stacja).
+
+    Args:
+        table (pandas.DataFrame): Wynik calc_daily_means albo calc_monthly_means.
+
+    Returns:
+        pandas.DataFrame: Średnie PM2.5 z krokami czasu w wierszach i kodami stacji w kolumnach.
+
+    Raises:
+        ValueError: Gdy dane zawierają kilka wskaźników (stats.check_single_pollutant).
+    """
+    check_single_pollutant(table)
+    if "Daily mean PM25" in table.columns:
+        index, value = ["Data"], "Daily mean PM25"
+    else:
+        index, value = ["Rok", "Miesiąc"], "Mean PM25"
+    values = pd.to_numeric(table[value], errors="coerce")
+    return values.groupby([table[c] for c in index + ["Kod stacji"]]).mean().unstack("Kod stacji")
+
+
+def idw_points(wide, index, lat, lon, k=8, power=2, chunk=512):
+    """
+    Interpoluje średnie PM2.5 do dowolnych punktów metodą odwrotnych odległości (IDW).
+
+    Dla każdego punktu wybieranych jest k najbliższych stacji; w danym kroku
+    czasu pomijane są stacje bez pomiaru. Obliczenia dla wszystkich kroków czasu
+    i punktów wykonywane są operacjami na tablicach (po blokach kroków czasu).
+
+    Args:
+        wide (pandas.DataFrame): Macierz (krok czasu x stacja), np. wynik pivot_means.
+        index (StationIndex): Indeks stacji.
+        lat (array-like): Szerokości geograficzne punktów.
+        lon (array-like): Długości geograficzne punktów.
+        k (int): Liczba stacji uwzględnianych dla punktu.
+        power (float): Wykładnik wag odległości.
+        chunk (int): Liczba kroków czasu przetwarzanych naraz (ogranicza zużycie pamięci).
+
+    Returns:
+        numpy.ndarray: Oszacowania PM2.5 o wymiarach (krok czasu, punkt).
+    """
+    dist, idx = index.query(lat, lon, k)
+    # punkt w miejscu stacji - waga tej stacji dominuje pozostałe
+    weights = 1.0 / np.maximum(dist, 1e-6) ** power
+
+    values = wide.reindex(columns=index.codes).to_numpy(dtype=float)
+    out = np.empty((values.shape[0], idx.shape[0]))
+    for start in range(0, values.shape[0], chunk):
+        block = values[start:start + chunk][:, idx]  # (czas, punkt, k)
+        valid = ~np.isnan(block)
+        num = np.einsum("tpk,pk->tp", np.where(valid, block, 0.0), weights)
+        den = np.einsum("tpk,pk->tp", valid, weights)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out[start:start + chunk] = num / den
+    return out
+
+
+def make_grid(lat_min=49.0, lat_max=55.0, lon_min=14.0, lon_max=24.2, step=0.1):
+    """
+    Tworzy regularną siatkę punktów (domyślnie obejmującą Polskę).
+
+    Args:
+        lat_min (float): Minimalna szerokość geograficzna.
+        lat_max (float): Maksymalna szerokość geograficzna.
+        lon_min (float): Minimalna długość geograficzna.
+        lon_max (float): Maksymalna długość geograficzna.
+        step (float): Krok siatki w stopniach.
+
+    Returns:
+        tuple: Wektory szerokości i długości geograficznych siatki.
+    """
+    lats = np.arange(lat_min, lat_max + step / 2, step)
+    lons = np.arange(lon_min, lon_max + step / 2, step)
+    return lats, lons
+
+
+def idw_grid(table, meta, step=0.1, k=8, power=2, bounds=None):
+    """
+    Interpoluje dzienne lub miesięczne średnie PM2.5 na regularną siatkę dla wszystkich kroków czasu.
+
+    Args:
+        table (pandas.DataFrame): Wynik calc_daily_means albo calc_monthly_means.
+        meta (pandas.DataFrame): Metadane GIOŚ ze współrzędnymi stacji.
+        step (float): Krok siatki w stopniach.
+        k (int): Liczba stacji uwzględnianych dla punktu siatki.
+        power (float): Wykładnik wag odległości.
+        bounds (tuple | None): (lat_min, lat_max, lon_min, lon_max); domyślnie Polska.
+
+    Returns:
+        tuple: Kroki czasu (pandas.Index), wektory lat i lon siatki oraz tablica (czas, lat, lon).
+    """
+    wide = pivot_means(table)
+    index = StationIndex.from_meta(meta, stations=wide.columns)
+    lats, lons = make_grid(*(bounds or ()), step=step)
+    grid_lat, grid_lon = np.meshgrid(lats, lons, indexing="ij")
+
+    values = idw_points(wide, index, grid_lat.ravel(), grid_lon.ravel(), k=k, power=power)
+    return wide.index, lats, lons, values.reshape(len(wide.index), len(lats), len(lons))
@@ -1,58 +1,345 @@
+import numpy as np
 import pandas as pd
 
-def convert_df(df_pm25):
+from instrument import instrumented
+
+# liczba godzinnych pomiarów w pełnej dobie
+hours_per_day = 24
+
+
+def _quantization(df):
+    """
+    Zwraca parametry kwantyzacji danych zapisanych przez get_data.to_quantized.
+
+    Args:
+        df (pandas.DataFrame): Dane w formacie szerokim lub długim.
+
+    Returns:
+        tuple | None: Skala i wartość oznaczająca brak pomiaru albo None dla danych niekwantowanych.
+    """
+    if "pm25_scale" not in df.attrs:
+        return None
+    return df.attrs["pm25_scale"], df.attrs["pm25_missing"]
+
+
+def _mean_and_count(df, keys, value_col):
+    """
+    Liczy średnią i liczbę ważnych pomiarów w jednym przebiegu groupby.
+
+    Dla danych skwantowanych (convert_df(..., decode=False)) sumowane są
+    liczby całkowite (int64), a skala jest stosowana dopiero do średniej.
+
+    Args:
+        df (pandas.DataFrame): Dane w formacie długim.
+        keys (list): Klucze grupowania (nazwy kolumn lub serie).
+        value_col (str): Kolumna z wartościami PM2.5.
+
+    Returns:
+        pandas.DataFrame: Zagregowane dane z kolumnami mean i count.
+    """
+    quantized = _quantization(df)
+    if quantized is None:
+        return df.groupby(keys)[value_col].agg(["mean", "count"]).reset_index()
+    out = df.groupby(keys)[value_col].agg(["sum", "count"]).reset_index()
+    # sumy i liczności kolumny Int (z brakami) wracają do zwykłych typów numpy
+    count = out["count"].to_numpy(dtype=np.int64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out["sum"] = out["sum"].to_numpy(dtype=np.int64) / count / quantized[0]
+    out["count"] = count
+    return out.rename(columns={"sum": "mean"})
+
+
+def _pollutant_keys(df):
+    """
+    Zwraca klucz wskaźnika, gdy dane pochodzą z make_multi_data.
+
+    Args:
+        df (pandas.DataFrame): Dane w formacie długim lub tabela wyników.
+
+    Returns:
+        list[str]: ["Wskaźnik"] albo pusta lista.
+    """
+    return ["Wskaźnik"] if "Wskaźnik" in df.columns else []
+
+
+def check_single_pollutant(df):
+    """
+    Sprawdza, czy dane zawierają tylko jeden wskaźnik.
+
+    Analizy stacji (trendy, kwantyle, epizody, interpolacja, korelacje) grupują
+    dane po stacjach i pomieszałyby wartości różnych wskaźników.
+
+    Args:
+        df (pandas.DataFrame): Dane w formacie szerokim lub długim albo tabela wyników.
+
+    Raises:
+        ValueError: Gdy dane z make_multi_data zawierają kilka wskaźników.
+    """
+    if "Wskaźnik" in df.columns:
+        pollutants = df["Wskaźnik"].dropna().unique()
+    elif "Wskaźnik" in df.columns.names:
+        pollutants = df.columns.get_level_values("Wskaźnik")[1:].unique()
+    else:
+        return
+    if len(pollutants) > 1:
+        raise ValueError(
+            f"Dane zawierają kilka wskaźników ({', '.join(map(str, pollutants))}); "
+            "wybierz jeden (get_data.select_pollutant albo filtr kolumny Wskaźnik)."
+        )
+
+
+def _measured(formated, include_imputed=True):
+    """
+    Zwraca kopię danych długich, opcjonalnie bez pomiarów uzupełnionych przez gapfill.
+
+    Args:
+        formated (pandas.DataFrame): Dane PM2.5 w formacie długim.
+        include_imputed (bool): Czy zachować wiersze z Imputowane == True.
+
+    Returns:
+        pandas.DataFrame: Kopia danych.
+    """
+    if include_imputed or "Imputowane" not in formated.columns:
+        return formated.copy()
+    return formated[~formated["Imputowane"]].copy()
+
+
+def _hours_in_month(years, months):
+    """
+    Zwraca liczbę godzin w podanych miesiącach.
+
+    Args:
+        years (pandas.Series): Lata.
+        months (pandas.Series): Miesiące.
+
+    Returns:
+        pandas.Series: Liczba godzin w każdym miesiącu.
+    """
+    first_day = pd.to_datetime({"year": years, "month": months, "day": 1})
+    return first_day.dt.days_in_month * hours_per_day
+
+@instrumented("stats.convert_df")
+def convert_df(df_pm25, imputed=None, decode=True):
     """
     Przekształca dane PM2.5 z formatu szerokiego na długi i czyści wartości liczbowe.
 
+    Dla danych wielowskaźnikowych (make_multi_data) wynik ma dodatkową kolumnę
+    "Wskaźnik", a kolumna PM25 zawiera stężenie danego wskaźnika. Dane z rzadkimi
+    kolumnami stacji (make_pm25_data z join="outer") są przekształcane bez
+    zamiany na postać gęstą - wynik zawiera tylko istniejące pomiary. Dane
+    skwantowane (get_data.to_quantized) dają te same wiersze co dane float.
+
     Args:
         df_pm25 (pandas.DataFrame): Dane PM2.5 w formacie szerokim z MultiIndex.
+        imputed (pandas.DataFrame | None): Tabela uzupełnionych komórek z gapfill.fill_gaps;
+            gdy podana, wynik ma kolumnę "Imputowane" (True dla uzupełnionych pomiarów).
+        decode (bool): Dla danych skwantowanych: czy zamienić PM25 na float. Przy False
+            kolumna PM25 zawiera liczby całkowite z brakami (typ Int, skala w attrs), które
+            calc_daily_means, calc_monthly_means i wojew_over_treshold sumują bez dekodowania.
 
     Returns:
         pandas.DataFrame: Dane w formacie długim z kolumnami datetime, Miejscowość, Kod stacji i PM25.
     """
 
+    # dane z make_multi_data mają dodatkowy poziom kolumn "Wskaźnik"
+    levels = list(df_pm25.columns.names)
+    stations = df_pm25.columns[1:]
+    if _quantization(df_pm25) is not None:
+        return _convert_quantized(df_pm25, levels, imputed, decode)
+    if len(stations) and all(isinstance(df_pm25[c].dtype, pd.SparseDtype) for c in stations):
+        return _convert_sparse(df_pm25, levels, imputed)
+
     df = df_pm25.copy()
 
     formated = (
         df
-        .set_index(("datetime", ""))
-        .stack(["Miejscowość", "Kod stacji"])
+        .set_index(df.columns[0])
+        .stack(levels)
         .reset_index()
     )
 
-    formated.columns = ["datetime", "Miejscowość", "Kod stacji", "PM25"]
+    formated.columns = ["datetime"] + levels + ["PM25"]
     formated["PM25"] = (
         formated["PM25"].astype(str).str.strip()
         .str.replace(",", ".", regex=False)
     )
     formated["PM25"] = pd.to_numeric(formated["PM25"], errors="coerce")
 
+    if imputed is not None:
+        # ta sama operacja stack na tabeli flag daje wiersze w tej samej kolejności
+        flags = imputed[stations].notna()
+        flags.insert(0, df.columns[0], df[df.columns[0]])
+        formated["Imputowane"] = flags.set_index(df.columns[0]).stack(levels).to_numpy(dtype=bool)
+
+    return formated
+
+
+def _convert_sparse(df_pm25, levels, imputed=None):
+    """
+    Tworzy format długi bezpośrednio z zapisanych wartości kolumn rzadkich.
+
+    Args:
+        df_pm25 (pandas.DataFrame): Dane w formacie szerokim z kolumnami pandas.SparseDtype.
+        levels (list[str]): Nazwy poziomów kolumn (np. Miejscowość, Kod stacji).
+        imputed (pandas.DataFrame | None): Tabela uzupełnionych komórek (zob. convert_df).
+
+    Returns:
+        pandas.DataFrame: Dane w formacie długim (tylko istniejące pomiary).
+    """
+    stations = df_pm25.columns[1:]
+    positions, values, counts = [], [], []
+    for col in stations:
+        arr = df_pm25[col].array
+        idx, vals = arr.sp_index.indices, arr.sp_values
+        keep = ~np.isnan(vals)
+        positions.append(idx[keep])
+        values.append(vals[keep])
+        counts.append(int(keep.sum()))
+
+    rows = np.concatenate(positions) if positions else np.array([], dtype=int)
+    station = np.repeat(np.arange(len(stations)), counts)
+    # kolejność jak w convert_df dla danych gęstych: czas, potem stacja
+    order = np.argsort(rows, kind="stable")
+    rows, station = rows[order], station[order]
+
+    formated = pd.DataFrame({"datetime": df_pm25[df_pm25.columns[0]].to_numpy()[rows]})
+    for k, name in enumerate(levels):
+        formated[name] = stations.get_level_values(k).to_numpy()[station]
+    formated["PM25"] = np.concatenate(values)[order] if values else np.array([])
+    if imputed is not None:
+        formated["Imputowane"] = imputed[stations].notna().to_numpy()[rows, station]
     return formated
 
 
-def calc_monthly_means(formated):
+def _convert_quantized(df_pm25, levels, imputed=None, decode=True):
+    """
+    Tworzy format długi z danych skwantowanych (wiersze jak w convert_df dla danych float).
+
+    Args:
+        df_pm25 (pandas.DataFrame): Dane w formacie szerokim z całkowitymi kolumnami stacji.
+        levels (list[str]): Nazwy poziomów kolumn (np. Miejscowość, Kod stacji).
+        imputed (pandas.DataFrame | None): Tabela uzupełnionych komórek (zob. convert_df).
+        decode (bool): Czy zamienić PM25 na float (zob. convert_df).
+
+    Returns:
+        pandas.DataFrame: Dane w formacie długim; przy decode=False z attrs kwantyzacji.
+    """
+    scale, missing = _quantization(df_pm25)
+    stations = df_pm25.columns[1:]
+    # spłaszczenie wierszami: kolejność czas, potem stacja (jak w convert_df)
+    codes = df_pm25[stations].to_numpy().ravel()
+    absent = codes == missing
+    rows = np.repeat(np.arange(len(df_pm25)), len(stations))
+    station = np.tile(np.arange(len(stations)), len(df_pm25))
+
+    formated = pd.DataFrame({"datetime": df_pm25[df_pm25.columns[0]].to_numpy()[rows]})
+    for k, name in enumerate(levels):
+        formated[name] = stations.get_level_values(k).to_numpy()[station]
+    if decode:
+        formated["PM25"] = np.where(absent, np.nan, codes / scale)
+    else:
+        formated["PM25"] = pd.arrays.IntegerArray(codes, absent)
+        formated.attrs.update(pm25_scale=scale, pm25_missing=missing)
+    if imputed is not None:
+        formated["Imputowane"] = imputed[stations].notna().to_numpy().ravel()
+    return formated
+
+
+def hour_slots(times):
+    """
+    Numeruje pełne godziny pomiarów (23:59:59 po korekcie midnight to godzina 00:00).
+
+    Args:
+        times (pandas.DatetimeIndex): Znaczniki czasu pomiarów (koniec godziny uśredniania).
+
+    Returns:
+        numpy.ndarray: Numery godzin liczone od początku epoki (int64).
+    """
+    return np.asarray((times.ceil("h") - pd.Timestamp(0)) // pd.Timedelta(hours=1), dtype=np.int64)
+
+
+@instrumented("stats.to_matrix")
+def to_matrix(df_pm25):
+    """
+    Zamienia dane PM2.5 w formacie szerokim na macierz liczb (godzina x stacja).
+
+    Czyszczenie wartości jest takie samo jak w convert_df (spacje, przecinek dziesiętny);
+    dane skwantowane (get_data.to_quantized) są dekodowane.
+
+    Args:
+        df_pm25 (pandas.DataFrame): Dane PM2.5 w formacie szerokim z MultiIndex.
+
+    Returns:
+        tuple: Znaczniki czasu (pandas.DatetimeIndex), macierz wartości (numpy.ndarray)
+            oraz kolumny stacji (pandas.MultiIndex (Miejscowość, Kod stacji)).
+    """
+    stations = df_pm25.columns[1:]
+    times = pd.DatetimeIndex(df_pm25[df_pm25.columns[0]])
+    quantized = _quantization(df_pm25)
+    if quantized is not None:
+        codes = df_pm25[stations].to_numpy()
+        values = np.where(codes == quantized[1], np.nan, codes / quantized[0])
+        return times, values, stations
+
+    values = np.empty((len(df_pm25), len(stations)))
+    for k, col in enumerate(stations):
+        column = df_pm25[col]
+        if not pd.api.types.is_numeric_dtype(column):
+            numeric = pd.to_numeric(column, errors="coerce")
+            # tekst z przecinkiem dziesiętnym wymaga czyszczenia jak w convert_df
+            if numeric.isna().sum() > column.isna().sum():
+                numeric = pd.to_numeric(
+                    column.astype(str).str.strip().str.replace(",", ".", regex=False),
+                    errors="coerce",
+                )
+            column = numeric
+        values[:, k] = column.to_numpy(dtype=float, na_value=np.nan)
+    return times, values, stations
+
+
+@instrumented("stats.calc_monthly_means")
+def calc_monthly_means(formated, min_coverage=None, with_coverage=False, include_imputed=True):
     """
     Oblicza średnie miesięczne stężenie PM2.5 dla każdej stacji.
 
+    Liczba ważnych pomiarów jest liczona w tym samym przebiegu co średnia,
+    więc filtr pokrycia nie wymaga ponownej agregacji.
+
     Args:
         formated (pandas.DataFrame): Dane PM2.5 w formacie długim.
+        min_coverage (float | None): Minimalny odsetek ważnych godzin w miesiącu
+            (np. 0.75); średnie miesięcy poniżej progu są zamieniane na NaN.
+        with_coverage (bool): Czy dołączyć kolumny "Liczba godzin" i "Pokrycie".
+        include_imputed (bool): Czy uwzględniać pomiary uzupełnione przez gapfill
+            (kolumna "Imputowane" z convert_df).
 
     Returns:
         pandas.DataFrame: Średnie miesięczne PM2.5 z podziałem na rok, miesiąc, miejscowość i stację.
     """
 
-    df = formated.copy()
+    df = _measured(formated, include_imputed)
 
-    return (
-        df.groupby([
+    out = _mean_and_count(
+        df,
+        [
             df["datetime"].dt.year.rename("Rok"),
             df["datetime"].dt.month.rename("Miesiąc"),
+            *_pollutant_keys(df),
             "Miejscowość",
             "Kod stacji"
-        ])["PM25"].mean().reset_index(name="Mean PM25")
-    )
+        ],
+        "PM25",
+    ).rename(columns={"mean": "Mean PM25", "count": "Liczba godzin"})
+    out["Pokrycie"] = out["Liczba godzin"] / _hours_in_month(out["Rok"], out["Miesiąc"])
+
+    if min_coverage is not None:
+        out.loc[out["Pokrycie"] < min_coverage, "Mean PM25"] = float("nan")
+    if not with_coverage:
+        out = out.drop(columns=["Liczba godzin", "Pokrycie"])
+    return out
 
 
+@instrumented("stats.calc_monthly_city_means")
 def calc_monthly_city_means(monthly_means):
     """
     Oblicza średnie miesięczne stężenie PM2.5 dla każdej miejscowości.
@@ -67,60 +354,154 @@ def calc_monthly_city_means(monthly_means):
     df["Mean PM25"] = pd.to_numeric(df["Mean PM25"], errors="coerce")
 
     return (
-        df.groupby(["Rok", "Miesiąc", "Miejscowość"])["Mean PM25"]
+        df.groupby(["Rok", "Miesiąc", *_pollutant_keys(df), "Miejscowość"])["Mean PM25"]
         .mean()
         .reset_index()
     )
 
 
-def calc_daily_means(formated):
+@instrumented("stats.calc_daily_means")
+def calc_daily_means(formated, with_coverage=False, include_imputed=True):
     """
     Oblicza dzienne średnie stężenie PM2.5 dla każdej stacji.
 
     Args:
         formated (pandas.DataFrame): Dane PM2.5 w formacie długim.
+        with_coverage (bool): Czy dołączyć kolumny "Liczba godzin" (liczba ważnych
+            pomiarów w dobie) i "Pokrycie" (odsetek z 24 godzin).
+        include_imputed (bool): Czy uwzględniać pomiary uzupełnione przez gapfill
+            (kolumna "Imputowane" z convert_df).
 
     Returns:
         pandas.DataFrame: Dzienne średnie PM2.5 z podziałem na rok, datę, miejscowość i stację.
     """
-    df = formated.copy()
+    df = _measured(formated, include_imputed)
     df["PM25"] = pd.to_numeric(df["PM25"], errors="coerce")
 
-    out = (
-        df.groupby([
+    out = _mean_and_count(
+        df,
+        [
             df["datetime"].dt.year.rename("Rok"),
             df["datetime"].dt.date.rename("Data"),
+            *_pollutant_keys(df),
             "Miejscowość",
             "Kod stacji"
-        ])["PM25"]
-        .mean()
-        .reset_index(name="Daily mean PM25")
+        ],
+        "PM25",
+    ).rename(columns={"mean": "Daily mean PM25", "count": "Liczba godzin"})
+
+    if with_coverage:
+        out["Pokrycie"] = out["Liczba godzin"] / hours_per_day
+    else:
+        out = out.drop(columns=["Liczba godzin"])
+    return out
+
+
+@instrumented("stats.calc_coverage")
+def calc_coverage(daily, min_coverage=0.75):
+    """
+    Tworzy tabelę pokrycia danymi dla każdej stacji i roku.
+
+    Korzysta z liczby godzin policzonej przez calc_daily_means(with_coverage=True),
+    więc nie wymaga ponownego przejścia po danych godzinowych.
+
+    Args:
+        daily (pandas.DataFrame): Dzienne średnie PM2.5 z kolumnami pokrycia.
+        min_coverage (float): Minimalny odsetek ważnych godzin, aby doba była ważna.
+
+    Returns:
+        pandas.DataFrame: Liczba godzin, liczba dni ważnych i pokrycie roczne dla każdej stacji.
+    """
+    _require_coverage(daily)
+    df = daily.copy()
+    df["Dzień ważny"] = df["Pokrycie"] >= min_coverage
+
+    out = (
+        df.groupby(["Rok", *_pollutant_keys(df), "Miejscowość", "Kod stacji"])
+        .agg(**{
+            "Liczba dni": ("Data", "nunique"),
+            "Dni ważne": ("Dzień ważny", "sum"),
+            "Liczba godzin": ("Liczba godzin", "sum"),
+        })
+        .reset_index()
     )
+    days_in_year = pd.to_datetime(out["Rok"].astype(str) + "-12-31").dt.dayofyear
+    out["Pokrycie"] = out["Liczba godzin"] / (days_in_year * hours_per_day)
     return out
 
 
-def count_overnorm_days(daily, threshold):
+@instrumented("stats.calc_availability")
+def calc_availability(formated):
+    """
+    Tworzy tabelę dostępności pomiarów: pierwszy i ostatni pomiar oraz liczbę
+    pomiarów dla każdej stacji i roku.
+
+    Pozwala sprawdzić, w których latach stacja działała, gdy lata połączono
+    z join="outer" (stacje nieobecne we wszystkich latach).
+
+    Args:
+        formated (pandas.DataFrame): Dane PM2.5 w formacie długim.
+
+    Returns:
+        pandas.DataFrame: Kolumny Rok, Miejscowość, Kod stacji, Początek, Koniec, Liczba pomiarów.
+    """
+    df = formated[formated["PM25"].notna()]
+    return (
+        df.groupby([df["datetime"].dt.year.rename("Rok"), *_pollutant_keys(df), "Miejscowość", "Kod stacji"])
+        .agg(**{
+            "Początek": ("datetime", "min"),
+            "Koniec": ("datetime", "max"),
+            "Liczba pomiarów": ("PM25", "count"),
+        })
+        .reset_index()
+    )
+
+
+def _require_coverage(daily):
+    """
+    Sprawdza, czy tabela dziennych średnich zawiera kolumny pokrycia.
+
+    Args:
+        daily (pandas.DataFrame): Dzienne średnie stężenia PM2.5.
+
+    Raises:
+        ValueError: Gdy brakuje kolumny "Pokrycie".
+    """
+    if "Pokrycie" not in daily.columns:
+        raise ValueError(
+            "Brak kolumny 'Pokrycie' - użyj calc_daily_means(..., with_coverage=True)."
+        )
+
+
+@instrumented("stats.count_overnorm_days")
+def count_overnorm_days(daily, threshold, min_coverage=None):
     """
     Liczy dni z przekroczeniem dobowej normy PM2.5 dla każdej stacji.
 
     Args:
         daily (pandas.DataFrame): Dzienne średnie stężenia PM2.5.
         threshold (float): Wartość graniczna normy PM2.5.
+        min_coverage (float | None): Minimalny odsetek ważnych godzin w dobie
+            (np. 0.75); doby poniżej progu nie są liczone. Wymaga kolumny "Pokrycie".
 
     Returns:
         pandas.DataFrame: Liczba dni z przekroczeniem normy dla każdej stacji i roku.
     """
     df = daily.copy()
+    if min_coverage is not None:
+        _require_coverage(df)
+        df = df[df["Pokrycie"] >= min_coverage]
     over = df[df["Daily mean PM25"] > threshold]
 
     out = (
-        over.groupby(["Rok", "Kod stacji"])["Data"]
+        over.groupby(["Rok", *_pollutant_keys(over), "Kod stacji"])["Data"]
         .nunique()
         .reset_index(name=f"Liczba dni PM25 > {threshold}")
     )
     return out
 
 
+@instrumented("stats.top_bottom_stations")
 def top_bottom_stations(over_counts, year, n=3):
     """
     Wybiera stacje z największą i najmniejszą liczbą dni z przekroczeniem normy.
@@ -140,6 +521,7 @@ def top_bottom_stations(over_counts, year, n=3):
     out = pd.concat([top, bottom], ignore_index=True)
     return out
 
+@instrumented("stats.wojew_over_treshold")
 def wojew_over_treshold(long: pd.DataFrame, wojew_dict: dict, treshold: int = 15):        
     """
     Zlicza dni z przekroczeniem progu `treshold` przez średnie PM2.5 z rozróżnieniem na województwa
@@ -158,10 +540,10 @@ def wojew_over_treshold(long: pd.DataFrame, wojew_dict: dict, treshold: int = 15
 
     long = long.drop("Miejscowość", axis=1)
 
-    daily  = (
-        long
-        .groupby(["Województwo", "Kod stacji", "date"], as_index=False)
-        .agg(PM25=("PM25", "mean"))
+    daily = (
+        _mean_and_count(long, ["Województwo", "Kod stacji", "date"], "PM25")
+        .rename(columns={"mean": "PM25"})
+        .drop(columns="count")
     )
     wojew_means = (
         daily
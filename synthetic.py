@@ -0,0 +1,252 @@
+import contextlib
+import functools
+import http.server
+import io
+import os
+import threading
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+# prefiksy kodów stacji (województwa) używane przez GIOŚ
+wojew_prefixes = ["Ds", "Kp", "Lb", "Ld", "Lu", "Mp", "Mz", "Op", "Pd", "Pk", "Pm", "Sl", "Wm", "Wp", "Zp", "Sk"]
+
+old_code_col = "Stary Kod stacji \n(o ile inny od aktualnego)"
+
+
+def layout_rows(year):
+    """
+    Zwraca wiersze nagłówka arkusza GIOŚ dla danego roku.
+
+    Do 2016 r. arkusze zaczynają się od wiersza z kodami stacji (header_row=0,
+    3 wiersze opisu), a od 2017 r. mają dodatkowy wiersz numeracji oraz wiersze
+    jednostki i kodu stanowiska (header_row=1, 6 wierszy opisu).
+
+    Args:
+        year (int): Rok danych.
+
+    Returns:
+        list[str]: Etykiety wierszy nagłówka (pierwsza kolumna arkusza).
+    """
+    if year <= 2016:
+        return ["Kod stacji", "Wskaźnik", "Czas uśredniania"]
+    return ["Nr", "Kod stacji", "Wskaźnik", "Czas uśredniania", "Jednostka", "Kod stanowiska"]
+
+
+def clean_info_for(year):
+    """
+    Zwraca parametry clean_pm25 odpowiadające układowi arkusza z layout_rows.
+
+    Args:
+        year (int): Rok danych.
+
+    Returns:
+        dict: Słownik z kluczami header_row i drop_rows.
+    """
+    rows = layout_rows(year)
+    return {"header_row": rows.index("Kod stacji"), "drop_rows": list(range(len(rows)))}
+
+
+def make_stations(n_stations, renamed_fraction=0.1, n_cities=None, seed=0):
+    """
+    Tworzy syntetyczną tabelę stacji w formacie metadanych GIOŚ.
+
+    Część stacji dostaje "stary kod", pod którym występuje w archiwach
+    sprzed zmiany nazwy (zob. update_stations).
+
+    Args:
+        n_stations (int): Liczba stacji.
+        renamed_fraction (float): Odsetek stacji ze zmienionym kodem.
+        n_cities (int | None): Liczba miejscowości (domyślnie ok. 1/3 liczby stacji).
+        seed (int): Ziarno generatora liczb losowych.
+
+    Returns:
+        pandas.DataFrame: Metadane z kolumnami jak w pliku GIOŚ (kody, miejscowość, współrzędne).
+    """
+    rng = np.random.default_rng(seed)
+    n_cities = n_cities or max(1, n_stations // 3)
+
+    city_idx = rng.integers(0, n_cities, n_stations)
+    prefixes = np.array(wojew_prefixes)[city_idx % len(wojew_prefixes)]
+    cities = np.array([f"Miasto{c:03d}" for c in range(n_cities)])[city_idx]
+    codes = [f"{p}Mia{c:03d}St{i:04d}" for i, (p, c) in enumerate(zip(prefixes, city_idx))]
+
+    renamed = rng.random(n_stations) < renamed_fraction
+    old_codes = [f"{p}Old{i:04d}" if r else None for i, (p, r) in enumerate(zip(prefixes, renamed))]
+
+    city_lat = rng.uniform(49.5, 54.5, n_cities)
+    city_lon = rng.uniform(14.5, 23.5, n_cities)
+    return pd.DataFrame({
+        "Nr": np.arange(1, n_stations + 1),
+        "Kod stacji": codes,
+        old_code_col: old_codes,
+        "Miejscowość": cities,
+        "WGS84 φ N": city_lat[city_idx] + rng.normal(0, 0.02, n_stations),
+        "WGS84 λ E": city_lon[city_idx] + rng.normal(0, 0.02, n_stations),
+    })
+
+
+def make_year_sheet(year, stations, rename_year=2018, missing_fraction=0.05, decimal_comma=False, seed=0):
+    """
+    Tworzy surowy arkusz godzinowych pomiarów PM2.5 w układzie archiwum GIOŚ.
+
+    Stężenia mają cykl roczny (wyższe zimą), dobowy (szczyt wieczorny) i szum;
+    część pomiarów jest pusta. Znaczniki czasu oznaczają koniec godziny
+    (od 01:00 1 stycznia do 00:00 1 stycznia kolejnego roku).
+
+    Args:
+        year (int): Rok danych.
+        stations (pandas.DataFrame): Tabela stacji z make_stations.
+        rename_year (int): Rok, od którego stacje występują pod nowym kodem.
+        missing_fraction (float): Odsetek brakujących pomiarów.
+        decimal_comma (bool): Czy zapisywać wartości jako tekst z przecinkiem dziesiętnym.
+        seed (int): Ziarno generatora liczb losowych.
+
+    Returns:
+        pandas.DataFrame: Surowy arkusz (bez nagłówka kolumn), jak zwraca download_gios_archive.
+    """
+    rng = np.random.default_rng([seed, year])
+    times = pd.date_range(f"{year}-01-01 01:00", f"{year + 1}-01-01 00:00", freq="h")
+    n_hours, n_stations = len(times), len(stations)
+
+    codes = stations["Kod stacji"].to_numpy(dtype=object).copy()
+    if year < rename_year:
+        old = stations[old_code_col].to_numpy(dtype=object)
+        codes = np.where(pd.isna(old), codes, old)
+
+    season = 1 + 0.6 * np.cos(2 * np.pi * (times.dayofyear.to_numpy() - 15) / 365)
+    daily = 1 + 0.3 * np.sin(2 * np.pi * (times.hour.to_numpy() - 14) / 24)
+    level = rng.uniform(10, 30, n_stations)
+    values = level * (season * daily)[:, None] * rng.lognormal(0, 0.35, (n_hours, n_stations))
+    values = np.round(values, 4).astype(object)
+    values[rng.random((n_hours, n_stations)) < missing_fraction] = None
+    if decimal_comma:
+        values = np.vectorize(lambda v: v if v is None else str(v).replace(".", ","), otypes=[object])(values)
+
+    header = []
+    for label in layout_rows(year):
+        if label == "Nr":
+            header.append([label] + list(range(1, n_stations + 1)))
+        elif label == "Kod stacji":
+            header.append([label] + list(codes))
+        elif label == "Wskaźnik":
+            header.append([label] + ["PM2.5"] * n_stations)
+        elif label == "Czas uśredniania":
+            header.append([label] + ["1g"] * n_stations)
+        elif label == "Jednostka":
+            header.append([label] + ["ug/m3"] * n_stations)
+        else:
+            header.append([label] + [f"{c}-PM2.5-1g" for c in codes])
+
+    body = np.column_stack([times.to_pydatetime().astype(object), values])
+    return pd.DataFrame(header + body.tolist())
+
+
+def sheet_to_zip(sheet, filename):
+    """
+    Zapisuje arkusz do pliku XLSX spakowanego w archiwum ZIP.
+
+    Args:
+        sheet (pandas.DataFrame): Surowy arkusz z make_year_sheet.
+        filename (str): Nazwa pliku XLSX w archiwum.
+
+    Returns:
+        bytes: Zawartość archiwum ZIP.
+    """
+    return sheets_to_zip({filename: sheet})
+
+
+def sheets_to_zip(sheets):
+    """
+    Zapisuje kilka arkuszy jako osobne pliki XLSX w jednym archiwum ZIP.
+
+    Args:
+        sheets (dict): Arkusze {nazwa pliku XLSX: pandas.DataFrame}.
+
+    Returns:
+        bytes: Zawartość archiwum ZIP.
+    """
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as z:
+        for filename, sheet in sheets.items():
+            xlsx = io.BytesIO()
+            sheet.to_excel(xlsx, header=False, index=False)
+            z.writestr(filename, xlsx.getvalue())
+    return buf.getvalue()
+
+
+def write_archive_set(outdir, years, n_stations, rename_year=2018, pollutants=None, seed=0):
+    """
+    Zapisuje komplet syntetycznych archiwów i metadanych w układzie serwera GIOŚ.
+
+    Pliki są nazwane identyfikatorami archiwów, więc katalog można udostępnić
+    lokalnym serwerem HTTP i ustawić get_data.gios_archive_url na jego adres.
+
+    Args:
+        outdir (str): Katalog docelowy.
+        years (list[int]): Lata danych.
+        n_stations (int): Liczba stacji.
+        rename_year (int): Rok, od którego stacje występują pod nowym kodem.
+        pollutants (list[str] | None): Dodatkowe wskaźniki zapisywane w tym samym
+            archiwum (np. ["PM25", "PM10"]); domyślnie tylko PM2.5.
+        seed (int): Ziarno generatora liczb losowych.
+
+    Returns:
+        dict: Konfiguracja dla make_pm25_data (gios_url_ids, gios_pm25_file, clean_info),
+            pliki wszystkich wskaźników (gios_files) oraz metadane.
+    """
+    os.makedirs(outdir, exist_ok=True)
+    stations = make_stations(n_stations, seed=seed)
+    pollutants = list(pollutants or ["PM25"])
+
+    gios_url_ids = {"meta": "meta"}
+    gios_files = {}
+    for year in years:
+        gios_url_ids[year] = f"pm25_{year}"
+        gios_files[year] = {p: f"{year}_{p}_1g.xlsx" for p in pollutants}
+        sheets = {
+            gios_files[year][p]: make_year_sheet(year, stations, rename_year=rename_year, seed=seed + k)
+            for k, p in enumerate(pollutants)
+        }
+        with open(os.path.join(outdir, gios_url_ids[year]), "wb") as f:
+            f.write(sheets_to_zip(sheets))
+
+    stations.to_excel(os.path.join(outdir, "meta.xlsx"), index=False)
+    os.replace(os.path.join(outdir, "meta.xlsx"), os.path.join(outdir, "meta"))
+
+    return {
+        "years": list(years),
+        "gios_url_ids": gios_url_ids,
+        "gios_pm25_file": {year: files[pollutants[0]] for year, files in gios_files.items()},
+        "gios_files": gios_files,
+        "clean_info": {year: clean_info_for(year) for year in years},
+        "meta": stations,
+    }
+
+
+@contextlib.contextmanager
+def serve_directory(path):
+    """
+    Udostępnia katalog lokalnym serwerem HTTP (zastępuje serwer archiwów GIOŚ).
+
+    Args:
+        path (str): Katalog z plikami z write_archive_set.
+
+    Yields:
+        str: Adres bazowy do użycia jako get_data.gios_archive_url.
+    """
+    handler = functools.partial(_QuietHandler, directory=str(path))
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from bootstrap import bootstrap_means, resample_means
+
+
+@pytest.fixture
+def daily():
+    """
+    Dzienne średnie PM2.5 dwóch stacji w Krakowie i jednej stałej stacji w Gdańsku przez dwa miesiące
+    """
+    rng = np.random.default_rng(4)
+    dates = pd.date_range("2024-01-01", "2024-02-29", freq="D")
+    frames = [
+        pd.DataFrame({
+            "Rok": dates.year, "Data": dates.date, "Miejscowość": city, "Kod stacji": code,
+            "Daily mean PM25": values,
+        })
+        for city, code, values in [
+            ("Kraków", "MpKrakBujaka", rng.gamma(2.0, 15.0, len(dates))),
+            ("Kraków", "MpKrakWadow", rng.gamma(2.0, 15.0, len(dates))),
+            ("Gdańsk", "PmGdaLeczk08", np.full(len(dates), 12.0)),
+        ]
+    ]
+    return pd.concat(frames, ignore_index=True)
+
+
+def test_bootstrap_means(daily):
+    """
+    Sprawdza, czy bootstrap_means:
+    - uśrednia stacje miejscowości w każdej dobie i liczy dni w miesiącu,
+    - daje przedział zawierający średnią (zerowy dla stałych pomiarów),
+    - z tym samym seed zwraca ten sam wynik
+    """
+    ci = bootstrap_means(daily, n=500, seed=7)
+    krakow = ci[ci["Miejscowość"] == "Kraków"].set_index("Miesiąc")
+    gdansk = ci[ci["Miejscowość"] == "Gdańsk"].set_index("Miesiąc")
+
+    assert list(krakow["Liczba dni"]) == [31, 29]
+    january = daily[(daily["Miejscowość"] == "Kraków") & (pd.to_datetime(daily["Data"]).dt.month == 1)]
+    assert krakow.loc[1, "Mean PM25"] == pytest.approx(january["Daily mean PM25"].mean())
+    assert (krakow["Dolna granica"] < krakow["Mean PM25"]).all()
+    assert (krakow["Mean PM25"] < krakow["Górna granica"]).all()
+    assert (gdansk["Dolna granica"] == 12.0).all() and (gdansk["Górna granica"] == 12.0).all()
+
+    pd.testing.assert_frame_equal(ci, bootstrap_means(daily, n=500, seed=7))
+    stations = bootstrap_means(daily, by=("Miejscowość", "Kod stacji"), n=50, seed=7)
+    assert len(stations) == 6
+
+
+def test_bootstrap_means_pollutants(daily):
+    """
+    Sprawdza, czy bootstrap_means dla kilku wskaźników wymaga kolumny Wskaźnik w grupach
+    """
+    both = pd.concat([daily.assign(Wskaźnik="PM25"), daily.assign(Wskaźnik="PM10")], ignore_index=True)
+    with pytest.raises(ValueError, match="select_pollutant"):
+        bootstrap_means(both, n=10, seed=7)
+
+    ci = bootstrap_means(both, by=("Wskaźnik", "Miejscowość"), n=10, seed=7)
+    assert len(ci) == 2 * 4
+
+
+def test_resample_means_spread():
+    """
+    Sprawdza, czy rozrzut prób bootstrap odpowiada błędowi standardowemu średniej
+    dla grup różnej długości (także przy podziale na bloki)
+    """
+    import bootstrap
+
+    rng = np.random.default_rng(5)
+    sizes = np.array([31, 10, 0])
+    values = np.full((3, 31), np.nan)
+    values[0] = rng.normal(0, 1, 31)
+    values[1, :10] = rng.normal(100, 5, 10)
+
+    old = bootstrap.batch_elements
+    bootstrap.batch_elements = 1
+    try:
+        replicates = resample_means(values, sizes, n=4000, seed=0)
+    finally:
+        bootstrap.batch_elements = old
+
+    for k in range(2):
+        sample = values[k, :sizes[k]]
+        assert replicates[k].mean() == pytest.approx(sample.mean(), abs=0.02 * sample.std())
+        assert replicates[k].std() == pytest.approx(sample.std() / np.sqrt(sizes[k]), rel=0.1)
+    assert replicates[1].min() >= values[1, :10].min()
+    assert np.isnan(replicates[2]).all()
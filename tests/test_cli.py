@@ -0,0 +1,93 @@
+import json
+import subprocess
+import sys
+
+import pandas as pd
+import pytest
+
+import cli
+import get_data
+
+
+@pytest.fixture
+def pm25_csv(tmp_path):
+    """
+    Plik CSV w formacie zapisywanym przez make_pm25_data (dwie stacje, dwie doby)
+    """
+    df = get_data.midnight(pd.DataFrame(
+        {
+            "datetime": pd.date_range("2024-01-01 01:00", periods=48, freq="h"),
+            "DsWrocAlWisn": [20.0] * 24 + [10.0] * 24,
+            "MpKrakBujaka": [30.0] * 48,
+        }
+    ))
+    meta = pd.DataFrame(
+        {"Kod stacji": ["DsWrocAlWisn", "MpKrakBujaka"], "Miejscowość": ["Wrocław", "Kraków"]}
+    )
+    path = tmp_path / "PM25.csv"
+    get_data.add_city(df, meta).to_csv(path, index=None)
+    return path
+
+
+def test_import_cli_is_lightweight():
+    """
+    Sprawdza, czy import modułu cli nie ładuje pandas ani bibliotek do wykresów
+    """
+    code = "import sys, cli; print(any(m in sys.modules for m in ['pandas', 'matplotlib', 'seaborn', 'requests']))"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "False"
+
+
+def test_load_config(tmp_path):
+    """
+    Sprawdza, czy load_config zamienia klucze lat na liczby całkowite i zostawia klucz "meta"
+    """
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({
+        "years": [2015],
+        "gios_url_ids": {"2015": "236", "meta": "622"},
+        "clean_info": {"2015": {"header_row": 0, "drop_rows": [0, 1, 2]}},
+    }))
+
+    config = cli.load_config(path)
+
+    assert config["gios_url_ids"] == {2015: "236", "meta": "622"}
+    assert config["clean_info"][2015]["header_row"] == 0
+
+
+@pytest.mark.parametrize("extra", [[], ["--quantized"]])
+def test_cli_stats_overnorm(pm25_csv, tmp_path, extra):
+    """
+    Sprawdza, czy podkomenda stats liczy dni z przekroczeniem normy i zapisuje wynik do CSV
+    (także na danych skwantowanych)
+    """
+    out_path = tmp_path / "over.csv"
+    cli.main(["stats", str(pm25_csv), "--what", "overnorm", "--threshold", "15", "--out", str(out_path), *extra])
+
+    out = pd.read_csv(out_path).set_index("Kod stacji")
+    assert out.loc["DsWrocAlWisn", "Liczba dni PM25 > 15.0"] == 1
+    assert out.loc["MpKrakBujaka", "Liczba dni PM25 > 15.0"] == 2
+
+
+def test_cli_export(pm25_csv, tmp_path):
+    """
+    Sprawdza, czy podkomenda export zapisuje tabele statystyk do bazy SQLite
+    """
+    import export_sql
+
+    db = tmp_path / "pm25.db"
+    cli.main(["export", str(pm25_csv), "--db", str(db)])
+
+    over = export_sql.query(db, 'SELECT "Kod stacji", "Liczba dni PM25 > 15.0" AS n FROM overnorm_days')
+    assert dict(zip(over["Kod stacji"], over["n"])) == {"DsWrocAlWisn": 1, "MpKrakBujaka": 2}
+
+
+def test_cli_plot_wojewodztwa_requires_config(pm25_csv, tmp_path, capsys):
+    """
+    Sprawdza, czy plot --what wojewodztwa bez --config kończy się błędem parsera argumentów
+    """
+    with pytest.raises(SystemExit) as exc:
+        cli.main(["plot", str(pm25_csv), "--what", "wojewodztwa", "--out", str(tmp_path / "w.png")])
+
+    assert exc.value.code == 2
+    assert "--config" in capsys.readouterr().err
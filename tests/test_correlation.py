@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from correlation import city_coherence, corr_matrix, pairwise_corr, redundant_pairs
+from stats import calc_daily_means, convert_df
+
+
+@pytest.fixture
+def df_pm25():
+    """
+    Dane PM2.5 z sześciu stacji (dwie miejscowości o wspólnym sygnale) z brakami danych
+    """
+    rng = np.random.default_rng(2)
+    n = 24 * 60
+    times = pd.date_range("2024-01-01 01:00", periods=n, freq="h")
+    times = times.where(times.hour != 0, times - pd.Timedelta(seconds=1))
+    city_a, city_b = rng.normal(30, 10, n), rng.normal(30, 10, n)
+    data = {0: times}
+    stations = [("datetime", "")]
+    for k in range(3):
+        data[len(data)] = city_a + rng.normal(0, 2 + 4 * k, n)
+        stations.append(("Kraków", f"MpKrak{k}"))
+        data[len(data)] = city_b + rng.normal(0, 3, n)
+        stations.append(("Gdańsk", f"PmGda{k}"))
+    df = pd.DataFrame(data)
+    df.columns = pd.MultiIndex.from_tuples(stations, names=["Miejscowość", "Kod stacji"])
+    df.iloc[rng.random(n) < 0.2, 1] = np.nan
+    df.iloc[:700, 4] = np.nan
+    df.iloc[:1430, 6] = np.nan
+    return df
+
+
+@pytest.mark.parametrize("block, workers", [(256, None), (2, 3)])
+def test_pairwise_corr_matches_pandas(df_pm25, block, workers):
+    """
+    Sprawdza, czy korelacje liczone blokami (także w wątkach) są równe DataFrame.corr
+    z parami niepustych wierszy i progiem min_periods
+    """
+    values = df_pm25.iloc[:, 1:].to_numpy(dtype=float)
+    expected = pd.DataFrame(values).corr(min_periods=24).to_numpy()
+
+    corr, count = pairwise_corr(values, min_periods=24, block=block, workers=workers)
+
+    np.testing.assert_allclose(corr, expected, atol=1e-10)
+    assert np.isnan(corr[5]).all()
+    assert count[0, 3] == (~np.isnan(values[:, [0, 3]])).all(axis=1).sum()
+
+
+def test_corr_matrix_float32_and_daily(df_pm25):
+    """
+    Sprawdza, czy corr_matrix:
+    - w float32 daje wynik bliski float64,
+    - przyjmuje średnie dzienne z calc_daily_means,
+    - odrzuca średnie kilku wskaźników
+    """
+    exact = corr_matrix(df_pm25)
+    fast = corr_matrix(df_pm25, dtype=np.float32, block=4)
+    np.testing.assert_allclose(fast.to_numpy(), exact.to_numpy(), atol=1e-4)
+    assert list(exact.index) == list(df_pm25.columns[1:])
+
+    daily = calc_daily_means(convert_df(df_pm25))
+    corr = corr_matrix(daily)
+    wide = daily.pivot_table(values="Daily mean PM25", index="Data", columns=["Miejscowość", "Kod stacji"])
+    np.testing.assert_allclose(corr.to_numpy(), wide.corr(min_periods=7).to_numpy(), atol=1e-10)
+
+    both = pd.concat([daily.assign(Wskaźnik="PM25"), daily.assign(Wskaźnik="PM10")], ignore_index=True)
+    with pytest.raises(ValueError, match="select_pollutant"):
+        corr_matrix(both)
+
+
+def test_redundant_pairs_and_city_coherence(df_pm25):
+    """
+    Sprawdza, czy:
+    - redundant_pairs wybiera tylko silnie skorelowane pary,
+    - stacje jednej miejscowości są skorelowane silniej niż z innymi
+    """
+    corr = corr_matrix(df_pm25)
+
+    pairs = redundant_pairs(corr, threshold=0.9)
+    assert len(pairs) > 0
+    assert (pairs["Korelacja"] >= 0.9).all()
+    assert (pairs["Miejscowość 1"] == pairs["Miejscowość 2"]).all()
+
+    coherence = city_coherence(corr).set_index("Miejscowość")
+    assert list(coherence["Liczba stacji"]) == [3, 3]
+    assert (coherence["Korelacja w miejscowości"] > coherence["Korelacja z innymi"] + 0.5).all()
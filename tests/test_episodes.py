@@ -0,0 +1,73 @@
+import pandas as pd
+import pytest
+
+from episodes import detect_episodes
+
+
+@pytest.fixture
+def daily():
+    """
+    Dzienne średnie PM2.5 dla dwóch stacji przez 8 dni
+    """
+    dates = pd.date_range("2015-01-01", periods=8, freq="D").date
+    return pd.DataFrame(
+        {
+            "Rok": 2015,
+            "Data": list(dates) * 2,
+            "Miejscowość": ["Wrocław"] * 8 + ["Kraków"] * 8,
+            "Kod stacji": ["DsWrocAlWisn"] * 8 + ["MpKrakBujaka"] * 8,
+            "Daily mean PM25": [
+                20, 30, 10, 40, 50, 10, 10, 60,
+                5, 5, 16, 17, 18, 5, 5, 5,
+            ],
+        }
+    )
+
+
+def test_detect_episodes(daily):
+    """
+    Sprawdza, czy detect_episodes:
+    - wyznacza serie kolejnych dni z przekroczeniem dla każdej stacji,
+    - zwraca początek, koniec, długość i maksimum epizodu
+    """
+    out = detect_episodes(daily, threshold=15)
+
+    wroc = out[out["Kod stacji"] == "DsWrocAlWisn"]
+    assert list(wroc["Długość [dni]"]) == [2, 2, 1]
+    assert list(wroc["Maksimum PM25"]) == [30, 50, 60]
+
+    krak = out[out["Kod stacji"] == "MpKrakBujaka"].iloc[0]
+    assert krak["Początek"] == pd.Timestamp("2015-01-03")
+    assert krak["Koniec"] == pd.Timestamp("2015-01-05")
+    assert krak["Dni z przekroczeniem"] == 3
+
+
+def test_detect_episodes_gap_tolerance(daily):
+    """
+    Sprawdza, czy detect_episodes:
+    - łączy serie rozdzielone przerwą nie dłuższą niż max_gap,
+    - odrzuca epizody krótsze niż min_length
+    """
+    out = detect_episodes(daily, threshold=15, max_gap=1, min_length=3)
+
+    wroc = out[out["Kod stacji"] == "DsWrocAlWisn"].iloc[0]
+    assert wroc["Początek"] == pd.Timestamp("2015-01-01")
+    assert wroc["Koniec"] == pd.Timestamp("2015-01-05")
+    assert wroc["Długość [dni]"] == 5
+    assert wroc["Dni z przekroczeniem"] == 4
+    assert len(out) == 2
+
+
+def test_detect_episodes_by_wojewodztwo(daily):
+    """
+    Sprawdza, czy detect_episodes:
+    - uśrednia dzienne wartości stacji w województwie,
+    - zwraca pusty wynik z właściwymi kolumnami, gdy brak przekroczeń
+    """
+    wojew_dict = {"Ds": "dolnośląskie", "Mp": "małopolskie"}
+    out = detect_episodes(daily, threshold=45, by="Województwo", wojew_dict=wojew_dict)
+    assert list(out["Województwo"]) == ["dolnośląskie", "dolnośląskie"]
+
+    empty = detect_episodes(daily, threshold=100)
+    assert empty.empty
+    assert "Maksimum PM25" in empty.columns
@@ -0,0 +1,89 @@
+import sqlite3
+import types
+
+import pandas as pd
+import pytest
+
+import export_sql
+from export_sql import export_tables, query
+from stats import calc_daily_means, calc_monthly_means, convert_df, count_overnorm_days
+
+
+@pytest.fixture
+def tables():
+    """
+    Średnie dzienne, miesięczne i dni z przekroczeniem dla dwóch stacji przez styczeń 2021
+    """
+    times = pd.date_range("2021-01-01 01:00", periods=31 * 24, freq="h")
+    cols = pd.MultiIndex.from_tuples(
+        [("datetime", ""), ("Wrocław", "DsWrocAlWisn"), ("Kraków", "MpKrakBujaka")],
+        names=["Miejscowość", "Kod stacji"],
+    )
+    df = pd.DataFrame({0: times, 1: 10.0, 2: [20.0 if t.day <= 10 else 5.0 for t in times]})
+    df.columns = cols
+    long = convert_df(df)
+    daily = calc_daily_means(long, with_coverage=True)
+    return daily, calc_monthly_means(long), count_overnorm_days(daily, 15)
+
+
+def test_export_tables_and_query(tables, tmp_path):
+    """
+    Sprawdza, czy export_tables i query:
+    - zapisują wszystkie tabele z kolumną Województwo,
+    - zakładają indeksy na stacji, miejscowości, województwie i dacie,
+    - pozwalają odpowiedzieć zapytaniem SQL na pytanie o przekroczenia w województwie
+    """
+    daily, monthly, over = tables
+    db = tmp_path / "pm25.db"
+
+    written = export_tables(db, daily, monthly, over, wojew_dict={"Ds": "dolnośląskie", "Mp": "małopolskie"})
+    assert written == {"daily_means": len(daily), "monthly_means": len(monthly), "overnorm_days": len(over)}
+
+    with sqlite3.connect(db) as con:
+        indexed = {row[0] for row in con.execute("SELECT tbl_name FROM sqlite_master WHERE type = 'index'")}
+        columns = [row[1] for row in con.execute("PRAGMA table_info(daily_means)")]
+    assert indexed == {"daily_means", "monthly_means", "overnorm_days"}
+    assert "Województwo" in columns
+
+    out = query(
+        db,
+        'SELECT "Kod stacji", COUNT(*) AS dni FROM daily_means '
+        'WHERE "Województwo" = ? AND "Data" BETWEEN ? AND ? AND "Daily mean PM25" > ? '
+        'GROUP BY "Kod stacji"',
+        ("małopolskie", "2021-01-01", "2021-01-31", 15),
+    )
+    assert out.to_dict("records") == [{"Kod stacji": "MpKrakBujaka", "dni": 10}]
+
+
+def test_export_tables_replaces_and_rolls_back(tables, tmp_path):
+    """
+    Sprawdza, czy export_tables:
+    - zastępuje istniejące tabele przy ponownym zapisie,
+    - nie zmienia bazy, gdy zapis się nie powiedzie
+    """
+    daily, monthly, _ = tables
+    db = tmp_path / "pm25.db"
+    export_tables(db, daily=daily)
+    export_tables(db, daily=daily)
+    assert query(db, "SELECT COUNT(*) AS n FROM daily_means")["n"].iloc[0] == len(daily)
+
+    broken = monthly.drop(columns=["Kod stacji"])
+    with pytest.raises(KeyError):
+        export_tables(db, daily=daily.head(1), monthly=broken)
+    assert query(db, "SELECT COUNT(*) AS n FROM daily_means")["n"].iloc[0] == len(daily)
+
+
+def test_export_tables_lazy_batches(tables, tmp_path, monkeypatch):
+    """
+    Sprawdza, czy wiersze są tworzone leniwie i zapisywane fragmentami po batch_size wierszy
+    """
+    daily, _, _ = tables
+    monkeypatch.setattr(export_sql, "batch_size", 7)
+    assert isinstance(export_sql._rows(daily), types.GeneratorType)
+
+    db = tmp_path / "pm25.db"
+    export_tables(db, daily=daily)
+    out = query(db, 'SELECT * FROM daily_means ORDER BY "Kod stacji", "Data"')
+    assert len(out) == len(daily)
+    assert out["Data"].iloc[0] == "2021-01-01"
+    assert out["Daily mean PM25"].tolist() == daily.sort_values(["Kod stacji", "Data"])["Daily mean PM25"].tolist()
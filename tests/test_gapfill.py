@@ -0,0 +1,155 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from gapfill import fill_gaps, fill_linear, fill_neighbours, fill_previous_day, nearest_neighbours
+from stats import calc_daily_means, convert_df
+
+
+@pytest.fixture
+def df_pm25():
+    """
+    Dane PM2.5 z trzech stacji przez 10 dni; druga stacja to przeskalowana pierwsza
+    """
+    times = pd.date_range("2024-01-01 01:00", periods=10 * 24, freq="h")
+    times = times.where(times.hour != 0, times - pd.Timedelta(seconds=1))
+    base = 20 + 10 * np.sin(np.arange(len(times)) * 2 * np.pi / 24)
+    cols = pd.MultiIndex.from_tuples(
+        [("datetime", ""), ("Wrocław", "DsWrocAlWisn"), ("Wrocław", "DsWrocWybCon"), ("Kraków", "MpKrakBujaka")],
+        names=["Miejscowość", "Kod stacji"],
+    )
+    df = pd.DataFrame({0: times, 1: base, 2: 2 * base + 5, 3: np.full(len(times), 12.0)})
+    df.columns = cols
+    return df
+
+
+def test_fill_linear():
+    """
+    Sprawdza, czy fill_linear:
+    - interpoluje luki nie dłuższe niż max_gap,
+    - pozostawia luki dłuższe i luki na brzegach
+    """
+    values = np.array([[np.nan, 1.0], [1.0, np.nan], [np.nan, np.nan], [3.0, np.nan], [4.0, np.nan], [5.0, 6.0]])
+    out = fill_linear(values, max_gap=2)
+
+    assert np.isnan(out[0, 0])
+    assert out[2, 0] == pytest.approx(2.0)
+    assert np.isnan(out[1:5, 1]).all()
+
+
+def test_fill_linear_time_holes():
+    """
+    Sprawdza, czy fill_linear mierzy długość luki w godzinach, a nie w wierszach
+    """
+    times = pd.DatetimeIndex(["2024-01-01 01:00", "2024-01-01 02:00", "2024-01-01 06:00", "2024-01-01 07:00",
+                              "2024-01-01 08:00", "2024-01-01 09:00"])
+    values = np.array([[1.0], [np.nan], [5.0], [6.0], [np.nan], [8.0]])
+    out = fill_linear(values, max_gap=2, times=times)
+
+    assert np.isnan(out[1, 0])
+    assert out[4, 0] == pytest.approx(7.0)
+
+
+def test_nearest_neighbours_same_coords():
+    """
+    Sprawdza, czy nearest_neighbours nie wybiera stacji jako jej własnego sąsiada,
+    gdy dwie stacje mają te same współrzędne
+    """
+    stations = pd.MultiIndex.from_tuples(
+        [("A", "S1"), ("A", "S2"), ("B", "S3")], names=["Miejscowość", "Kod stacji"]
+    )
+    meta = pd.DataFrame({"Kod stacji": ["S1", "S2", "S3"], "WGS84 φ N": [51.0, 51.0, 52.0],
+                         "WGS84 λ E": [17.0, 17.0, 18.0]})
+    out = nearest_neighbours(stations, meta, k=2)
+
+    assert (out != np.arange(3)[:, None]).all()
+    assert out[0, 0] == 1 and out[1, 0] == 0
+    assert sorted(out[2]) == [0, 1]
+
+
+def test_fill_previous_day(df_pm25):
+    """
+    Sprawdza, czy fill_previous_day uzupełnia brak wartością z tej samej godziny poprzedniej doby
+    """
+    times = pd.DatetimeIndex(df_pm25[df_pm25.columns[0]])
+    values = df_pm25.iloc[:, 1:].to_numpy(dtype=float).copy()
+    values[30, 0] = np.nan
+    # usunięty wiersz nie przesuwa dopasowania
+    keep = np.ones(len(values), dtype=bool)
+    keep[10] = False
+
+    out = fill_previous_day(values[keep], times[keep])
+    assert out[29, 0] == values[6, 0]
+
+
+def test_fill_previous_day_duplicated_time(df_pm25):
+    """
+    Sprawdza, czy fill_previous_day działa przy powtórzonym znaczniku czasu
+    i bierze wtedy pierwsze wystąpienie godziny
+    """
+    times = pd.DatetimeIndex(df_pm25[df_pm25.columns[0]])
+    values = df_pm25.iloc[:, 1:].to_numpy(dtype=float).copy()
+    order = np.insert(np.arange(len(values)), 7, 6)
+    times, values = times[order], values[order]
+    values[7, 0] = -1.0
+    values[31, 0] = np.nan
+
+    out = fill_previous_day(values, times)
+    assert out[31, 0] == values[6, 0]
+
+
+def test_fill_neighbours_inactive_station():
+    """
+    Sprawdza, czy fill_neighbours:
+    - nie uzupełnia okresu przed pierwszym pomiarem stacji (np. brakującego roku),
+    - pomija luki dłuższe niż max_gap
+    """
+    hours = 24 * 400
+    x = 20 + 10 * np.sin(np.arange(hours) * 2 * np.pi / 24)
+    values = np.column_stack([2 * x + 5, x])
+    values[:24 * 366, 0] = np.nan            # stacja działa dopiero od drugiego roku
+    values[24 * 380:24 * 390, 0] = np.nan    # luka 10 dni
+    values[24 * 395:24 * 395 + 5, 0] = np.nan
+    neighbours = np.array([[1], [0]])
+
+    out = fill_neighbours(values, neighbours, min_overlap=48, max_gap=24 * 7)
+    assert np.isnan(out[:24 * 366, 0]).all()
+    assert np.isnan(out[24 * 380:24 * 390, 0]).all()
+    np.testing.assert_allclose(out[24 * 395:24 * 395 + 5, 0], 2 * x[24 * 395:24 * 395 + 5] + 5)
+
+
+def test_fill_gaps_and_imputed_flag(df_pm25):
+    """
+    Sprawdza, czy fill_gaps:
+    - stosuje metody po kolei i zapisuje, która metoda uzupełniła komórkę,
+    - odtwarza długą lukę regresją względem skorelowanej stacji,
+    - pozwala pominąć uzupełnione pomiary w średnich dziennych
+    """
+    df = df_pm25.copy()
+    truth = df.iloc[:, 1].copy()
+    df.iloc[50:52, 1] = np.nan          # krótka luka
+    df.iloc[100:140, 1] = np.nan        # długa luka
+    df.iloc[24:48, 3] = np.nan          # cała doba stałej stacji
+
+    filled, imputed = fill_gaps(df, methods=["linear", "neighbour"], max_gap=3, min_overlap=48)
+
+    station = ("Wrocław", "DsWrocAlWisn")
+    assert list(imputed[station].iloc[50:52]) == ["linear"] * 2
+    assert list(imputed[station].iloc[100:140].unique()) == ["neighbour"]
+    np.testing.assert_allclose(filled[station].iloc[100:140], truth.iloc[100:140], rtol=1e-2)
+    assert imputed[station].notna().sum() == 42
+
+    long = convert_df(filled, imputed)
+    assert long["Imputowane"].sum() == imputed.iloc[:, 1:].notna().sum().sum()
+
+    all_hours = calc_daily_means(long, with_coverage=True)
+    measured = calc_daily_means(long, with_coverage=True, include_imputed=False)
+    assert all_hours["Liczba godzin"].sum() - measured["Liczba godzin"].sum() == long["Imputowane"].sum()
+
+
+def test_fill_gaps_unknown_method(df_pm25):
+    """
+    Sprawdza, czy fill_gaps zgłasza błąd dla nieznanej metody
+    """
+    with pytest.raises(ValueError):
+        fill_gaps(df_pm25, methods=["spline"])
@@ -3,6 +3,11 @@ import pandas as pd
 import zipfile
 import pytest
 import io
+import hashlib
+import http.server
+import threading
+
+import requests
 
 import get_data
 
@@ -48,13 +53,18 @@ def test_download_gios_archive(zip_pm25_bytes, df_pm25):
     with patch("get_data.requests.get") as mock_get, patch(
         "get_data.pd.read_excel"
     ) as mock_xl:
-        mock_get.return_value = MagicMock()
+        mock_get.return_value = MagicMock(status_code=200, headers={})
         mock_get.return_value.raise_for_status.return_value = None
-        mock_get.return_value.content = zip_bytes
+        mock_get.return_value.iter_content.return_value = [zip_bytes]
         mock_xl.return_value = expected
 
         out = get_data.download_gios_archive(year, gios_id, filename)
-        mock_get.assert_called_once_with(f"{get_data.gios_archive_url}{gios_id}")
+        mock_get.assert_called_once_with(
+            f"{get_data.gios_archive_url}{gios_id}",
+            headers={},
+            stream=True,
+            timeout=get_data.download_timeout,
+        )
 
         mock_xl.assert_called_once()
         (arg0,), kwargs = mock_xl.call_args
@@ -93,13 +103,18 @@ def test_download_gios_meta():
     with patch("get_data.requests.get") as mock_get, patch(
         "get_data.pd.read_excel"
     ) as mock_xl:
-        mock_get.return_value = MagicMock()
+        mock_get.return_value = MagicMock(status_code=200, headers={})
         mock_get.return_value.raise_for_status.return_value = None
-        mock_get.return_value.content = fake_bytes
+        mock_get.return_value.iter_content.return_value = [fake_bytes]
         mock_xl.return_value = expected
 
         out = get_data.download_gios_meta(gios_id)
-        mock_get.assert_called_once_with(f"{get_data.gios_archive_url}{gios_id}")
+        mock_get.assert_called_once_with(
+            f"{get_data.gios_archive_url}{gios_id}",
+            headers={},
+            stream=True,
+            timeout=get_data.download_timeout,
+        )
 
         mock_xl.assert_called_once()
         (arg0,), _ = mock_xl.call_args
@@ -393,3 +408,348 @@ def test_make_pm25_data(mocker):
     assert mock_to_csv.call_args.args[0] is final_df
     assert mock_to_csv.call_args.args[1] == outfile
     assert mock_to_csv.call_args.kwargs.get("index") is None
+
+
+def test_read_pm25_csv(tmp_path):
+    """
+    Sprawdza, czy read_pm25_csv:
+    - odtwarza MultiIndex (Miejscowość, Kod stacji) z pliku zapisanego przez make_pm25_data,
+    - zamienia kolumnę datetime na typ datetime
+    """
+    df = pd.DataFrame(
+        {
+            "datetime": pd.to_datetime(["2015-01-01 01:00:00", "2015-01-01 23:59:59"]),
+            "DsJelGorOgin": [151.112, 262.566],
+            "DsWrocAlWisn": [78.0, 42.0],
+        }
+    )
+    meta = pd.DataFrame(
+        {
+            "Kod stacji": ["DsJelGorOgin", "DsWrocAlWisn"],
+            "Miejscowość": ["Jelenia Góra", "Wrocław"],
+        }
+    )
+    expected = get_data.add_city(df, meta)
+    path = tmp_path / "PM25.csv"
+    expected.to_csv(path, index=None)
+
+    out = get_data.read_pm25_csv(path)
+
+    pd.testing.assert_frame_equal(out, expected, check_dtype=False)
+
+
+class FlakyHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Serwer zastępczy: obsługuje nagłówek Range i zrywa połączenie
+    w połowie odpowiedzi dla pierwszych `drops` żądań
+    """
+
+    payload = b""
+    drops = 0
+    ranges = []
+
+    def do_GET(self):
+        cls = type(self)
+        cls.ranges.append(self.headers.get("Range"))
+        start = 0
+        if self.headers.get("Range"):
+            start = int(self.headers["Range"].split("=")[1].rstrip("-"))
+        body = cls.payload[start:]
+
+        self.send_response(206 if start else 200)
+        if start:
+            self.send_header("Content-Range", f"bytes {start}-{len(cls.payload) - 1}/{len(cls.payload)}")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if cls.drops > 0:
+            cls.drops -= 1
+            self.wfile.write(body[: len(body) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def flaky_server():
+    """Lokalny serwer HTTP z archiwum do pobrania; zwraca (adres, klasa handlera)"""
+    handler = type("Handler", (FlakyHandler,), {"payload": bytes(range(256)) * 4096, "drops": 0, "ranges": []})
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/archive", handler
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetch_bytes_resumes_after_disconnect(flaky_server):
+    """
+    Sprawdza, czy fetch_bytes:
+    - ponawia pobieranie po zerwanym połączeniu,
+    - wznawia od brakującego bajtu (Range) zamiast pobierać całość od nowa
+    """
+    url, handler = flaky_server
+    handler.drops = 2
+
+    out = get_data.fetch_bytes(url, backoff=0, sha256=hashlib.sha256(handler.payload).hexdigest())
+
+    assert out == handler.payload
+    assert handler.ranges[0] is None
+    assert len(handler.ranges) == 3
+    resumed_from = [int(r.split("=")[1].rstrip("-")) for r in handler.ranges[1:]]
+    assert 0 < resumed_from[0] < resumed_from[1] < len(handler.payload)
+
+
+def test_fetch_bytes_gives_up_and_checks_checksum(flaky_server):
+    """
+    Sprawdza, czy fetch_bytes:
+    - zgłasza błąd po wyczerpaniu liczby prób,
+    - odrzuca plik z niezgodną sumą kontrolną
+    """
+    url, handler = flaky_server
+    handler.drops = 10
+
+    with pytest.raises(requests.RequestException):
+        get_data.fetch_bytes(url, retries=2, backoff=0)
+    assert len(handler.ranges) == 3
+
+    handler.drops = 0
+    with pytest.raises(ValueError):
+        get_data.fetch_bytes(url, sha256="0" * 64)
+
+
+def test_fetch_bytes_cache_dir(flaky_server, tmp_path):
+    """
+    Sprawdza, czy fetch_bytes z katalogiem cache:
+    - wznawia pobieranie z pliku .part z poprzedniego uruchomienia,
+    - przy kolejnym wywołaniu używa zapisanego archiwum bez pobierania
+    """
+    url, handler = flaky_server
+    (tmp_path / "archive.part").write_bytes(handler.payload[:1000])
+
+    out = get_data.fetch_bytes(url, cache_dir=tmp_path, backoff=0)
+    again = get_data.fetch_bytes(url, cache_dir=tmp_path, backoff=0)
+
+    assert out == again == handler.payload
+    assert handler.ranges == ["bytes=1000-"]
+    assert not (tmp_path / "archive.part").exists()
+    assert (tmp_path / "archive.sha256").read_text() == hashlib.sha256(handler.payload).hexdigest()
+
+
+def test_make_multi_data_single_download(tmp_path, monkeypatch):
+    """
+    Sprawdza, czy make_multi_data:
+    - pobiera archiwum każdego roku tylko raz i wczytuje z niego kilka wskaźników,
+    - zwraca kolumny MultiIndex (Wskaźnik, Miejscowość, Kod stacji),
+    - pozwala wybrać jeden wskaźnik w formacie make_pm25_data
+    """
+    from synthetic import serve_directory, write_archive_set
+
+    config = write_archive_set(tmp_path / "archives", [2018], n_stations=3, pollutants=["PM25", "PM10"])
+    fetched = []
+    fetch = get_data.fetch_bytes
+    monkeypatch.setattr(get_data, "fetch_bytes", lambda url, **kw: fetched.append(url) or fetch(url, **kw))
+
+    with serve_directory(tmp_path / "archives") as url:
+        monkeypatch.setattr(get_data, "gios_archive_url", url)
+        df, _ = get_data.make_multi_data(
+            config["years"], config["gios_url_ids"], config["gios_files"],
+            config["clean_info"], tmp_path / "multi.csv", workers=2,
+        )
+
+    assert sorted(fetched) == sorted([f"{url}pm25_2018", f"{url}meta"])
+    assert df.columns.names == ["Wskaźnik", "Miejscowość", "Kod stacji"]
+    assert set(df.columns.get_level_values("Wskaźnik")[1:]) == {"PM25", "PM10"}
+    assert len(df) == 8760
+
+    pm10 = get_data.select_pollutant(df, "PM10")
+    assert pm10.columns.names == ["Miejscowość", "Kod stacji"]
+    assert len(pm10.columns) == 1 + 3
+
+    back = get_data.read_pm25_csv(tmp_path / "multi.csv", pollutants=True)
+    pd.testing.assert_frame_equal(back, df, check_dtype=False)
+
+
+def test_make_pm25_data_pollutant_in_later_years(tmp_path, monkeypatch):
+    """
+    Sprawdza, czy make_pm25_data ze słownikami plików:
+    - uwzględnia wskaźnik obecny tylko w późniejszych latach,
+    - przyjmuje samą nazwę pliku PM2.5 dla części lat,
+    - obsługuje join i validate jak dla jednego wskaźnika (raport z kolumną Wskaźnik)
+    """
+    from synthetic import serve_directory, write_archive_set
+
+    config = write_archive_set(tmp_path / "archives", [2015, 2018], n_stations=3, pollutants=["PM25", "PM10"])
+    files = dict(config["gios_files"])
+    files[2015] = files[2015]["PM25"]
+
+    with serve_directory(tmp_path / "archives") as url:
+        monkeypatch.setattr(get_data, "gios_archive_url", url)
+        df, _ = get_data.make_pm25_data(
+            config["years"], config["gios_url_ids"], files, config["clean_info"], tmp_path / "multi.csv",
+            join="outer", validate=True, workers=1,
+        )
+
+    assert list(dict.fromkeys(df.columns.get_level_values("Wskaźnik")[1:])) == ["PM25", "PM10"]
+    pm10 = get_data.select_pollutant(df, "PM10")
+    years = pm10[pm10.iloc[:, 1:].notna().any(axis=1)]["datetime"].dt.year
+    assert set(years) == {2018}
+    issues = pd.read_csv(tmp_path / "multi_issues.csv")
+    assert issues.columns[0] == "Wskaźnik"
+
+
+def test_concat_sparse_outer_join():
+    """
+    Sprawdza, czy concat_sparse:
+    - zachowuje stacje nieobecne w części lat (outer join),
+    - zapisuje kolumny stacji jako rzadkie, bez przechowywania braków,
+    - zamienia tekst z przecinkiem dziesiętnym na liczby
+    """
+    y1 = pd.DataFrame({
+        "datetime": pd.to_datetime(["2015-01-01 01:00", "2015-01-01 02:00"]),
+        "A": ["1,5", "2"],
+        "B": [3.0, None],
+    })
+    y2 = pd.DataFrame({
+        "datetime": pd.to_datetime(["2018-01-01 01:00", "2018-01-01 02:00"]),
+        "A": [4.0, 5.0],
+        "C": [6.0, 7.0],
+    })
+
+    df = get_data.concat_sparse([y1, y2])
+
+    assert list(df.columns) == ["datetime", "A", "B", "C"]
+    assert all(isinstance(df[c].dtype, pd.SparseDtype) for c in ["A", "B", "C"])
+    assert df["A"].sparse.to_dense().tolist() == [1.5, 2.0, 4.0, 5.0]
+    assert df["B"].array.sp_values.tolist() == [3.0]
+    assert df["C"].array.npoints == 2
+
+
+
+def test_to_quantized_round_trip(tmp_path):
+    """
+    Sprawdza, czy to_quantized:
+    - wybiera najmniejszą dokładność, przy której wartości są dokładne, i typ int16,
+    - przechodzi na int32, gdy zakres nie mieści się w int16,
+    - zapisuje braki jako wartość specjalną i odtwarza dane bez strat
+    """
+    import numpy as np
+
+    cols = pd.MultiIndex.from_tuples(
+        [("datetime", ""), ("Wrocław", "DsWrocAlWisn"), ("Kraków", "MpKrakBujaka")],
+        names=["Miejscowość", "Kod stacji"],
+    )
+    df = pd.DataFrame({
+        0: pd.date_range("2024-01-01 01:00", periods=4, freq="h"),
+        1: ["12,3", "0.5", None, "99.9"],
+        2: [7.25, np.nan, 3.0, 1.1],
+    })
+    df.columns = cols
+
+    q = get_data.to_quantized(df)
+    assert q.attrs["pm25_scale"] == 100
+    assert (q.dtypes.iloc[1:] == np.int16).all()
+    assert q.iloc[2, 1] == q.attrs["pm25_missing"] == np.iinfo(np.int16).min
+
+    back = get_data.from_quantized(q)
+    assert q.iloc[:, 1:].memory_usage(index=False).sum() * 4 == back.iloc[:, 1:].memory_usage(index=False).sum()
+    assert back.iloc[:, 1].tolist()[:2] == [12.3, 0.5]
+    np.testing.assert_array_equal(back.iloc[:, 2], df.iloc[:, 2])
+
+    wide = get_data.to_quantized(df, decimals=3)
+    assert (wide.dtypes.iloc[1:] == np.int32).all()
+    assert wide.iloc[3, 1] == 99_900
+
+    df.to_csv(tmp_path / "pm25.csv", index=False)
+    read = get_data.read_pm25_csv(tmp_path / "pm25.csv", quantized=True)
+    assert read.attrs["pm25_scale"] == 100
+    pd.testing.assert_frame_equal(read, q, check_dtype=False)
+
+
+def test_to_quantized_precision():
+    """
+    Sprawdza, czy to_quantized:
+    - zapisuje dane z 4 miejscami po przecinku (typowe dla GIOŚ) dokładnie w int32,
+    - zgłasza błąd zamiast zaokrąglać wartości, które nie są dokładne przy wybranej skali
+    """
+    import numpy as np
+
+    cols = pd.MultiIndex.from_tuples([("datetime", ""), ("Wrocław", "DsWrocAlWisn")],
+                                     names=["Miejscowość", "Kod stacji"])
+    df = pd.DataFrame({0: pd.date_range("2024-01-01 01:00", periods=3, freq="h"), 1: [33.8244, 151.112, 5.0]})
+    df.columns = cols
+
+    q = get_data.to_quantized(df)
+    assert q.attrs["pm25_scale"] == 10_000
+    assert q.dtypes.iloc[1] == np.int32
+    np.testing.assert_array_equal(get_data.from_quantized(q).iloc[:, 1], df.iloc[:, 1])
+
+    with pytest.raises(ValueError, match="dokładne"):
+        get_data.to_quantized(df, decimals=2)
+    df.iloc[0, 1] = 1.234567
+    with pytest.raises(ValueError, match="miejsc po przecinku"):
+        get_data.to_quantized(df)
+
+
+def _xlsx(sheet):
+    """Zapisuje surowy arkusz do pliku XLSX w pamięci."""
+    buf = io.BytesIO()
+    sheet.to_excel(buf, header=False, index=False)
+    return buf.getvalue()
+
+
+@pytest.mark.parametrize("year", [2015, 2018])
+def test_sniff_layout(year):
+    """
+    Sprawdza, czy sniff_layout rozpoznaje wiersz nagłówka i wiersze opisu
+    w układach arkuszy sprzed i po 2017 r.
+    """
+    from synthetic import clean_info_for, make_stations, make_year_sheet
+
+    sheet = make_year_sheet(year, make_stations(4))
+    assert get_data.sniff_layout(_xlsx(sheet)) == clean_info_for(year)
+
+
+def test_sniff_layout_without_label_and_errors():
+    """
+    Sprawdza, czy sniff_layout:
+    - znajduje wiersz nagłówka po kodach stacji, gdy brak etykiety "Kod stacji",
+    - zgłasza błąd, gdy w czytanych wierszach nie ma znacznika czasu
+    """
+    sheet = pd.DataFrame([
+        ["Nr", 1, 2],
+        [None, "DsWrocAlWisn", "MpKrakBujaka"],
+        ["Jednostka", "ug/m3", "ug/m3"],
+        ["2021-01-01 01:00:00", 10, 20],
+        ["2021-01-01 02:00:00", 11, 21],
+    ])
+    assert get_data.sniff_layout(_xlsx(sheet)) == {"header_row": 1, "drop_rows": [0, 1, 2]}
+
+    with pytest.raises(ValueError):
+        get_data.sniff_layout(_xlsx(sheet.iloc[:3]))
+    with pytest.raises(ValueError):
+        get_data.sniff_layout(_xlsx(sheet), max_rows=3)
+
+
+def test_make_pm25_data_detects_layout(tmp_path, monkeypatch, mocker):
+    """
+    Sprawdza, czy make_pm25_data bez clean_info:
+    - rozpoznaje układ arkuszy i daje ten sam wynik co z ręcznie podanymi parametrami,
+    - rozpakowuje każdy arkusz z archiwum tylko raz
+    """
+    from synthetic import serve_directory, write_archive_set
+
+    config = write_archive_set(tmp_path / "archives", [2015, 2018], n_stations=3)
+    with serve_directory(tmp_path / "archives") as url:
+        monkeypatch.setattr(get_data, "gios_archive_url", url)
+        args = (config["years"], config["gios_url_ids"], config["gios_pm25_file"])
+        opened = mocker.spy(zipfile.ZipFile, "open")
+        auto, _ = get_data.make_pm25_data(*args, None, tmp_path / "auto.csv")
+        members = [c.args[1] for c in opened.call_args_list if c.args[1] in config["gios_pm25_file"].values()]
+        assert sorted(members) == sorted(config["gios_pm25_file"].values())
+        manual, _ = get_data.make_pm25_data(*args, config["clean_info"], tmp_path / "manual.csv")
+
+    pd.testing.assert_frame_equal(auto, manual)
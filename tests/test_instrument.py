@@ -0,0 +1,100 @@
+import io
+import json
+
+import pandas as pd
+import pytest
+
+import get_data
+import instrument
+import stats
+from synthetic import serve_directory, write_archive_set
+
+
+def test_stage_disabled_emits_nothing():
+    """
+    Sprawdza, czy przy wyłączonej instrumentacji etapy nie emitują zdarzeń
+    """
+    events = []
+    instrument.add_hook(events.append)
+    try:
+        with instrument.stage("clean_pm25", year=2015) as st:
+            st.set(rows=1)
+    finally:
+        instrument.remove_hook(events.append)
+
+    assert events == []
+    assert not instrument.is_enabled()
+
+
+def test_stage_records_fields_and_errors():
+    """
+    Sprawdza, czy stage:
+    - zapisuje nazwę, pola dodatkowe, czasy i rozmiar danych,
+    - oznacza etap zakończony wyjątkiem jako "error" i przekazuje wyjątek dalej
+    """
+    with instrument.recording(memory=True) as events:
+        with instrument.stage("outer"):
+            with instrument.stage("clean_pm25", year=2015) as st:
+                st.set_result(pd.DataFrame({"a": range(10), "b": range(10)}))
+                big = list(range(100_000))
+            del big
+        with pytest.raises(KeyError):
+            with instrument.stage("midnight", year=2018):
+                raise KeyError("datetime")
+
+    inner, outer, failed = events
+    assert inner["stage"] == "clean_pm25" and inner["year"] == 2015
+    assert inner["rows"] == 10 and inner["cells"] == 20
+    assert inner["wall_s"] >= 0 and inner["cpu_s"] >= 0
+    assert outer["peak_mb"] >= inner["peak_mb"] > 1
+    assert failed["status"] == "error" and "KeyError" in failed["error"]
+    assert not instrument.is_enabled()
+
+
+def test_instrumented_stats_and_json_hook(tmp_path):
+    """
+    Sprawdza, czy funkcje stats.py emitują zdarzenia po włączeniu instrumentacji,
+    a json_hook zapisuje je jako JSON
+    """
+    long = pd.DataFrame(
+        {
+            "datetime": pd.to_datetime(["2015-01-01 01:00", "2015-01-01 02:00"]),
+            "Miejscowość": ["Wrocław", "Wrocław"],
+            "Kod stacji": ["DsWrocAlWisn", "DsWrocAlWisn"],
+            "PM25": [10.0, 20.0],
+        }
+    )
+    stream = io.StringIO()
+    hook = instrument.json_hook(stream)
+    instrument.add_hook(hook)
+    try:
+        with instrument.recording() as events:
+            stats.calc_daily_means(long)
+    finally:
+        instrument.remove_hook(hook)
+
+    assert [e["stage"] for e in events] == ["stats.calc_daily_means"]
+    assert json.loads(stream.getvalue())["rows"] == 1
+
+
+def test_make_pm25_data_stages(tmp_path, monkeypatch):
+    """
+    Sprawdza, czy make_pm25_data emituje zdarzenia dla każdego etapu i roku
+    """
+    config = write_archive_set(tmp_path / "archives", years=[2015], n_stations=2)
+
+    with serve_directory(tmp_path / "archives") as url, instrument.recording() as events:
+        monkeypatch.setattr(get_data, "gios_archive_url", url)
+        get_data.make_pm25_data(
+            config["years"], config["gios_url_ids"], config["gios_pm25_file"],
+            config["clean_info"], tmp_path / "PM25.csv",
+        )
+
+    names = [(e["stage"], e.get("year")) for e in events]
+    for expected in [
+        ("download", 2015), ("parse_excel", 2015), ("download_meta", None),
+        ("clean_pm25", 2015), ("midnight", 2015), ("update_stations", 2015),
+        ("concat", None), ("add_city", None), ("write_csv", None), ("make_pm25_data", None),
+    ]:
+        assert expected in names
+    assert all(e["status"] == "ok" for e in events)
@@ -0,0 +1,160 @@
+import asyncio
+import http.server
+import json
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from live import LiveBuffers, file_feed, http_feed, ingest, parse_records
+from stats import calc_daily_means, convert_df
+
+
+def _records(times, codes, values):
+    return [
+        {"Kod stacji": c, "datetime": t.strftime("%Y-%m-%d %H:%M:%S"), "PM25": None if np.isnan(v) else v}
+        for t, row in zip(times, values) for c, v in zip(codes, row)
+    ]
+
+
+@pytest.fixture
+def hourly():
+    """
+    Pomiary godzinowe dwóch stacji przez 3 doby (00:00 przesunięte na 23:59:59)
+    """
+    times = pd.date_range("2024-01-01 01:00", periods=72, freq="h")
+    times = times.where(times.hour != 0, times - pd.Timedelta(seconds=1))
+    rng = np.random.default_rng(1)
+    values = rng.uniform(0, 40, (72, 2))
+    values[5:9, 1] = np.nan
+    return times, ["DsWrocAlWisn", "MpKrakBujaka"], values
+
+
+def test_live_buffers_daily_means(hourly):
+    """
+    Sprawdza, czy LiveBuffers:
+    - liczy średnią bieżącej doby tak jak calc_daily_means,
+    - zgłasza przekroczenia dla każdej normy,
+    - liczy średnią z ostatnich 24 godzin
+    """
+    times, codes, values = hourly
+    buffers = LiveBuffers(codes, days=2, thresholds=[15.0, 25.0])
+    for t, row in zip(times[:48], values[:48]):
+        buffers.push(codes, [t] * 2, row)
+
+    cols = pd.MultiIndex.from_tuples(
+        [("datetime", ""), ("Wrocław", codes[0]), ("Kraków", codes[1])], names=["Miejscowość", "Kod stacji"]
+    )
+    df = pd.DataFrame({0: times, 1: values[:, 0], 2: values[:, 1]})
+    df.columns = cols
+    daily = calc_daily_means(convert_df(df))
+    second = daily[daily["Data"] == pd.Timestamp("2024-01-02").date()].set_index("Kod stacji").loc[codes]
+
+    status = buffers.status()
+    assert status["Doba"] == pd.Timestamp("2024-01-02")
+    np.testing.assert_allclose(status["Średnia dobowa"], second["Daily mean PM25"])
+    for t in [15.0, 25.0]:
+        assert (status[f"Przekroczenie {t}"] == (second["Daily mean PM25"] > t).to_numpy()).all()
+    np.testing.assert_allclose(status["Średnia 24h"], status["Średnia dobowa"])
+
+    buffers.push(codes, [times[48]] * 2, values[48])
+    status = buffers.status()
+    assert status["Doba"] == pd.Timestamp("2024-01-03")
+    assert list(status["Liczba godzin"]) == [1, 1]
+    np.testing.assert_allclose(status["Średnia 24h"], np.nanmean(values[25:49], axis=0))
+
+
+def test_live_buffers_ring(hourly):
+    """
+    Sprawdza, czy bufor:
+    - nadpisuje najstarsze godziny i pomija pomiary starsze niż okno,
+    - przyjmuje poprawki godzin z okna i dopisuje nowe stacje
+    """
+    times, codes, values = hourly
+    buffers = LiveBuffers(codes, days=1)
+    buffers.push(np.repeat(codes, 72), np.tile(times, 2), values.T.ravel())
+
+    np.testing.assert_array_equal(buffers.window(24), values[48:].T)
+    assert buffers.push(codes, [times[10]] * 2, [1.0, 1.0]) == 0
+
+    buffers.push(["DsWrocAlWisn", "PmGdaLeczk08"], [times[70], times[71]], [99.0, 5.0])
+    assert list(buffers.codes) == codes + ["PmGdaLeczk08"]
+    assert buffers.window(2)[0, 0] == 99.0
+    assert np.isnan(buffers.window(24)[2, :-1]).all()
+
+
+def test_parse_records_gios():
+    """
+    Sprawdza, czy parse_records obsługuje format API GIOŚ i zgłasza błąd dla nieznanego formatu
+    """
+    payload = {"Lista danych pomiarowych": [
+        {"Kod stanowiska": "DsWrocAlWisn-PM2.5-1g", "Data": "2024-01-01 01:00:00", "Wartość": 12.5},
+        {"Kod stanowiska": "DsWrocAlWisn-PM2.5-1g", "Data": "2024-01-01 02:00:00", "Wartość": None},
+    ]}
+    codes, times, values = parse_records(payload)
+
+    assert codes == ["DsWrocAlWisn"] * 2
+    assert times[1] == pd.Timestamp("2024-01-01 02:00")
+    assert values[0] == 12.5 and np.isnan(values[1])
+    with pytest.raises(ValueError):
+        parse_records({"data": []})
+
+
+def test_ingest_file_feed(hourly, tmp_path):
+    """
+    Sprawdza, czy ingest wczytuje pliki wrzucane do katalogu przy kolejnych odpytaniach
+    """
+    times, codes, values = hourly
+    (tmp_path / "a.json").write_text(json.dumps(_records(times[:24], codes, values[:24])), encoding="utf-8")
+    buffers = LiveBuffers(codes)
+    updates = []
+
+    async def run():
+        feed = file_feed(str(tmp_path))
+        await ingest(buffers, feed, ticks=1, on_update=updates.append)
+        (tmp_path / "b.json").write_text(json.dumps(_records(times[24:30], codes, values[24:30])), encoding="utf-8")
+        return await ingest(buffers, feed, interval=0, ticks=2, on_update=updates.append)
+
+    assert asyncio.run(run()) == 2
+    assert len(updates) == 3
+    assert updates[-1]["Ostatnia godzina"] == pd.Timestamp("2024-01-02 06:00")
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a.json.done", "b.json.done"]
+    np.testing.assert_allclose(buffers.window(30), values[:30].T)
+
+
+def test_ingest_http_feed(hourly):
+    """
+    Sprawdza, czy ingest odpytuje lokalny serwer HTTP i przekazuje błędy do on_error
+    """
+    times, codes, values = hourly
+    body = json.dumps(_records(times[:3], codes, values[:3])).encode()
+    requests_seen = []
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests_seen.append(self.path)
+            status = 200 if self.path == "/pm25" else 500
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    buffers = LiveBuffers(codes)
+    errors = []
+    try:
+        asyncio.run(ingest(buffers, http_feed(base + "/pm25"), interval=0, ticks=2))
+        asyncio.run(ingest(buffers, http_feed(base + "/down"), interval=0, ticks=1, on_error=errors.append))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert len(requests_seen) == 3
+    assert len(errors) == 1
+    np.testing.assert_allclose(buffers.window(3), values[:3].T)
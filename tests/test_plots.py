@@ -0,0 +1,156 @@
+import os
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # noqa: E402
+import pandas as pd  # noqa: E402
+import pytest  # noqa: E402
+
+import plots  # noqa: E402
+
+
+@pytest.fixture
+def city_monthly():
+    """
+    Średnie miesięczne PM2.5 dla pięciu miejscowości w dwóch latach
+    """
+    rows = [
+        {"Rok": year, "Miesiąc": month, "Miejscowość": f"Miasto{c}", "Mean PM25": 10 + c + month}
+        for year in [2015, 2018] for month in range(1, 13) for c in range(5)
+    ]
+    return pd.DataFrame(rows)
+
+
+def test_heatmaps_means_dynamic_grid(city_monthly):
+    """
+    Sprawdza, czy heatmaps_means dopasowuje siatkę do liczby miejscowości
+    """
+    fig = plots.heatmaps_means(city_monthly, years=[2015, 2018], ncols=2)
+    try:
+        visible = [ax for ax in fig.axes if ax.get_title()]
+        assert len(visible) == 5
+        assert fig.get_size_inches().tolist() == [12, 18]
+    finally:
+        plt.close(fig)
+
+
+def test_plot_means_headless(city_monthly):
+    """
+    Sprawdza, czy plot_means z show=False zwraca figurę zamiast ją wyświetlać
+    """
+    monthly = city_monthly.assign(**{"Kod stacji": "X"})
+    fig = plots.plot_means(monthly, cities=["Miasto0", "Miasto1"], years=[2015, 2018], show=False)
+    try:
+        assert len(fig.axes[0].lines) == 4
+    finally:
+        plt.close(fig)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_export_figures(city_monthly, tmp_path, workers):
+    """
+    Sprawdza, czy export_figures:
+    - zapisuje osobny plik dla każdej miejscowości (group_jobs),
+    - działa w procesach roboczych i zamyka wszystkie figury
+    """
+    jobs = plots.group_jobs("heatmaps_means", city_monthly, "Miejscowość", years=[2015, 2018])
+    paths = plots.export_figures(jobs, tmp_path / "out", fmt="svg", workers=workers)
+
+    assert [os.path.basename(p) for p in paths] == [f"heatmaps_means_Miasto{c}.svg" for c in range(5)]
+    assert all(os.path.getsize(p) > 0 for p in paths)
+    assert plt.get_fignums() == []
+
+
+def test_export_figures_per_year(city_monthly, tmp_path):
+    """
+    Sprawdza, czy export_figures rysuje wykresy plot_means dla pojedynczych lat
+    z tytułem zbudowanym z wybranych miejscowości i lat
+    """
+    monthly = city_monthly.assign(**{"Kod stacji": "X"})
+    jobs = plots.group_jobs("plot_means", monthly, by="Rok", group_param="years", cities=["Miasto2"])
+    paths = plots.export_figures(jobs, tmp_path, workers=1)
+    assert [os.path.basename(p) for p in paths] == ["plot_means_2015.png", "plot_means_2018.png"]
+
+    fig = plots.plot_means(monthly, cities=["Miasto2"], years=[2018], show=False)
+    try:
+        assert fig.axes[0].get_title() == "Trend średnich miesięcznych PM2.5: Miasto2, lata 2018"
+    finally:
+        plt.close(fig)
+
+
+@pytest.mark.parametrize("method", ["envelope", "lttb"])
+def test_plot_timeseries(method):
+    """
+    Sprawdza, czy plot_timeseries rysuje serie wielu stacji z piramidy w wybranej rozdzielczości
+    """
+    from pyramid import Pyramid
+
+    times = pd.date_range("2024-01-01 01:00", periods=60 * 24, freq="h")
+    cols = pd.MultiIndex.from_tuples(
+        [("datetime", ""), ("Wrocław", "DsWrocAlWisn"), ("Kraków", "MpKrakBujaka")],
+        names=["Miejscowość", "Kod stacji"],
+    )
+    df = pd.DataFrame({0: times, 1: range(len(times)), 2: 10.0})
+    df.columns = cols
+
+    fig = plots.plot_timeseries(
+        Pyramid(df), ["DsWrocAlWisn", "MpKrakBujaka"], max_points=100, method=method, show=False
+    )
+    try:
+        lines = fig.axes[0].lines
+        assert len(lines) == 2
+        assert all(len(line.get_xdata()) <= 100 for line in lines)
+    finally:
+        plt.close(fig)
+
+
+def test_month_cube(city_monthly):
+    """
+    Sprawdza, czy MonthCube:
+    - uśrednia stacje miejscowości tak jak calc_monthly_city_means,
+    - zwraca NaN dla miejscowości i lat spoza danych,
+    - może zastąpić tabelę w heatmaps_means i plot_means
+    """
+    import numpy as np
+
+    from stats import calc_monthly_city_means
+
+    stations = pd.concat([
+        city_monthly.assign(**{"Kod stacji": "A"}),
+        city_monthly.assign(**{"Kod stacji": "B", "Mean PM25": city_monthly["Mean PM25"] * 3}),
+    ])
+    stations.loc[stations.index[:3], "Mean PM25"] = np.nan
+    cube = plots.MonthCube.from_means(stations)
+    expected = calc_monthly_city_means(stations)
+
+    data = cube.select(["Miasto2", "Brak"], [2018, 2016])
+    row = expected[(expected["Miejscowość"] == "Miasto2") & (expected["Rok"] == 2018)].sort_values("Miesiąc")
+    np.testing.assert_allclose(data[0, 0], row["Mean PM25"])
+    assert np.isnan(data[1]).all() and np.isnan(data[:, 1]).all()
+    assert cube.values.shape == (5, 2, 12)
+
+    fig = plots.heatmaps_means(cube, years=[2015, 2018], ncols=2)
+    other = plots.plot_means(cube, cities=["Miasto0", "Miasto1"], years=[2015, 2018], show=False)
+    try:
+        assert len([ax for ax in fig.axes if ax.get_title()]) == 5
+        assert len(other.axes[0].lines) == 4
+    finally:
+        plt.close(fig)
+        plt.close(other)
+
+
+def test_plot_means_ci(city_monthly):
+    """
+    Sprawdza, czy plot_means rysuje pasma przedziałów ufności z bootstrap_means
+    """
+    ci = city_monthly.assign(**{"Dolna granica": city_monthly["Mean PM25"] - 1,
+                                "Górna granica": city_monthly["Mean PM25"] + 1})
+    fig = plots.plot_means(city_monthly, cities=["Miasto0", "Miasto1"], years=[2015, 2018], show=False, ci=ci)
+    try:
+        ax = fig.axes[0]
+        assert len(ax.lines) == 4
+        assert len(ax.collections) == 4
+    finally:
+        plt.close(fig)
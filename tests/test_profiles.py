@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from profiles import calc_profiles, hourly_cube
+
+
+@pytest.fixture
+def df_pm25():
+    """
+    Dane PM2.5 z dwóch stacji przez 14 dni (z godziną 24:00 przesuniętą przez midnight)
+    """
+    times = pd.date_range("2024-01-01 01:00", periods=14 * 24, freq="h")
+    times = times.where(times.hour != 0, times - pd.Timedelta(seconds=1))
+    hours = (np.arange(len(times)) % 24).astype(float)
+    cols = pd.MultiIndex.from_tuples(
+        [("datetime", ""), ("Wrocław", "DsWrocAlWisn"), ("Kraków", "MpKrakBujaka")],
+        names=["Miejscowość", "Kod stacji"],
+    )
+    df = pd.DataFrame({0: times, 1: hours, 2: [str(h).replace(".", ",") for h in hours * 2]})
+    df.columns = cols
+    return df
+
+
+def test_hourly_cube(df_pm25):
+    """
+    Sprawdza, czy hourly_cube:
+    - układa dane w tablicę (doba, godzina, stacja),
+    - przypisuje pomiar z 23:59:59 do ostatniej godziny tej samej doby
+    """
+    cube, days, stations = hourly_cube(df_pm25)
+
+    assert cube.shape == (14, 24, 2)
+    assert days[0] == pd.Timestamp("2024-01-01")
+    np.testing.assert_array_equal(cube[0, :, 0], np.arange(24))
+    assert cube[0, 23, 1] == 46.0
+
+
+def test_hourly_cube_sparse_days_and_duplicates(df_pm25):
+    """
+    Sprawdza, czy hourly_cube:
+    - obejmuje tylko doby obecne w danych (bez pustych lat między nimi),
+    - uśrednia pomiary z powtórzonym znacznikiem czasu, pomijając braki
+    """
+    later = df_pm25.iloc[:24].copy()
+    later[later.columns[0]] += pd.DateOffset(years=3)
+    duplicate = df_pm25.iloc[[5, 5]].copy()
+    duplicate.iloc[0, 1], duplicate.iloc[1, 1] = 11.0, np.nan
+    df = pd.concat([df_pm25, duplicate, later], ignore_index=True)
+
+    cube, days, _ = hourly_cube(df)
+
+    assert cube.shape == (15, 24, 2)
+    assert days[-1] == pd.Timestamp("2027-01-01")
+    assert cube[0, 5, 0] == pytest.approx((5.0 + 11.0) / 2)
+    np.testing.assert_array_equal(cube[-1, :, 0], np.arange(24))
+
+
+def test_calc_profiles_weekday(df_pm25):
+    """
+    Sprawdza, czy calc_profiles:
+    - zwraca średnie dla każdej stacji, dnia tygodnia i godziny,
+    - pomija brakujące pomiary i liczy liczbę godzin
+    """
+    df = df_pm25.copy()
+    df.iloc[0, 1] = np.nan  # poniedziałek 2024-01-01, godzina 0
+
+    out = calc_profiles(df, kind="weekday")
+
+    assert len(out) == 2 * 7 * 24
+    row = out[
+        (out["Kod stacji"] == "DsWrocAlWisn") & (out["Dzień tygodnia"] == 0) & (out["Godzina"] == 0)
+    ].iloc[0]
+    assert row["Liczba godzin"] == 1
+    assert row["Mean PM25"] == 0.0
+
+    krak = out[out["Kod stacji"] == "MpKrakBujaka"]
+    np.testing.assert_allclose(krak["Mean PM25"], 2 * krak["Godzina"])
+
+
+def test_calc_profiles_month_filter(df_pm25):
+    """
+    Sprawdza, czy calc_profiles z kind="month" i filtrem miesięcy zwraca tylko wybrane miesiące
+    """
+    out = calc_profiles(df_pm25, kind="month", months=[1])
+
+    jan = out[out["Miesiąc"] == 1]
+    assert (jan["Liczba godzin"] == 14).all()
+    assert out.loc[out["Miesiąc"] != 1, "Mean PM25"].isna().all()
+
+
+def test_heatmap_profile_missing_weekdays():
+    """
+    Sprawdza, czy heatmap_profile opisuje dni tygodnia według ich numerów,
+    gdy w profilu brakuje części dni
+    """
+    import matplotlib.pyplot as plt
+
+    import plots
+
+    profile = pd.DataFrame(
+        [{"Dzień tygodnia": d, "Godzina": h, "Kod stacji": "X", "Miejscowość": "Miasto0", "Mean PM25": d + h}
+         for d in [3, 4, 5, 6] for h in range(24)]
+    )
+    fig = plots.heatmap_profile(profile)
+    try:
+        labels = [t.get_text() for t in fig.axes[0].get_yticklabels()]
+        assert labels == ["Cz", "Pt", "So", "Nd"]
+    finally:
+        plt.close(fig)
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pyramid import Pyramid, lttb
+from stats import calc_daily_means, calc_monthly_means, convert_df
+
+
+@pytest.fixture
+def df_pm25():
+    """
+    Dane PM2.5 z dwóch stacji przez 90 dni (z brakami i godziną 24:00 przesuniętą przez midnight)
+    """
+    times = pd.date_range("2024-01-01 01:00", periods=90 * 24, freq="h")
+    times = times.where(times.hour != 0, times - pd.Timedelta(seconds=1))
+    rng = np.random.default_rng(0)
+    a = rng.uniform(5, 60, len(times))
+    b = rng.uniform(5, 60, len(times))
+    a[rng.random(len(times)) < 0.1] = np.nan
+    b[100:200] = np.nan
+    cols = pd.MultiIndex.from_tuples(
+        [("datetime", ""), ("Wrocław", "DsWrocAlWisn"), ("Kraków", "MpKrakBujaka")],
+        names=["Miejscowość", "Kod stacji"],
+    )
+    df = pd.DataFrame({0: times, 1: a, 2: b})
+    df.columns = cols
+    return df
+
+
+def test_pyramid_levels_match_stats(df_pm25):
+    """
+    Sprawdza, czy poziomy piramidy:
+    - mają średnie dobowe i miesięczne równe calc_daily_means i calc_monthly_means,
+    - zawierają minimum i maksimum pomiarów godzinowych
+    """
+    pyramid = Pyramid(df_pm25)
+    long = convert_df(df_pm25)
+
+    daily = calc_daily_means(long)
+    daily = daily[daily["Kod stacji"] == "MpKrakBujaka"]
+    _, day = pyramid.series("MpKrakBujaka", level="day")
+    np.testing.assert_allclose(day["mean"], daily["Daily mean PM25"])
+
+    monthly = calc_monthly_means(long)
+    monthly = monthly[monthly["Kod stacji"] == "DsWrocAlWisn"]
+    _, month = pyramid.series("DsWrocAlWisn", level="month")
+    np.testing.assert_allclose(month["mean"], monthly["Mean PM25"])
+
+    station = long[long["Kod stacji"] == "DsWrocAlWisn"]
+    assert month["min"].min() == station["PM25"].min()
+    assert month["max"].max() == station["PM25"].max()
+    assert month["count"].sum() == station["PM25"].notna().sum()
+
+
+def test_pyramid_level_for(df_pm25):
+    """
+    Sprawdza, czy piramida wybiera najdrobniejszy poziom mieszczący się w limicie punktów
+    """
+    pyramid = Pyramid(df_pm25)
+
+    assert pyramid.level_for("2024-01-01", "2024-01-10", max_points=500) == "hour"
+    assert pyramid.level_for(max_points=500) == "day"
+    assert pyramid.level_for(max_points=20) == "week"
+    assert pyramid.level_for(max_points=5) == "month"
+
+    level, df = pyramid.series("DsWrocAlWisn", "2024-02-01", "2024-02-29", max_points=50)
+    assert level == "day"
+    assert df["datetime"].iloc[0] == pd.Timestamp("2024-02-01")
+    assert len(df) == 29
+
+
+def test_lttb():
+    """
+    Sprawdza, czy lttb:
+    - zwraca zadaną liczbę punktów z pierwszym i ostatnim,
+    - zachowuje pojedynczy szczyt,
+    - pomija braki danych
+    """
+    x = pd.date_range("2024-01-01", periods=10_000, freq="h").to_numpy()
+    y = np.sin(np.arange(10_000) / 200)
+    y[5_000] = 50.0
+    y[100:110] = np.nan
+
+    keep = lttb(x, y, 300)
+
+    assert len(keep) == 300
+    assert keep[0] == 0 and keep[-1] == 9_999
+    assert 5_000 in keep
+    assert not np.isnan(y[keep]).any()
+    assert (np.diff(keep) > 0).all()
+    assert len(lttb(x[:50], y[:50], 300)) == 50
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from quantiles import TDigest, build_sketches, calc_quantiles, merge_sketches, sketch_quantiles
+
+
+@pytest.fixture
+def daily():
+    """
+    Dzienne średnie PM2.5 dla trzech stacji z dwóch województw w jednym roku
+    """
+    rng = np.random.default_rng(0)
+    dates = pd.date_range("2015-01-01", "2015-12-31", freq="D").date
+    frames = []
+    for city, code in [
+        ("Wrocław", "DsWrocAlWisn"),
+        ("Wrocław", "DsWrocWybCon"),
+        ("Kraków", "MpKrakBujaka"),
+    ]:
+        frames.append(
+            pd.DataFrame(
+                {
+                    "Rok": 2015,
+                    "Data": dates,
+                    "Miejscowość": city,
+                    "Kod stacji": code,
+                    "Daily mean PM25": rng.gamma(2.0, 10.0, len(dates)),
+                }
+            )
+        )
+    return pd.concat(frames, ignore_index=True)
+
+
+def test_calc_quantiles_exact(daily):
+    """
+    Sprawdza, czy calc_quantiles w trybie exact:
+    - liczy kwantyle dla każdej stacji i roku,
+    - nazywa kolumny zgodnie z rzędem kwantyla (np. P90.4)
+    """
+    out = calc_quantiles(daily, q=[0.5, 0.904])
+
+    assert list(out.columns) == ["Rok", "Miejscowość", "Kod stacji", "P50", "P90.4"]
+    values = daily.loc[daily["Kod stacji"] == "MpKrakBujaka", "Daily mean PM25"]
+    row = out[out["Kod stacji"] == "MpKrakBujaka"].iloc[0]
+    assert row["P50"] == pytest.approx(np.quantile(values, 0.5))
+    assert row["P90.4"] == pytest.approx(np.quantile(values, 0.904))
+
+
+def test_calc_quantiles_sketch_close_to_exact(daily):
+    """
+    Sprawdza, czy tryb sketch:
+    - daje wyniki bliskie dokładnym kwantylom,
+    - obsługuje grupowanie po województwach
+    """
+    wojew_dict = {"Ds": "dolnośląskie", "Mp": "małopolskie"}
+    exact = calc_quantiles(daily, q=[0.5, 0.95], by="Województwo", wojew_dict=wojew_dict)
+    sketch = calc_quantiles(
+        daily, q=[0.5, 0.95], by="Województwo", wojew_dict=wojew_dict, method="sketch"
+    )
+
+    exact = exact.set_index(["Rok", "Województwo"]).sort_index()
+    sketch = sketch.set_index(["Rok", "Województwo"]).sort_index()
+    np.testing.assert_allclose(sketch.to_numpy(), exact.to_numpy(), rtol=0.05)
+
+
+def test_merge_sketches_matches_full_data(daily):
+    """
+    Sprawdza, czy połączenie szkiców z dwóch partii danych:
+    - daje te same grupy co szkic z pełnych danych,
+    - zachowuje liczbę obserwacji i przybliża kwantyle
+    """
+    half = len(daily) // 2
+    part1 = build_sketches(daily.iloc[:half], by="Miejscowość")
+    part2 = build_sketches(daily.iloc[half:], by="Miejscowość")
+    merged = merge_sketches(part1, part2)
+
+    assert merged[(2015, "Wrocław")].count == 2 * 365
+    out = sketch_quantiles(merged, [0.95], ["Rok", "Miejscowość"]).set_index("Miejscowość")
+    expected = daily.groupby("Miejscowość")["Daily mean PM25"].quantile(0.95)
+    np.testing.assert_allclose(out["P95"], expected[out.index], rtol=0.05)
+
+
+def test_tdigest_roundtrip():
+    """
+    Sprawdza, czy szkic zapisany do słownika i odtworzony zwraca te same kwantyle
+    """
+    digest = TDigest(compression=50).update(np.arange(1000.0))
+    restored = TDigest.from_dict(digest.to_dict())
+
+    np.testing.assert_allclose(restored.quantile([0.1, 0.9]), digest.quantile([0.1, 0.9]))
+    assert digest.quantile(0.5) == pytest.approx(499.5, rel=0.02)
+
+
+def test_sketches_empty_input(daily):
+    """
+    Sprawdza, czy build_sketches zwraca puste szkice dla pustych danych,
+    a dla samych braków szkice z kwantylami NaN
+    """
+    assert build_sketches(daily.head(0)) == {}
+    assert calc_quantiles(daily.head(0), method="sketch").empty
+
+    missing = daily.assign(**{"Daily mean PM25": np.nan})
+    out = calc_quantiles(missing, q=[0.5], method="sketch")
+    assert len(out) == 3
+    assert out["P50"].isna().all()
@@ -0,0 +1,93 @@
+import concurrent.futures
+import io
+import json
+import urllib.error
+import urllib.request
+
+import pandas as pd
+import pytest
+
+from service import Dataset, running
+
+
+@pytest.fixture
+def dataset():
+    """
+    Dane dwóch stacji z dwóch województw przez styczeń 2021
+    """
+    times = pd.date_range("2021-01-01 01:00", periods=31 * 24, freq="h")
+    times = times.where(times.hour != 0, times - pd.Timedelta(seconds=1))
+    cols = pd.MultiIndex.from_tuples(
+        [("datetime", ""), ("Wrocław", "DsWrocAlWisn"), ("Kraków", "MpKrakBujaka")],
+        names=["Miejscowość", "Kod stacji"],
+    )
+    df = pd.DataFrame({0: times, 1: 10.0, 2: [20.0 if t.day <= 10 else 5.0 for t in times]})
+    df.columns = cols
+    return Dataset(df, wojew_dict={"Ds": "dolnośląskie", "Mp": "małopolskie"})
+
+
+def get(url):
+    """Wysyła zapytanie GET i zwraca status oraz treść odpowiedzi."""
+    try:
+        with urllib.request.urlopen(url) as r:
+            return r.status, r.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+
+def test_service_endpoints(dataset):
+    """
+    Sprawdza, czy serwer:
+    - zwraca średnie miesięczne, liczby dni z przekroczeniem, ranking i zestawienie województw jako JSON,
+    - zwraca CSV dla format=csv,
+    - odpowiada błędem 400/404 dla złych parametrów i adresów
+    """
+    with running(dataset) as url:
+        status, body = get(f"{url}/monthly?station=MpKrakBujaka")
+        assert status == 200
+        rows = json.loads(body)
+        assert rows[0]["Kod stacji"] == "MpKrakBujaka"
+        long = dataset.long
+        january = long[(long["Kod stacji"] == "MpKrakBujaka") & (long["datetime"].dt.month == 1)]
+        assert rows[0]["Miesiąc"] == 1
+        assert rows[0]["Mean PM25"] == pytest.approx(january["PM25"].mean())
+
+        over = json.loads(get(f"{url}/overnorm?threshold=15")[1])
+        assert {r["Kod stacji"]: r["Liczba dni PM25 > 15.0"] for r in over} == {"MpKrakBujaka": 10}
+
+        ranking = json.loads(get(f"{url}/ranking?n=1")[1])
+        assert ranking[0]["Kod stacji"] == "MpKrakBujaka"
+
+        wojew = json.loads(get(f"{url}/wojewodztwa?year=2021")[1])
+        assert {r["Województwo"]: r["Liczba dni"] for r in wojew} == {"małopolskie": 10, "dolnośląskie": 0}
+
+        status, body = get(f"{url}/daily?city=Wroc%C5%82aw&start=2021-01-05&end=2021-01-06&format=csv")
+        daily = pd.read_csv(io.BytesIO(body))
+        assert status == 200 and len(daily) == 2
+
+        assert get(f"{url}/monthly?year=abc")[0] == 400
+        assert get(f"{url}/monthly?colour=red")[0] == 400
+        assert get(f"{url}/unknown")[0] == 404
+
+        dataset.wojew_dict = {"Ds": "dolnośląskie"}
+        status, body = get(f"{url}/wojewodztwa?year=2021&threshold=20")
+        assert status == 500 and "KeyError" in json.loads(body)["error"]
+
+
+def test_service_cache_and_concurrency(dataset, mocker):
+    """
+    Sprawdza, czy serwer:
+    - liczy odpowiedź na to samo zapytanie tylko raz, także przy równoległych zapytaniach,
+    - obsługuje wiele równoległych zapytań
+    """
+    spy = mocker.spy(dataset, "overnorm")
+    with running(dataset) as url:
+        with concurrent.futures.ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(get, [f"{url}/overnorm?threshold={t}" for t in [10, 15] * 8]))
+
+    assert all(status == 200 for status, _ in results)
+    assert results[0][1] == results[2][1]
+    assert spy.call_count == 2
+    with running(dataset) as url:
+        get(f"{url}/overnorm?threshold=10")
+    assert spy.call_count == 2
@@ -0,0 +1,166 @@
+import os
+import subprocess
+import sys
+
+import pandas as pd
+import pytest
+
+import get_data
+import sharded
+from synthetic import serve_directory, write_archive_set
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_sharded_build_matches_make_multi_data(tmp_path, monkeypatch):
+    """
+    Sprawdza, czy budowa podzielona na zadania (rok, wskaźnik):
+    - jest wykonywana przez kilka niezależnych procesów pracowników,
+    - po merge daje ten sam zbiór co make_multi_data
+    """
+    config = write_archive_set(tmp_path / "archives", years=[2015, 2018], n_stations=4,
+                               pollutants=["PM25", "PM10"], seed=3)
+    root = tmp_path / "build"
+
+    with serve_directory(tmp_path / "archives") as url:
+        sharded.create_manifest(root, config["years"], config["gios_url_ids"], config["gios_files"],
+                                config["clean_info"], archive_url=url)
+        workers = [
+            subprocess.Popen(
+                [sys.executable, "-c", f"import sharded; print(len(sharded.work({str(root)!r}, worker='w{k}')))"],
+                cwd=repo_root, stdout=subprocess.PIPE, text=True,
+            )
+            for k in range(3)
+        ]
+        done = [int(w.communicate(timeout=120)[0]) for w in workers]
+        assert all(w.returncode == 0 for w in workers)
+
+        df, meta = sharded.merge(root, tmp_path / "sharded.csv")
+
+        monkeypatch.setattr(get_data, "gios_archive_url", url)
+        expected, _ = get_data.make_multi_data(
+            config["years"], config["gios_url_ids"], config["gios_files"], config["clean_info"],
+            tmp_path / "multi.csv", workers=1,
+        )
+
+    assert sum(done) == 4
+    status = sharded.Manifest(root).status()
+    assert (status["Stan"] == "done").all() and (status["Próby"] == 1).all()
+    pd.testing.assert_frame_equal(df, expected)
+    assert (tmp_path / "sharded.csv").read_text() == (tmp_path / "multi.csv").read_text()
+
+
+def test_manifest_leasing(tmp_path, monkeypatch):
+    """
+    Sprawdza, czy manifest:
+    - nie wydaje dwa razy tego samego zadania,
+    - oddaje zadanie innemu pracownikowi po wygaśnięciu dzierżawy,
+    - po max_attempts nieudanych próbach oznacza zadanie jako nieudane, a merge zgłasza błąd
+    """
+    root = tmp_path / "build"
+    sharded.create_manifest(root, [2015, 2018], {2015: "a", 2018: "b", "meta": "m"},
+                            {2015: "2015.xlsx", 2018: "2018.xlsx"})
+    manifest = sharded.Manifest(root)
+
+    first, second = manifest.claim("w1"), manifest.claim("w2")
+    assert {first["id"], second["id"]} == {"PM25_2015", "PM25_2018"}
+    assert manifest.claim("w3") is None
+
+    monkeypatch.setattr(sharded, "lease_seconds", -1)
+    assert manifest.renew(first["id"], "w1")
+    assert manifest.claim("w3")["id"] == first["id"]
+    assert not manifest.renew(first["id"], "w1")
+
+    monkeypatch.setattr(sharded, "max_attempts", 2)
+    manifest.fail(first["id"], "w1", "stary pracownik")
+    manifest.fail(first["id"], "w3", "błąd")
+    assert not manifest.complete(second["id"], "w1")
+    assert manifest.complete(second["id"], "w2")
+
+    status = manifest.status().set_index("Zadanie")
+    assert status.loc[first["id"], "Stan"] == "failed"
+    assert status.loc[first["id"], "Błąd"] == "błąd"
+    assert status.loc[second["id"], "Stan"] == "done"
+    with pytest.raises(RuntimeError, match=first["id"]):
+        sharded.merge(root, tmp_path / "out.csv")
+
+
+def test_manifest_mixed_files(tmp_path):
+    """
+    Sprawdza, czy manifest przyjmuje samą nazwę pliku PM2.5 dla części lat
+    przy słownikach plików w pozostałych
+    """
+    root = tmp_path / "build"
+    sharded.create_manifest(root, [2015, 2018], {2015: "a", 2018: "b", "meta": "m"},
+                            {2015: "2015.xlsx", 2018: {"PM25": "pm25.xlsx", "PM10": "pm10.xlsx"}})
+    manifest = sharded.Manifest(root)
+
+    assert manifest.config["multi"]
+    assert sorted(manifest.jobs) == ["PM10_2018", "PM25_2015", "PM25_2018"]
+
+
+def test_manifest_expired_attempts(tmp_path, monkeypatch):
+    """
+    Sprawdza, czy manifest:
+    - nie tworzy stanu zadań od nowa przy ponownym create_manifest,
+    - oznacza jako nieudane zadanie, którego dzierżawa wygasła po max_attempts próbach
+    """
+    root = tmp_path / "build"
+    args = (root, [2015], {2015: "a", "meta": "m"}, {2015: "2015.xlsx"})
+    sharded.create_manifest(*args)
+    manifest = sharded.Manifest(root)
+    monkeypatch.setattr(sharded, "lease_seconds", -1)
+    monkeypatch.setattr(sharded, "max_attempts", 2)
+
+    assert manifest.claim("w1")["id"] == "PM25_2015"
+    sharded.create_manifest(*args)
+    assert manifest.claim("w2")["id"] == "PM25_2015"
+    assert manifest.claim("w3") is None
+
+    status = manifest.status()
+    assert list(status["Stan"]) == ["failed"]
+    assert list(status["Próby"]) == [2]
+    assert "w2" in status["Błąd"][0]
+
+
+def test_work_records_failures(tmp_path, monkeypatch):
+    """
+    Sprawdza, czy pracownik zwalnia zadanie po błędzie i kończy pracę, gdy nie ma wolnych zadań
+    """
+    monkeypatch.setattr(get_data, "download_retries", 0)
+    monkeypatch.setattr(sharded, "max_attempts", 2)
+    root = tmp_path / "build"
+    sharded.create_manifest(root, [2015], {2015: "a", "meta": "m"}, {2015: "2015.xlsx"},
+                            archive_url="http://127.0.0.1:9/")
+
+    assert sharded.work(root, worker="w1", wait=False) == []
+
+    status = sharded.Manifest(root).status()
+    assert list(status["Stan"]) == ["failed"]
+    assert list(status["Próby"]) == [2]
+    assert "ConnectionError" in status["Błąd"][0]
+
+
+def test_cli_shard(tmp_path, capsys):
+    """
+    Sprawdza, czy podkomenda shard tworzy manifest z pliku konfiguracji i wypisuje stan zadań
+    """
+    import json
+
+    import cli
+
+    config = tmp_path / "config.json"
+    config.write_text(json.dumps({
+        "years": [2015, 2018],
+        "gios_url_ids": {"2015": "236", "2018": "603", "meta": "622"},
+        "gios_pm25_file": {"2015": "2015_PM25_1g.xlsx", "2018": "2018_PM25_1g.xlsx"},
+    }))
+    root = tmp_path / "build"
+
+    cli.main(["shard", "init", "--root", str(root), "--config", str(config)])
+    capsys.readouterr()
+    cli.main(["shard", "status", "--root", str(root)])
+
+    out = capsys.readouterr().out
+    assert "PM25_2015" in out and "PM25_2018" in out
+    assert sharded.Manifest(root).jobs["PM25_2018"]["clean_info"] is None
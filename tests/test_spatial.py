@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from spatial import StationIndex, idw_grid, idw_points, pivot_means, station_coords
+
+
+@pytest.fixture
+def meta():
+    """
+    Metadane GIOŚ ze współrzędnymi trzech stacji
+    """
+    return pd.DataFrame(
+        {
+            "Kod stacji": ["MzWarAlNiepo", "MpKrakBujaka", "SlKatoKossut"],
+            "Miejscowość": ["Warszawa", "Kraków", "Katowice"],
+            "WGS84 φ N": ["52,219298", "50.057447", "50.246428"],
+            "WGS84 λ E": [21.004724, 19.926189, 19.019421],
+        }
+    )
+
+
+@pytest.fixture
+def daily():
+    """
+    Dzienne średnie PM2.5 dla trzech stacji w dwóch dniach (jeden brak pomiaru)
+    """
+    return pd.DataFrame(
+        {
+            "Rok": 2024,
+            "Data": pd.to_datetime(["2024-01-01"] * 3 + ["2024-01-02"] * 3).date,
+            "Miejscowość": ["Warszawa", "Kraków", "Katowice"] * 2,
+            "Kod stacji": ["MzWarAlNiepo", "MpKrakBujaka", "SlKatoKossut"] * 2,
+            "Daily mean PM25": [10.0, 30.0, 50.0, 20.0, np.nan, 40.0],
+        }
+    )
+
+
+def test_station_coords_and_nearest(meta):
+    """
+    Sprawdza, czy StationIndex:
+    - odczytuje współrzędne z przecinkiem dziesiętnym,
+    - znajduje najbliższe stacje i odległości w km dla wielu punktów
+    """
+    coords = station_coords(meta)
+    assert coords.loc["MzWarAlNiepo", "lat"] == pytest.approx(52.219298)
+
+    index = StationIndex(coords)
+    out = index.nearest([50.06, 52.2], [19.94, 21.0], k=2)
+
+    first = out[out["Ranga"] == 1].set_index("Punkt")
+    assert list(first["Kod stacji"]) == ["MpKrakBujaka", "MzWarAlNiepo"]
+    # Kraków - Katowice to ok. 70 km
+    second = out[(out["Punkt"] == 0) & (out["Ranga"] == 2)].iloc[0]
+    assert second["Kod stacji"] == "SlKatoKossut"
+    assert second["Odległość [km]"] == pytest.approx(70, abs=10)
+
+
+def test_idw_points(meta, daily):
+    """
+    Sprawdza, czy idw_points:
+    - zwraca wartość stacji dla punktu w jej lokalizacji,
+    - pomija stacje bez pomiaru w danym dniu
+    """
+    wide = pivot_means(daily)
+    index = StationIndex.from_meta(meta)
+
+    out = idw_points(wide, index, [50.057447, 51.0], [19.926189, 20.0], k=3)
+
+    assert out.shape == (2, 2)
+    assert out[0, 0] == pytest.approx(30.0)
+    # drugiego dnia Kraków nie ma pomiaru - wynik jest między Katowicami a Warszawą
+    assert 20.0 < out[1, 0] < 40.0
+    assert 10.0 < out[0, 1] < 50.0
+
+
+def test_idw_grid(meta, daily):
+    """
+    Sprawdza, czy idw_grid zwraca siatkę wartości dla każdego dnia
+    """
+    times, lats, lons, values = idw_grid(daily, meta, step=0.5, bounds=(50.0, 52.0, 19.0, 21.0))
+
+    assert values.shape == (2, len(lats), len(lons))
+    assert len(times) == 2
+    assert np.nanmin(values) >= 10.0 and np.nanmax(values) <= 50.0
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 import pytest
 
@@ -6,6 +7,9 @@ from stats import (
     calc_monthly_means,
     calc_monthly_city_means,
     calc_daily_means,
+    calc_coverage,
+    calc_availability,
+    check_single_pollutant,
     count_overnorm_days,
     top_bottom_stations,
 )
@@ -453,3 +457,184 @@ def test_top_bottom_stations():
     expected = expected.sort_values("Kod stacji").reset_index(drop=True)
 
     pd.testing.assert_frame_equal(out, expected)
+
+
+def test_calc_daily_means_coverage(df_pm25_formated):
+    """
+    Sprawdza, czy calc_daily_means z with_coverage=True:
+    - liczy liczbę ważnych godzin w dobie,
+    - pomija brakujące pomiary w liczbie godzin,
+    - wyznacza pokrycie jako odsetek z 24 godzin
+    """
+    df = df_pm25_formated.copy()
+    df.loc[df["Kod stacji"] == "DsWrocWybCon", "PM25"] = [50.0, float("nan")]
+
+    out = calc_daily_means(df, with_coverage=True)
+    out = out.set_index("Kod stacji")
+
+    assert out.loc["DsJelGorOgin", "Liczba godzin"] == 2
+    assert out.loc["DsWrocWybCon", "Liczba godzin"] == 1
+    assert out.loc["DsWrocWybCon", "Daily mean PM25"] == pytest.approx(50.0)
+    assert out.loc["DsWrocWybCon", "Pokrycie"] == pytest.approx(1 / 24)
+
+
+def test_count_overnorm_days_min_coverage():
+    """
+    Sprawdza, czy count_overnorm_days z min_coverage:
+    - pomija doby z niewystarczającą liczbą pomiarów,
+    - zgłasza błąd, gdy brak kolumny pokrycia
+    """
+    daily = pd.DataFrame(
+        {
+            "Rok": [2015, 2015, 2015],
+            "Data": pd.to_datetime(["2015-01-01", "2015-01-02", "2015-01-01"]).date,
+            "Miejscowość": ["Wrocław", "Wrocław", "Jelenia Góra"],
+            "Kod stacji": ["DsWrocAlWisn", "DsWrocAlWisn", "DsJelGorOgin"],
+            "Daily mean PM25": [40.0, 30.0, 50.0],
+            "Liczba godzin": [24, 2, 18],
+            "Pokrycie": [1.0, 2 / 24, 0.75],
+        }
+    )
+
+    out = count_overnorm_days(daily, threshold=15, min_coverage=0.75)
+    out = out.set_index("Kod stacji")["Liczba dni PM25 > 15"]
+
+    assert out["DsWrocAlWisn"] == 1
+    assert out["DsJelGorOgin"] == 1
+
+    with pytest.raises(ValueError):
+        count_overnorm_days(daily.drop(columns="Pokrycie"), 15, min_coverage=0.75)
+
+
+def test_calc_monthly_means_min_coverage(df_pm25_formated):
+    """
+    Sprawdza, czy calc_monthly_means z min_coverage:
+    - zwraca liczbę godzin i pokrycie miesiąca,
+    - zamienia na NaN średnie miesięcy z pokryciem poniżej progu
+    """
+    out = calc_monthly_means(df_pm25_formated, with_coverage=True)
+    assert (out["Liczba godzin"] == 2).all()
+    assert out["Pokrycie"].iloc[0] == pytest.approx(2 / (31 * 24))
+
+    masked = calc_monthly_means(df_pm25_formated, min_coverage=0.75)
+    assert list(masked.columns) == [
+        "Rok", "Miesiąc", "Miejscowość", "Kod stacji", "Mean PM25"
+    ]
+    assert masked["Mean PM25"].isna().all()
+
+
+def test_calc_coverage(df_pm25_formated):
+    """
+    Sprawdza, czy calc_coverage:
+    - sumuje godziny i dni ważne dla każdej stacji i roku,
+    - liczy pokrycie roczne względem liczby godzin w roku
+    """
+    daily = calc_daily_means(df_pm25_formated, with_coverage=True)
+
+    out = calc_coverage(daily, min_coverage=0.05)
+    out = out.set_index("Kod stacji")
+
+    assert out.loc["DsJelGorOgin", "Liczba dni"] == 1
+    assert out.loc["DsJelGorOgin", "Dni ważne"] == 1
+    assert out.loc["DsJelGorOgin", "Liczba godzin"] == 2
+    assert out.loc["DsJelGorOgin", "Pokrycie"] == pytest.approx(2 / (365 * 24))
+
+
+def test_convert_df_and_daily_means_with_pollutants():
+    """
+    Sprawdza, czy convert_df i calc_daily_means dla danych wielowskaźnikowych:
+    - zachowują kolumnę Wskaźnik,
+    - liczą średnie osobno dla każdego wskaźnika tej samej stacji,
+    - są odrzucane przez analizy stacji, które nie rozróżniają wskaźników
+    """
+    from episodes import detect_episodes
+
+    cols = pd.MultiIndex.from_tuples(
+        [
+            ("datetime", "", ""),
+            ("PM25", "Wrocław", "DsWrocAlWisn"),
+            ("PM10", "Wrocław", "DsWrocAlWisn"),
+        ],
+        names=["Wskaźnik", "Miejscowość", "Kod stacji"],
+    )
+    df = pd.DataFrame(
+        [["2015-01-01 01:00:00", 10.0, "30,0"], ["2015-01-01 02:00:00", 20.0, 50.0]],
+        columns=cols,
+    )
+    df[("datetime", "", "")] = pd.to_datetime(df[("datetime", "", "")])
+
+    long = convert_df(df)
+    assert list(long.columns) == ["datetime", "Wskaźnik", "Miejscowość", "Kod stacji", "PM25"]
+
+    daily = calc_daily_means(long).set_index("Wskaźnik")
+    assert daily.loc["PM25", "Daily mean PM25"] == pytest.approx(15.0)
+    assert daily.loc["PM10", "Daily mean PM25"] == pytest.approx(40.0)
+
+    with pytest.raises(ValueError, match="select_pollutant"):
+        check_single_pollutant(df)
+    with pytest.raises(ValueError, match="PM10"):
+        detect_episodes(daily.reset_index(), 15)
+    check_single_pollutant(long[long["Wskaźnik"] == "PM10"])
+
+
+def test_convert_df_sparse_matches_dense(df_pm25):
+    """
+    Sprawdza, czy convert_df dla rzadkich kolumn stacji:
+    - zwraca tylko istniejące pomiary, w tej samej kolejności co dla danych gęstych,
+    - daje te same średnie dzienne co dane gęste,
+    - pozwala policzyć tabelę dostępności stacji
+    """
+    from get_data import to_sparse
+
+    df = df_pm25.copy()
+    df[df.columns[2]] = np.nan
+    dense = convert_df(df)
+    sparse = convert_df(to_sparse(df))
+
+    expected = dense.dropna(subset=["PM25"]).reset_index(drop=True)
+    pd.testing.assert_frame_equal(sparse, expected, check_dtype=False)
+    pd.testing.assert_frame_equal(
+        calc_daily_means(sparse),
+        calc_daily_means(dense).dropna(subset=["Daily mean PM25"]).reset_index(drop=True),
+        check_dtype=False,
+    )
+
+    availability = calc_availability(sparse)
+    assert df.columns[2][1] not in set(availability["Kod stacji"])
+    assert availability["Liczba pomiarów"].sum() == len(sparse)
+
+
+def test_stats_on_quantized(df_pm25):
+    """
+    Sprawdza, czy dla danych skwantowanych (get_data.to_quantized):
+    - convert_df zwraca te same wiersze i wartości co dla danych float (także braki),
+    - średnie dzienne i miesięczne liczone na liczbach całkowitych są równe średnim z danych float,
+      również dla dób bez pomiarów,
+    - to_matrix dekoduje wartości i braki
+    """
+    from get_data import to_quantized
+    from stats import to_matrix
+
+    times = pd.date_range("2015-01-01 01:00", periods=24 * 45, freq="h")
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame({0: times, **{k: np.round(rng.uniform(0, 300, len(times)), 2) for k in (1, 2, 3)}})
+    df.columns = df_pm25.columns
+    df.iloc[::5, 2] = np.nan
+    df.iloc[23:47, 3] = np.nan
+    q = to_quantized(df)
+    dense = convert_df(df)
+
+    pd.testing.assert_frame_equal(convert_df(q), dense)
+    raw = convert_df(q, decode=False)
+    assert raw["PM25"].dtype == "Int16"
+    for calc in (calc_daily_means, calc_monthly_means):
+        pd.testing.assert_frame_equal(
+            calc(raw, with_coverage=True),
+            calc(dense, with_coverage=True),
+        )
+    daily = calc_daily_means(raw, with_coverage=True)
+    empty = daily[daily["Liczba godzin"] == 0]
+    assert len(empty) == 1 and empty["Daily mean PM25"].isna().all()
+
+    _, values, _ = to_matrix(q)
+    np.testing.assert_allclose(values, df.iloc[:, 1:].to_numpy())
@@ -0,0 +1,53 @@
+import pandas as pd
+import pytest
+
+import get_data
+from synthetic import (
+    clean_info_for,
+    make_stations,
+    make_year_sheet,
+    serve_directory,
+    write_archive_set,
+)
+
+
+def test_make_year_sheet_layouts():
+    """
+    Sprawdza, czy make_year_sheet:
+    - tworzy nagłówek zgodny z parametrami clean_info_for dla starego i nowego układu,
+    - używa starych kodów stacji przed rokiem zmiany nazwy
+    """
+    stations = make_stations(6, renamed_fraction=0.5, seed=1)
+    renamed = stations.dropna(subset=["Stary Kod stacji \n(o ile inny od aktualnego)"])
+
+    for year in [2015, 2018]:
+        sheet = make_year_sheet(year, stations, rename_year=2018)
+        cleaned = get_data.clean_pm25(sheet, **clean_info_for(year))
+
+        assert len(cleaned) == 8760
+        assert cleaned["datetime"].iloc[0] == pd.Timestamp(f"{year}-01-01 01:00")
+        old_present = renamed["Stary Kod stacji \n(o ile inny od aktualnego)"].isin(cleaned.columns)
+        assert old_present.all() == (year < 2018)
+
+
+def test_make_pm25_data_on_synthetic_archives(tmp_path, monkeypatch):
+    """
+    Sprawdza, czy make_pm25_data na syntetycznych archiwach udostępnionych lokalnie:
+    - pobiera i wczytuje archiwa ZIP z plikami XLSX,
+    - łączy lata po aktualizacji kodów stacji (żadna stacja nie ginie)
+    """
+    config = write_archive_set(tmp_path / "archives", years=[2015, 2018], n_stations=4, seed=2)
+
+    with serve_directory(tmp_path / "archives") as url:
+        monkeypatch.setattr(get_data, "gios_archive_url", url)
+        df, meta = get_data.make_pm25_data(
+            config["years"],
+            config["gios_url_ids"],
+            config["gios_pm25_file"],
+            config["clean_info"],
+            tmp_path / "PM25.csv",
+        )
+
+    assert len(df.columns) == 1 + 4
+    assert set(df.columns.get_level_values("Kod stacji")[1:]) == set(config["meta"]["Kod stacji"])
+    assert len(df) == 8760 * 2
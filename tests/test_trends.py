@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from trends import calc_trends, calc_yoy_deltas
+
+
+@pytest.fixture
+def monthly_means():
+    """
+    Średnie miesięczne PM2.5 dla trzech stacji: malejącej, rosnącej i bez trendu
+    """
+    rng = np.random.default_rng(0)
+    rows = []
+    for year in [2015, 2018, 2021, 2024]:
+        for month in range(1, 13):
+            t = year + (month - 1) / 12 - 2015
+            rows += [
+                ("Warszawa", "MzWarAlNiepo", year, month, 40 - 2 * t + rng.normal(0, 0.5)),
+                ("Katowice", "SlKatoKossut", year, month, 20 + 1 * t + rng.normal(0, 0.5)),
+                ("Kraków", "MpKrakBujaka", year, month, 30 + rng.normal(0, 5)),
+            ]
+    return pd.DataFrame(rows, columns=["Miejscowość", "Kod stacji", "Rok", "Miesiąc", "Mean PM25"])
+
+
+def test_calc_trends(monthly_means):
+    """
+    Sprawdza, czy calc_trends:
+    - wyznacza nachylenie Theila-Sena w µg/m³ na rok,
+    - rozpoznaje istotny trend rosnący i malejący testem Manna-Kendalla
+    """
+    out = calc_trends(monthly_means).set_index("Kod stacji")
+
+    assert out.loc["MzWarAlNiepo", "Nachylenie [µg/m3/rok]"] == pytest.approx(-2, abs=0.1)
+    assert out.loc["SlKatoKossut", "Nachylenie [µg/m3/rok]"] == pytest.approx(1, abs=0.1)
+    assert out.loc["MzWarAlNiepo", "Trend"] == "malejący"
+    assert out.loc["SlKatoKossut", "Trend"] == "rosnący"
+    assert out.loc["MpKrakBujaka", "Trend"] == "brak"
+    assert (out["Liczba miesięcy"] == 48).all()
+
+
+def test_calc_trends_seasonal_with_missing(monthly_means):
+    """
+    Sprawdza, czy calc_trends w wariancie sezonowym:
+    - porównuje tylko pary z tego samego miesiąca,
+    - pomija brakujące średnie miesięczne
+    """
+    df = monthly_means.copy()
+    df.loc[(df["Kod stacji"] == "SlKatoKossut") & (df["Rok"] == 2018), "Mean PM25"] = np.nan
+
+    out = calc_trends(df, seasonal=True).set_index("Kod stacji")
+
+    assert out.loc["SlKatoKossut", "Liczba miesięcy"] == 36
+    # 12 miesięcy po 3 lata -> 3 pary w każdym miesiącu, wszystkie rosnące
+    assert out.loc["SlKatoKossut", "S"] == 36
+    assert out.loc["MzWarAlNiepo", "Nachylenie [µg/m3/rok]"] == pytest.approx(-2, abs=0.1)
+
+
+def test_calc_yoy_deltas(monthly_means):
+    """
+    Sprawdza, czy calc_yoy_deltas liczy zmiany między kolejnymi latami dla każdego miesiąca
+    """
+    out = calc_yoy_deltas(monthly_means)
+
+    assert len(out) == 3 * 12 * 3
+    row = out[
+        (out["Kod stacji"] == "MzWarAlNiepo") & (out["Miesiąc"] == 1) & (out["Rok od"] == 2015)
+    ].iloc[0]
+    assert row["Rok do"] == 2018
+    assert row["Zmiana PM25"] == pytest.approx(-6, abs=2)
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from validation import validate
+
+
+@pytest.fixture
+def df_pm25():
+    """
+    Dane PM2.5 z dwóch stacji przez 3 dni z typowymi błędami
+    """
+    times = pd.date_range("2024-01-01 01:00", periods=3 * 24, freq="h")
+    times = times.where(times.hour != 0, times - pd.Timedelta(seconds=1))
+    rng = np.random.default_rng(0)
+    a = rng.uniform(5, 50, len(times)).round(1)
+    b = rng.uniform(5, 50, len(times)).round(1)
+
+    a[10] = -4.0            # wartość ujemna
+    a[30:38] = 12.0         # zawieszony czujnik (8 h)
+    b[40:48] = np.nan       # luka 8 h
+    b[5] = 5000.0           # wartość absurdalna
+
+    cols = pd.MultiIndex.from_tuples(
+        [("datetime", ""), ("Wrocław", "DsWrocAlWisn"), ("Kraków", "MpKrakBujaka")],
+        names=["Miejscowość", "Kod stacji"],
+    )
+    df = pd.DataFrame({0: times, 1: a, 2: [str(v).replace(".", ",") for v in b]})
+    df.columns = cols
+    # powtórzona godzina i usunięte 3 godziny
+    df = pd.concat([df.iloc[:20], df.iloc[[19]], df.iloc[23:]], ignore_index=True)
+    return df
+
+
+def test_validate_report(df_pm25):
+    """
+    Sprawdza, czy validate:
+    - wykrywa duplikaty i brakujące godziny wspólne dla wszystkich stacji,
+    - wykrywa wartości spoza zakresu, stałe serie i luki dla poszczególnych stacji,
+    - zapisuje problemy jako zwarte przedziały
+    """
+    df, report = validate(df_pm25)
+
+    assert df is df_pm25
+    problems = report.set_index(["Problem", "Kod stacji"])
+    assert report.loc[report["Problem"] == "duplikat", "Początek"].tolist() == [df_pm25.iloc[19, 0]]
+
+    gap = report[report["Problem"] == "brak godziny"].iloc[0]
+    assert gap["Liczba godzin"] == 3
+    assert gap["Początek"] == pd.Timestamp("2024-01-01 21:00")
+
+    assert problems.loc[("poza zakresem", "DsWrocAlWisn"), "Liczba godzin"] == 1
+    assert problems.loc[("poza zakresem", "MpKrakBujaka"), "Początek"] == pd.Timestamp("2024-01-01 06:00")
+    assert problems.loc[("stała wartość", "DsWrocAlWisn"), "Liczba godzin"] == 8
+    assert problems.loc[("luka", "MpKrakBujaka"), "Liczba godzin"] == 8
+    assert ("luka", "DsWrocAlWisn") not in problems.index
+
+
+def test_validate_mask(df_pm25):
+    """
+    Sprawdza, czy validate(mask=True):
+    - usuwa powtórzone znaczniki czasu,
+    - zamienia wartości spoza zakresu i stałe serie na NaN, nie zmieniając pozostałych
+    """
+    masked, report = validate(df_pm25, mask=True)
+
+    assert masked[masked.columns[0]].is_unique
+    assert len(masked) == len(df_pm25) - 1
+    assert list(masked.columns) == list(df_pm25.columns)
+
+    wroc = masked[("Wrocław", "DsWrocAlWisn")]
+    assert (wroc.dropna() >= 0).all()
+    assert wroc.isna().sum() == 1 + 8
+    assert masked[("Kraków", "MpKrakBujaka")].max() < 1000
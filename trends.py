@@ -0,0 +1,125 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+
+from stats import check_single_pollutant
+
+
+def _station_matrix(monthly_means):
+    """
+    Przekształca średnie miesięczne do macierzy (stacja x miesiąc kolejnych lat).
+
+    Args:
+        monthly_means (pandas.DataFrame): Średnie miesięczne PM2.5 (wynik calc_monthly_means).
+
+    Returns:
+        tuple: DataFrame o wymiarach (stacja, (Rok, Miesiąc)) oraz czas w latach dla kolumn.
+
+    Raises:
+        ValueError: Gdy dane zawierają kilka wskaźników (stats.check_single_pollutant).
+    """
+    check_single_pollutant(monthly_means)
+    df = monthly_means.copy()
+    df["Mean PM25"] = pd.to_numeric(df["Mean PM25"], errors="coerce")
+    wide = (
+        df.groupby(["Miejscowość", "Kod stacji", "Rok", "Miesiąc"])["Mean PM25"]
+        .mean()
+        .unstack(["Rok", "Miesiąc"])
+        .sort_index(axis=1)
+    )
+    years = wide.columns.get_level_values("Rok").to_numpy(dtype=float)
+    months = wide.columns.get_level_values("Miesiąc").to_numpy(dtype=float)
+    return wide, years + (months - 1) / 12
+
+
+def calc_trends(monthly_means, alpha=0.05, seasonal=False):
+    """
+    Wyznacza trend średnich miesięcznych PM2.5 dla wszystkich stacji jednocześnie.
+
+    Nachylenie Theila-Sena to mediana nachyleń wszystkich par punktów, a test
+    Manna-Kendalla sumuje znaki różnic tych samych par. Pary są liczone jedną
+    operacją na tablicy (stacja x para), bez pętli po stacjach.
+
+    Args:
+        monthly_means (pandas.DataFrame): Średnie miesięczne PM2.5 (wynik calc_monthly_means).
+        alpha (float): Poziom istotności testu Manna-Kendalla.
+        seasonal (bool): Czy porównywać tylko pary z tego samego miesiąca
+            (sezonowy test Manna-Kendalla i sezonowe nachylenie Sena).
+
+    Returns:
+        pandas.DataFrame: Nachylenie [µg/m³ na rok], statystyka S, Z, p-value i kierunek trendu dla każdej stacji.
+    """
+    wide, t = _station_matrix(monthly_means)
+    x = wide.to_numpy(dtype=float)
+
+    i, j = np.triu_indices(len(t), k=1)
+    months = np.rint((t - np.floor(t)) * 12).astype(int)
+    if seasonal:
+        same = months[i] == months[j]
+        i, j = i[same], j[same]
+
+    dy = x[:, j] - x[:, i]
+    slopes = dy / (t[j] - t[i])
+
+    with warnings.catch_warnings():
+        # stacje bez żadnej pełnej pary dostają NaN
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        slope = np.nanmedian(slopes, axis=1)
+    s = np.nansum(np.sign(dy), axis=1)
+
+    # wariancja S bez poprawki na remisy (pomiary ciągłe)
+    observed = ~np.isnan(x)
+    if seasonal:
+        n = np.stack([observed[:, months == m].sum(axis=1) for m in range(12)], axis=1)
+        var = (n * (n - 1) * (2 * n + 5) / 18).sum(axis=1)
+    else:
+        n = observed.sum(axis=1)
+        var = n * (n - 1) * (2 * n + 5) / 18
+
+    with np.errstate(all="ignore"):
+        z = np.where(var > 0, (s - np.sign(s)) / np.sqrt(var), np.nan)
+    p = 2 * norm.sf(np.abs(z))
+
+    out = wide.index.to_frame(index=False)
+    out["Liczba miesięcy"] = observed.sum(axis=1)
+    out["Nachylenie [µg/m3/rok]"] = slope
+    out["S"] = s
+    out["Z"] = z
+    out["p"] = p
+    out["Trend"] = np.select(
+        [(p < alpha) & (s > 0), (p < alpha) & (s < 0)],
+        ["rosnący", "malejący"],
+        default="brak",
+    )
+    return out
+
+
+def calc_yoy_deltas(monthly_means):
+    """
+    Liczy zmiany średnich miesięcznych PM2.5 między kolejnymi dostępnymi latami.
+
+    Args:
+        monthly_means (pandas.DataFrame): Średnie miesięczne PM2.5 (wynik calc_monthly_means).
+
+    Returns:
+        pandas.DataFrame: Zmiana PM2.5 dla każdej stacji, miesiąca i pary kolejnych lat.
+    """
+    df = monthly_means.copy()
+    df["Mean PM25"] = pd.to_numeric(df["Mean PM25"], errors="coerce")
+    wide = (
+        df.groupby(["Miejscowość", "Kod stacji", "Miesiąc", "Rok"])["Mean PM25"]
+        .mean()
+        .unstack("Rok")
+        .sort_index(axis=1)
+    )
+    years = wide.columns.to_numpy()
+    delta = np.diff(wide.to_numpy(dtype=float), axis=1)
+
+    out = pd.DataFrame(
+        delta,
+        index=wide.index,
+        columns=pd.MultiIndex.from_arrays([years[:-1], years[1:]], names=["Rok od", "Rok do"]),
+    )
+    return out.stack(["Rok od", "Rok do"]).rename("Zmiana PM25").reset_index()
@@ -0,0 +1,189 @@
+import numpy as np
+import pandas as pd
+
+from stats import hour_slots, to_matrix
+
+# domyślne granice wiarygodnych stężeń PM2.5 [µg/m³]
+min_value = 0.0
+max_value = 1000.0
+# liczba kolejnych identycznych pomiarów uznawana za zawieszony czujnik
+flatline_hours = 6
+# minimalna długość serii braków zapisywanej w raporcie [h]
+min_gap_hours = 6
+
+report_columns = ["Problem", "Początek", "Koniec", "Liczba godzin"]
+
+
+def _runs(flags):
+    """
+    Wyznacza serie wartości True w kolumnach macierzy (wszystkie stacje naraz).
+
+    Args:
+        flags (numpy.ndarray): Macierz logiczna (godzina x stacja).
+
+    Returns:
+        tuple: Numery stacji, początki serii i końce serii (wyłącznie) jako tablice numpy.
+    """
+    n, m = flags.shape
+    padded = np.zeros((m, n + 2), dtype=np.int8)
+    padded[:, 1:-1] = flags.T
+    step = np.diff(padded, axis=1)
+    station, starts = np.nonzero(step == 1)
+    _, ends = np.nonzero(step == -1)
+    return station, starts, ends
+
+
+def _flatline_mask(values, hours):
+    """
+    Oznacza pomiary należące do serii co najmniej `hours` identycznych wartości.
+
+    Args:
+        values (numpy.ndarray): Macierz pomiarów (godzina x stacja).
+        hours (int): Minimalna długość serii.
+
+    Returns:
+        numpy.ndarray: Macierz logiczna oznaczonych pomiarów.
+    """
+    mask = np.zeros(values.shape, dtype=bool)
+    if len(values) < 2:
+        return mask
+    # braki danych nie tworzą serii (NaN != NaN)
+    same = values[1:] == values[:-1]
+    station, starts, ends = _runs(same)
+    # seria k równych różnic oznacza k + 1 identycznych pomiarów
+    long = ends - starts + 1 >= hours
+    station, starts = station[long], starts[long]
+    lengths = ends[long] - starts + 1
+    # indeksy wszystkich pomiarów w seriach bez pętli po seriach
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    mask[np.repeat(starts, lengths) + offsets, np.repeat(station, lengths)] = True
+    return mask
+
+
+def _station_report(problem, flags, times, stations, min_length=1):
+    """
+    Zamienia macierz oznaczonych pomiarów na zwarte przedziały dla każdej stacji.
+
+    Args:
+        problem (str): Nazwa problemu w raporcie.
+        flags (numpy.ndarray): Macierz logiczna (godzina x stacja).
+        times (pandas.DatetimeIndex): Znaczniki czasu wierszy.
+        stations (pandas.Index): Kolumny stacji.
+        min_length (int): Minimalna długość zapisywanej serii.
+
+    Returns:
+        pandas.DataFrame: Przedziały z kluczami stacji, początkiem, końcem i liczbą godzin.
+    """
+    station, starts, ends = _runs(flags)
+    keep = ends - starts >= min_length
+    station, starts, ends = station[keep], starts[keep], ends[keep]
+
+    out = pd.DataFrame({
+        name: stations.get_level_values(k).to_numpy()[station]
+        for k, name in enumerate(stations.names)
+    })
+    out["Problem"] = problem
+    out["Początek"] = times[starts]
+    out["Koniec"] = times[ends - 1]
+    out["Liczba godzin"] = ends - starts
+    return out
+
+
+def _row_report(problem, starts, ends, times, stations):
+    """
+    Tworzy wpisy raportu dotyczące całych wierszy (wszystkich stacji).
+
+    Args:
+        problem (str): Nazwa problemu w raporcie.
+        starts (numpy.ndarray): Indeksy pierwszych wierszy przedziałów.
+        ends (numpy.ndarray): Indeksy ostatnich wierszy przedziałów.
+        times (pandas.DatetimeIndex): Znaczniki czasu wierszy.
+        stations (pandas.Index): Kolumny stacji (dla nazw kluczy).
+
+    Returns:
+        pandas.DataFrame: Wpisy raportu z pustymi kluczami stacji.
+    """
+    out = pd.DataFrame({name: [None] * len(starts) for name in stations.names})
+    out["Problem"] = problem
+    out["Początek"] = times[starts]
+    out["Koniec"] = times[ends]
+    return out
+
+
+def validate(df_pm25, mask=False, min_value=min_value, max_value=max_value,
+             flatline_hours=flatline_hours, min_gap_hours=min_gap_hours):
+    """
+    Sprawdza jakość danych PM2.5 wszystkich stacji jednocześnie.
+
+    Wykrywane problemy:
+    - "duplikat" - powtórzone znaczniki czasu (np. po korekcie midnight),
+    - "brak godziny" - godziny nieobecne w danych w obrębie roku (dla wszystkich stacji),
+    - "poza zakresem" - stężenia mniejsze niż min_value lub większe niż max_value,
+    - "stała wartość" - co najmniej flatline_hours identycznych kolejnych pomiarów,
+    - "luka" - co najmniej min_gap_hours kolejnych braków pomiaru stacji.
+
+    Wszystkie sprawdzenia działają na macierzy (godzina x stacja) bez pętli
+    po stacjach; serie wyznaczane są kodowaniem długości serii.
+
+    Args:
+        df_pm25 (pandas.DataFrame): Dane PM2.5 w formacie szerokim z MultiIndex.
+        mask (bool): Czy zwrócić dane z usuniętymi duplikatami i wartościami
+            "poza zakresem" / "stała wartość" zamienionymi na NaN.
+        min_value (float): Najmniejsze wiarygodne stężenie.
+        max_value (float): Największe wiarygodne stężenie.
+        flatline_hours (int): Minimalna długość serii identycznych pomiarów.
+        min_gap_hours (int): Minimalna długość zapisywanej luki.
+
+    Returns:
+        tuple: Dane (po maskowaniu, gdy mask=True) oraz raport problemów z kluczami stacji,
+            kolumnami Problem, Początek, Koniec i Liczba godzin.
+    """
+    times, values, stations = to_matrix(df_pm25)
+    reports = []
+
+    # duplikaty znaczników czasu - pozostaje pierwsze wystąpienie
+    duplicated = times.duplicated(keep="first")
+    if duplicated.any():
+        rows = np.flatnonzero(duplicated)
+        report = _row_report("duplikat", rows, rows, times, stations)
+        report["Liczba godzin"] = 1
+        reports.append(report)
+        keep = ~duplicated
+        times, values = times[keep], values[keep]
+
+    # brakujące godziny - pomiar z 23:59:59 (po midnight) należy do pełnej godziny 00:00
+    hours = hour_slots(times)
+    order = np.argsort(hours, kind="stable")
+    step = np.diff(hours[order])
+    sorted_times = times[order]
+    # przerwa między analizowanymi latami (np. 2015 i 2018) nie jest brakiem danych
+    year = sorted_times.year.to_numpy()
+    holes = np.flatnonzero((step > 1) & (year[1:] == year[:-1]))
+    if len(holes):
+        report = _row_report("brak godziny", holes, holes + 1, sorted_times, stations)
+        report["Początek"] = sorted_times[holes].ceil("h") + pd.Timedelta(hours=1)
+        report["Koniec"] = sorted_times[holes + 1].ceil("h") - pd.Timedelta(hours=1)
+        report["Liczba godzin"] = step[holes] - 1
+        reports.append(report)
+
+    with np.errstate(invalid="ignore"):
+        out_of_range = (values < min_value) | (values > max_value)
+    flat = _flatline_mask(values, flatline_hours)
+
+    reports.append(_station_report("poza zakresem", out_of_range, times, stations))
+    reports.append(_station_report("stała wartość", flat, times, stations))
+    reports.append(_station_report("luka", np.isnan(values), times, stations, min_gap_hours))
+
+    report = pd.concat(reports, ignore_index=True)[list(stations.names) + report_columns]
+    report["Liczba godzin"] = report["Liczba godzin"].astype(int)
+
+    if not mask:
+        return df_pm25, report
+
+    values = np.where(out_of_range | flat, np.nan, values)
+    masked = pd.DataFrame(values, columns=stations)
+    masked.insert(0, df_pm25.columns[0], np.asarray(times))
+    if any(isinstance(df_pm25[c].dtype, pd.SparseDtype) for c in stations):
+        from get_data import to_sparse
+        masked = to_sparse(masked)
+    return masked, report